@@ -0,0 +1,64 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Measure loading documents saved with htmlfive.html5_binary against parsing their HTML again, on synthetic
+documents (see corpus.py) of several kinds
+
+Usage: python benchmarks/bench_binary.py [--kinds wide,deep,...] [--size N] [--repeats N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+from htmlfive import Html5Parser, Html5Exporter
+from htmlfive.html5_binary import dumps, dump, load
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import corpus  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--kinds", default=",".join(corpus.KINDS), help="comma separated kinds of document")
+    parser.add_argument("--size", type=int, default=10000, help="document size")
+    parser.add_argument("--repeats", type=int, default=3, help="number of times to repeat each measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        for kind in args.kinds.split(","):
+            html = corpus.generate(kind, args.size)
+            (parse_time, doc) = corpus.measure(lambda: Html5Parser().parse(html), args.repeats)
+            (dump_time, data) = corpus.measure(lambda: dumps(doc), args.repeats)
+            path = os.path.join(folder, kind + ".h5b")
+            dump(doc, path)
+            (load_time, loaded) = corpus.measure(lambda: load(path), args.repeats)
+            assert Html5Exporter().export(loaded) == Html5Exporter().export(doc)
+            print("%-8s html %9d bytes  binary %9d bytes  parse %.3fs  dump %.3fs  load %.3fs  (%.1fx faster)" %
+                  (kind, len(html.encode("utf-8")), len(data), parse_time, dump_time, load_time,
+                   parse_time / load_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Compare Html5Builder.get_html rendering fragments directly to text against rendering via DOM nodes,
+compare inline styles with generated style classes, measure rendering again after a small change to
+a document made up of many sections, and compare building a table with add_table against building
+a fragment per cell
+
+Usage: python benchmarks/bench_builder.py [--elements N] [--repeats N]
+"""
+
+import argparse
+import time
+
+from htmlfive import Html5Builder
+
+
+CELL_STYLES = [{"color": "blue", "text-align": "right", "padding": "2px 4px"},
+               {"color": "black", "text-align": "left", "padding": "2px 4px"},
+               {"color": "black", "text-align": "left", "padding": "2px 4px", "font-weight": "bold"},
+               {"color": "red", "text-align": "right", "padding": "2px 4px"}]
+
+
+def build_report(element_count, style_classes=False):
+    builder = Html5Builder(language="en", style_classes=style_classes)
+    builder.head().add_element("title").add_text("Report")
+    table = builder.body().add_element("table", {"class": "report"})
+    row = None
+    for idx in range(element_count):
+        if idx % 4 == 0:
+            row = table.add_element("tr")
+        row.add_element("td", {"data-idx": str(idx)}, CELL_STYLES[idx % 4]).add_text("cell %d" % idx)
+    return builder
+
+
+def time_build(element_count, repeats, via_dom):
+    best = None
+    for _ in range(repeats):
+        builder = build_report(element_count)
+        if via_dom:
+            builder.register_post_build(lambda head, body: None)
+        start = time.perf_counter()
+        builder.get_html()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def time_style_classes(element_count, repeats, style_classes):
+    best = None
+    for _ in range(repeats):
+        builder = build_report(element_count, style_classes)
+        start = time.perf_counter()
+        html = builder.get_html()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return (best, len(html))
+
+
+def time_rerender(element_count, repeats, section_count=100):
+    builder = Html5Builder(language="en")
+    cells = []
+    for section_idx in range(section_count):
+        table = builder.body().add_element("table")
+        for idx in range(element_count // section_count):
+            cells.append(table.add_element("td").add_text("cell %d" % idx))
+    builder.get_html()
+    best = None
+    for repeat in range(repeats):
+        cells[repeat].set_attribute("class", "changed")
+        start = time.perf_counter()
+        builder.get_html()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def time_table(element_count, repeats, bulk):
+    rows = [(idx, "name %d" % idx, idx * 1.5, "a < b") for idx in range(element_count // 4)]
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        builder = Html5Builder(language="en")
+        if bulk:
+            builder.body().add_table(rows, header=["id", "name", "value", "note"])
+        else:
+            table = builder.body().add_element("table")
+            row = table.add_element("tr")
+            for heading in ["id", "name", "value", "note"]:
+                row.add_element("th").add_text(heading)
+            for values in rows:
+                row = table.add_element("tr")
+                for value in values:
+                    row.add_element("td").add_text(str(value))
+        builder.get_html()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=100000, help="number of table cells to build")
+    parser.add_argument("--repeats", type=int, default=3, help="number of times to repeat each measurement")
+    args = parser.parse_args()
+
+    direct = time_build(args.elements, args.repeats, via_dom=False)
+    via_dom = time_build(args.elements, args.repeats, via_dom=True)
+    print("elements: %d" % args.elements)
+    print("direct:   %.3fs" % direct)
+    print("via dom:  %.3fs" % via_dom)
+    print("speedup:  %.1fx" % (via_dom / direct))
+    for style_classes in [False, True]:
+        (elapsed, size) = time_style_classes(args.elements, args.repeats, style_classes)
+        print("style_classes=%s: %.3fs, %d characters" % (style_classes, elapsed, size))
+    print("table with a fragment per cell (build and render): %.3fs" % time_table(args.elements, args.repeats, False))
+    print("table with add_table (build and render):           %.3fs" % time_table(args.elements, args.repeats, True))
+    print("re-render after a change to 1 of 100 sections: %.3fs" % time_rerender(args.elements, args.repeats))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Measure diffing two versions of a document with htmlfive.html5_diff, comparing the size of the patch with the
+size of the exported document which would otherwise be sent
+
+Usage: python benchmarks/bench_diff.py [--size N] [--changes N] [--repeats N]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from htmlfive import Html5Parser, Html5Exporter
+from htmlfive.html5_diff import diff, apply_patch
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import corpus  # noqa: E402
+
+
+def change(html, change_count, seed=0):
+    # change the title attribute of some elements, and move some elements to the end of the body
+    rng = random.Random(seed)
+    new = Html5Parser().parse(html)
+    elements = new.getElementsByTagName("div")
+    for element in rng.sample(list(elements), change_count):
+        element.setAttribute("title", "changed")
+    body = new.getElementsByTagName("body")[0]
+    for element in rng.sample(list(elements), change_count):
+        body.appendChild(body.removeChild(element))
+    return new
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=10000, help="number of elements in the document")
+    parser.add_argument("--changes", type=int, default=10, help="number of elements to change and to move")
+    parser.add_argument("--repeats", type=int, default=3, help="number of times to repeat each measurement")
+    args = parser.parse_args()
+
+    html = corpus.generate("attrs", args.size)
+    old = Html5Parser().parse(html)
+    new = change(html, args.changes)
+    best = None
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        patch = diff(old, new)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    exported = Html5Exporter().export(new)
+    apply_patch(old, patch)
+    assert Html5Exporter().export(old) == exported
+    print("elements: %d, changed: %d, moved: %d" % (args.size, args.changes, args.changes))
+    print("diff:            %.3fs" % best)
+    print("patch:           %d operations, %d characters as JSON" % (len(patch), len(json.dumps(patch))))
+    print("whole document:  %d characters" % len(exported))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Measure escaping and unescaping with htmlfive.html5_entities against html.escape and html.unescape from the
+standard library, on the text and attribute values of an entity-free document and of an entity-heavy document
+
+Usage: python benchmarks/bench_entities.py [--size N] [--repeats N]
+"""
+
+import argparse
+import html
+import os
+import random
+import sys
+import time
+
+from htmlfive import Html5Parser
+from htmlfive.html5_entities import escape, unescape
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import corpus  # noqa: E402
+
+REFERENCES = ["&amp;", "&lt;", "&gt;", "&quot;", "&#39;", "&eacute;", "&copy;", "&#169;", "&#x2014;", "&nbsp;"]
+
+
+def get_strings(html_content):
+    # the text and attribute values of a document, as the parser sees them before unescaping
+    strings = []
+    for (tag, content) in Html5Parser().tokenize(html_content):
+        if tag is None and content is not None:
+            strings.append(content)
+        elif tag is not None and tag != "__comment__" and content:
+            strings.extend(value for value in content.values() if value is not None)
+    return strings
+
+
+def add_references(strings, seed=0):
+    # insert a character reference between some of the words of each string
+    rng = random.Random(seed)
+    return [" ".join(word + rng.choice(REFERENCES) if rng.random() < 0.3 else word for word in s.split(" "))
+            for s in strings]
+
+
+def measure(fn, strings, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for s in strings:
+            fn(s)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=10000, help="document size")
+    parser.add_argument("--repeats", type=int, default=5, help="number of times to repeat each measurement")
+    args = parser.parse_args()
+
+    entity_free = get_strings(corpus.generate("attrs", args.size))
+    entity_heavy = add_references(entity_free)
+    unescaped = [html.unescape(s) for s in entity_heavy]
+    for (corpus_name, strings, escape_strings) in [("entity-free", entity_free, entity_free),
+                                                   ("entity-heavy", entity_heavy, unescaped)]:
+        mb = sum(len(s) for s in strings) / 1e6
+        for (name, fn, fn_strings) in [("html.unescape", html.unescape, strings),
+                                       ("unescape", unescape, strings),
+                                       ("html.escape", html.escape, escape_strings),
+                                       ("escape", escape, escape_strings)]:
+            elapsed = measure(fn, fn_strings, args.repeats)
+            print("%-13s %-14s %8.4fs %8.1f MB/s" % (corpus_name, name, elapsed, mb / elapsed))
+
+
+if __name__ == '__main__':
+    main()
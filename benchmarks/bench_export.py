@@ -0,0 +1,78 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Measure exporting an element-heavy document (many small elements nested several levels deep, with no text and
+few attributes), where the time taken is dominated by writing tags and indentation
+
+Usage: python benchmarks/bench_export.py [--elements N] [--depth N] [--repeats N]
+"""
+
+import argparse
+import collections
+import os
+import sys
+
+from htmlfive import Html5Exporter, normalise
+from xml.dom.minidom import getDOMImplementation
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import corpus  # noqa: E402
+
+TAGS = ["div", "span", "ul", "li", "p", "br", "section", "img"]
+
+
+def generate(element_count, depth):
+    # each element has up to 4 children, cycling through the tags, until the element count is reached
+    doc = getDOMImplementation().createDocument(None, "html", None)
+    body = doc.documentElement.appendChild(doc.createElement("body"))
+    queue = collections.deque([(body, 0)])
+    count = 0
+    while count < element_count:
+        (parent, level) = queue.popleft() if queue else (body, 0)
+        for _ in range(4):
+            tag = TAGS[count % len(TAGS)]
+            element = parent.appendChild(doc.createElement(tag))
+            if count % 10 == 0:
+                element.setAttribute("class", "c%d" % (count % 7))
+            count += 1
+            if tag not in ("br", "img") and level + 1 < depth:
+                queue.append((element, level + 1))
+    return doc
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=200000, help="number of elements")
+    parser.add_argument("--depth", type=int, default=12, help="maximum nesting depth")
+    parser.add_argument("--repeats", type=int, default=3, help="number of times to repeat each measurement")
+    args = parser.parse_args()
+
+    doc = generate(args.elements, args.depth)
+    (elapsed, html) = corpus.measure(lambda: Html5Exporter().export(doc), args.repeats)
+    print("export:     %.3fs  %10.0f elements/s  %d characters" % (elapsed, args.elements / elapsed, len(html)))
+    (elapsed, _) = corpus.measure(lambda: normalise(html), args.repeats)
+    print("normalise:  %.3fs  %10.0f elements/s" % (elapsed, args.elements / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Measure hashing parsed documents with htmlfive.html5_fingerprint.fingerprint, against exporting them with
+Html5Exporter and hashing the HTML, on synthetic documents (see corpus.py) of several kinds
+
+Usage: python benchmarks/bench_fingerprint.py [--kinds wide,deep,...] [--size N] [--repeats N]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+
+from htmlfive import Html5Parser, Html5Exporter
+from htmlfive.html5_fingerprint import fingerprint
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import corpus  # noqa: E402
+
+
+def export_and_hash(doc):
+    return hashlib.blake2b(Html5Exporter().export(doc).encode("utf-8"), digest_size=16).digest()
+
+
+def fingerprint_with_subtrees(doc):
+    return fingerprint(doc, subtree_hashes={})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kinds", default=",".join(corpus.KINDS), help="comma separated kinds of document")
+    parser.add_argument("--size", type=int, default=10000, help="document size")
+    parser.add_argument("--repeats", type=int, default=3, help="number of times to repeat each measurement")
+    args = parser.parse_args()
+
+    runners = [("export and hash", export_and_hash), ("fingerprint", fingerprint),
+               ("fingerprint, subtrees", fingerprint_with_subtrees)]
+    for kind in args.kinds.split(","):
+        html = corpus.generate(kind, args.size)
+        doc = Html5Parser().parse(html)
+        mb = len(html.encode("utf-8")) / 1e6
+        for (name, runner) in runners:
+            (elapsed, _) = corpus.measure(runner, args.repeats, doc)
+            peak = corpus.measure_peak_memory(runner, doc)
+            print("%-8s %-22s %8.3fs %8.2f MB/s %10.0f KB peak" % (kind, name, elapsed, mb / elapsed, peak / 1024))
+
+
+if __name__ == '__main__':
+    main()
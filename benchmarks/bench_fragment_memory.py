@@ -0,0 +1,87 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Measure the memory used per fragment by Html5Builder fragments, compared with the previous
+dictionary based fragment layout
+
+Usage: python benchmarks/bench_fragment_memory.py [--fragments N]
+"""
+
+import argparse
+import tracemalloc
+
+from htmlfive.html5_builder import ElementFragment
+
+
+class DictElementFragment:
+    # the fragment layout used before fragments were slotted, kept here for comparison
+
+    def __init__(self, tag, attrs={}, style={}):
+        self.tag = tag
+        self.attrs = attrs
+        self.style = style
+        self.child_fragments = []
+
+    def add_element(self, tag, attrs={}, style={}):
+        fragment = DictElementFragment(tag, attrs, style)
+        self.child_fragments.append(fragment)
+        return fragment
+
+    def add_text(self, text):
+        self.child_fragments.append(DictTextFragment(text))
+        return self
+
+
+class DictTextFragment:
+
+    def __init__(self, text):
+        self.text = text
+
+
+def measure(fragment_class, fragment_count):
+    texts = [str(idx) for idx in range(fragment_count)]
+    tracemalloc.start()
+    root = fragment_class("table")
+    for text in texts:
+        root.add_element("td").add_text(text)
+    (current, _) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / (2 * fragment_count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fragments", type=int, default=100000,
+                        help="number of element fragments (each containing a text fragment) to create")
+    args = parser.parse_args()
+
+    before = measure(DictElementFragment, args.fragments)
+    after = measure(ElementFragment, args.fragments)
+    print("fragments:          %d" % (2 * args.fragments))
+    print("bytes per fragment: %.1f (dict layout)" % before)
+    print("bytes per fragment: %.1f (slotted layout)" % after)
+    print("reduction:          %.1f%%" % (100 * (before - after) / before))
+
+
+if __name__ == '__main__':
+    main()
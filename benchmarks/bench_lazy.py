@@ -0,0 +1,82 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Measure parsing documents with Html5Parser in lazy mode, against parsing them eagerly, on documents with a fixed
+number of sections of increasing size.  The lazy parse should take about the same time whatever the size of
+the sections, until a section is accessed.
+
+Usage: python benchmarks/bench_lazy.py [--sections N] [--sizes 10,100,1000] [--repeats N]
+"""
+
+import argparse
+import os
+import sys
+
+from htmlfive import Html5Parser
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import corpus  # noqa: E402
+
+
+def generate(sections, size):
+    parts = ["<!DOCTYPE html><html><head><title>Sections</title></head><body>"]
+    for section in range(sections):
+        parts.append('<div class="section" id="s%d"><h2>Section %d</h2><ul>' % (section, section))
+        for item in range(size):
+            parts.append('<li class="item"><a href="/items/%d">Item &amp; %d</a></li>' % (item, item))
+        parts.append("</ul></div>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def parse_eager(html):
+    return Html5Parser().parse(html)
+
+
+def parse_lazy(html):
+    return Html5Parser().parse(html, lazy_depth=2)
+
+
+def parse_lazy_and_access(html):
+    doc = Html5Parser().parse(html, lazy_depth=2)
+    return doc.documentElement.lastChild.firstChild.getElementsByTagName("a")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", type=int, default=20, help="number of sections in each document")
+    parser.add_argument("--sizes", default="10,100,1000", help="comma separated numbers of items in each section")
+    parser.add_argument("--repeats", type=int, default=3, help="number of times to repeat each measurement")
+    args = parser.parse_args()
+
+    runners = [("eager", parse_eager), ("lazy", parse_lazy), ("lazy, access one", parse_lazy_and_access)]
+    for size in [int(size) for size in args.sizes.split(",")]:
+        html = generate(args.sections, size)
+        mb = len(html.encode("utf-8")) / 1e6
+        for (name, runner) in runners:
+            (elapsed, _) = corpus.measure(runner, args.repeats, html)
+            print("%6d items/section %-18s %8.4fs %8.2f MB/s" % (size, name, elapsed, mb / elapsed))
+
+
+if __name__ == '__main__':
+    main()
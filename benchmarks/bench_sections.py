@@ -0,0 +1,79 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Compare building and rendering a document made up of many independent sections serially and in parallel
+using a process pool.  Each section is populated by a build function, which runs in the worker process.
+
+Usage: python benchmarks/bench_sections.py [--sections N] [--elements N] [--workers N]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from htmlfive import Html5Builder
+
+
+def build_section(section, section_idx, cell_count):
+    section.add_element("h2").add_text("Section %d" % section_idx)
+    table = section.add_element("table")
+    for idx in range(cell_count):
+        table.add_element("tr").add_element("td", {"class": "cell"}, {"color": "blue"}).add_text(str(idx))
+
+
+def build_dashboard(section_count, element_count, executor=None):
+    builder = Html5Builder(language="en", executor=executor)
+    builder.head().add_element("title").add_text("Dashboard")
+    for section_idx in range(section_count):
+        builder.body().add_section("section", {"id": "section%d" % section_idx},
+                                   build_fn=build_section, build_args=(section_idx, element_count // section_count))
+    return builder
+
+
+def time_render(section_count, element_count, executor):
+    start = time.perf_counter()
+    html = build_dashboard(section_count, element_count, executor).get_html()
+    return (time.perf_counter() - start, html)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sections", type=int, default=32, help="number of sections")
+    parser.add_argument("--elements", type=int, default=200000, help="total number of table cells")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    args = parser.parse_args()
+
+    (serial, serial_html) = time_render(args.sections, args.elements, None)
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        executor.submit(int).result()  # start the pool before timing
+        (parallel, parallel_html) = time_render(args.sections, args.elements, executor)
+    assert serial_html == parallel_html
+    print("sections: %d, elements: %d, workers: %d" % (args.sections, args.elements, args.workers))
+    print("serial:   %.3fs" % serial)
+    print("parallel: %.3fs" % parallel)
+    print("speedup:  %.1fx" % (serial / parallel))
+
+
+if __name__ == '__main__':
+    main()
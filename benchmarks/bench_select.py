@@ -0,0 +1,93 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Measure finding elements with htmlfive.html5_select, in a single pass and with a SelectorIndex, against a
+hand-written traversal using getElementsByTagName, for the selector "div.results > table tr[data-id]"
+
+Usage: python benchmarks/bench_select.py [--sections N] [--rows N] [--repeats N]
+"""
+
+import argparse
+import os
+import sys
+
+from htmlfive import Html5Parser
+from htmlfive.html5_select import select, SelectorIndex
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import corpus  # noqa: E402
+
+SELECTOR = "div.results > table tr[data-id]"
+
+
+def generate(sections, rows):
+    # sections of results tables, alternating with other tables which should not match
+    parts = ["<!DOCTYPE html><html><head><title>Results</title></head><body>"]
+    for section in range(sections):
+        parts.append('<div class="%s"><h2>Section %d</h2><table>' % ("results" if section % 2 else "other", section))
+        for row in range(rows):
+            if row % 3:
+                parts.append('<tr data-id="%d-%d"><td>%d</td><td><a href="#%d">row</a></td></tr>'
+                             % (section, row, row, row))
+            else:
+                parts.append("<tr><td>%d</td><td>heading</td></tr>" % row)
+        parts.append("</table></div>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def traverse(doc):
+    found = []
+    for div in doc.getElementsByTagName("div"):
+        if "results" in (div.getAttribute("class") or "").split():
+            for table in div.childNodes:
+                if table.nodeType == table.ELEMENT_NODE and table.tagName == "table":
+                    for tr in table.getElementsByTagName("tr"):
+                        if tr.hasAttribute("data-id"):
+                            found.append(tr)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sections", type=int, default=200, help="number of sections, each holding a table")
+    parser.add_argument("--rows", type=int, default=50, help="number of rows in each table")
+    parser.add_argument("--repeats", type=int, default=5, help="number of times to repeat each measurement")
+    args = parser.parse_args()
+
+    doc = Html5Parser().parse(generate(args.sections, args.rows))
+    (elapsed, expected) = corpus.measure(lambda: traverse(doc), args.repeats)
+    print("matches: %d" % len(expected))
+    print("getElementsByTagName traversal:  %.4fs" % elapsed)
+    (elapsed, found) = corpus.measure(lambda: select(doc, SELECTOR), args.repeats)
+    assert found == expected
+    print("select (single pass):            %.4fs" % elapsed)
+    (elapsed, index) = corpus.measure(lambda: SelectorIndex(doc), args.repeats)
+    print("SelectorIndex construction:      %.4fs" % elapsed)
+    (elapsed, found) = corpus.measure(lambda: index.select(SELECTOR), args.repeats)
+    assert found == expected
+    print("SelectorIndex.select:            %.4fs" % elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Measure the throughput and peak memory of Html5Parser, Html5Exporter, Html5Formatter and Html5Builder on
+synthetic documents (see corpus.py) of several kinds and sizes, optionally saving the results as a baseline
+or comparing them with a saved baseline.
+
+Throughput is reported in MB/s of document HTML and in DOM nodes per second.  Peak memory is measured
+with tracemalloc in a separate run, so that tracing does not affect the timings.
+
+Usage: python benchmarks/bench_suite.py [--kinds wide,deep,...] [--sizes 1000,10000]
+                                        [--components parse,export,format,build,normalise] [--repeats N]
+                                        [--save baseline.json] [--compare baseline.json] [--threshold 0.1]
+
+When comparing, exit with status 1 if any throughput falls, or any peak memory rises, by more than threshold.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from htmlfive import Html5Parser, Html5Exporter, Html5Formatter, Html5Builder, normalise
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import corpus  # noqa: E402
+
+COMPONENTS = ["parse", "export", "format", "build", "normalise"]
+
+
+def count_nodes(node):
+    count = 0
+    nodes = [node]
+    while nodes:
+        node = nodes.pop()
+        count += 1
+        nodes.extend(node.childNodes)
+    return count
+
+
+def populate(fragment, node):
+    for child in node.childNodes:
+        if child.nodeType == child.ELEMENT_NODE:
+            populate(fragment.add_element(child.tagName, dict(child.attributes.items())), child)
+        elif child.nodeType == child.TEXT_NODE:
+            fragment.add_text(child.data)
+
+
+def build(doc):
+    builder = Html5Builder()
+    for child in doc.documentElement.childNodes:
+        if child.nodeType == child.ELEMENT_NODE and child.tagName in ("head", "body"):
+            populate(builder.head() if child.tagName == "head" else builder.body(), child)
+    return builder.get_html()
+
+
+def get_runner(component, html, doc):
+    if component == "parse":
+        return lambda: Html5Parser().parse(html)
+    elif component == "export":
+        return lambda: Html5Exporter().export(doc)
+    elif component == "format":
+        return lambda: Html5Formatter().format(doc)
+    elif component == "normalise":
+        return lambda: normalise(html)
+    else:
+        return lambda: build(doc)
+
+
+def run(kinds, sizes, components, repeats):
+    results = {}
+    for kind in kinds:
+        for size in sizes:
+            html = corpus.generate(kind, size)
+            doc = Html5Parser().parse(html)
+            node_count = count_nodes(doc)
+            mb = len(html.encode("utf-8")) / 1e6
+            for component in components:
+                runner = get_runner(component, html, doc)
+                (elapsed, _) = corpus.measure(runner, repeats)
+                peak = corpus.measure_peak_memory(runner)
+                key = "%s/%s/%d" % (component, kind, size)
+                results[key] = {"seconds": elapsed, "mb_per_s": mb / elapsed, "nodes_per_s": node_count / elapsed,
+                                "peak_kb": peak / 1024}
+                print("%-24s %8.3fs %8.2f MB/s %12.0f nodes/s %10.0f KB peak" %
+                      (key, elapsed, mb / elapsed, node_count / elapsed, peak / 1024))
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for (key, result) in results.items():
+        if key not in baseline:
+            continue
+        before = baseline[key]
+        change = result["mb_per_s"] / before["mb_per_s"] - 1
+        memory_change = result["peak_kb"] / before["peak_kb"] - 1 if before["peak_kb"] else 0
+        flags = []
+        if change < -threshold:
+            flags.append("SLOWER")
+        if memory_change > threshold:
+            flags.append("MORE MEMORY")
+        print("%-24s throughput %+6.1f%%  peak memory %+6.1f%%  %s" %
+              (key, change * 100, memory_change * 100, " ".join(flags)))
+        if flags:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kinds", default=",".join(corpus.KINDS), help="comma separated kinds of document")
+    parser.add_argument("--sizes", default="1000,10000", help="comma separated document sizes")
+    parser.add_argument("--components", default=",".join(COMPONENTS), help="comma separated components to measure")
+    parser.add_argument("--repeats", type=int, default=5, help="number of times to repeat each measurement")
+    parser.add_argument("--save", help="save the results to this JSON file")
+    parser.add_argument("--compare", help="compare the results with a baseline saved to this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.1, help="fractional change treated as a regression")
+    args = parser.parse_args()
+
+    results = run(args.kinds.split(","), [int(size) for size in args.sizes.split(",")],
+                  args.components.split(","), args.repeats)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print()
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("%d regression(s) beyond %.0f%%" % (len(regressions), args.threshold * 100))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
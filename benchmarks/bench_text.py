@@ -0,0 +1,78 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Measure extracting the visible text of documents with htmlfive.extract_text, against parsing them with
+Html5Parser and walking the text nodes of the DOM, on synthetic documents (see corpus.py) of several kinds
+
+Usage: python benchmarks/bench_text.py [--kinds wide,deep,...] [--size N] [--repeats N]
+"""
+
+import argparse
+import os
+import sys
+
+from htmlfive import Html5Parser, extract_text
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import corpus  # noqa: E402
+
+
+def parse_and_walk(html):
+    texts = 0
+    doc = Html5Parser().parse(html)
+    nodes = [doc.documentElement]
+    while nodes:
+        node = nodes.pop()
+        if node.nodeType == node.TEXT_NODE:
+            if node.parentNode.tagName not in ("script", "style"):
+                texts += len(" ".join(node.data.split()))
+        else:
+            nodes.extend(reversed(node.childNodes))
+    return texts
+
+
+def extract(html):
+    texts = 0
+    for (_, text) in extract_text(html):
+        texts += len(text)
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--kinds", default=",".join(corpus.KINDS), help="comma separated kinds of document")
+    parser.add_argument("--size", type=int, default=10000, help="document size")
+    parser.add_argument("--repeats", type=int, default=3, help="number of times to repeat each measurement")
+    args = parser.parse_args()
+
+    for kind in args.kinds.split(","):
+        html = corpus.generate(kind, args.size)
+        mb = len(html.encode("utf-8")) / 1e6
+        for (name, runner) in [("parse and walk", parse_and_walk), ("extract_text", extract)]:
+            (elapsed, _) = corpus.measure(runner, args.repeats, html)
+            peak = corpus.measure_peak_memory(runner, html)
+            print("%-8s %-16s %8.3fs %8.2f MB/s %10.0f KB peak" % (kind, name, elapsed, mb / elapsed, peak / 1024))
+
+
+if __name__ == '__main__':
+    main()
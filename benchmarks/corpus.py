@@ -0,0 +1,166 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Generate synthetic HTML5 documents for benchmarking, and measure the benchmarks run on them.  Documents are generated from a seeded random number
+generator, so the same kind, size and seed always produce the same document.
+
+Kinds of document:
+    wide:   many sibling elements below a few parents
+    deep:   chains of deeply nested elements
+    attrs:  elements with many attributes each
+    text:   paragraphs of long text
+    script: many script and style elements, whose content must not be parsed as markup
+"""
+
+import random
+import time
+import tracemalloc
+
+KINDS = ["wide", "deep", "attrs", "text", "script"]
+
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore et "
+         "dolore magna aliqua enim ad minim veniam quis nostrud exercitation ullamco laboris nisi aliquip ex ea "
+         "commodo consequat").split(" ")
+
+TAGS = ["div", "span", "p", "section", "em", "strong", "a", "li"]
+
+
+def words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def gen_wide(rng, size):
+    parts = []
+    for idx in range(size):
+        if idx % 1000 == 0:
+            if idx:
+                parts.append("</div>")
+            parts.append('<div class="group">')
+        parts.append('<%s class="item">%s</%s>' % (("p", words(rng, 4), "p") if idx % 2 else
+                                                   ("span", words(rng, 2), "span")))
+    parts.append("</div>")
+    return parts
+
+
+def gen_deep(rng, size, depth=100):
+    parts = []
+    remaining = size
+    while remaining > 0:
+        chain = min(depth, remaining)
+        tags = [rng.choice(TAGS) for _ in range(chain)]
+        for tag in tags:
+            parts.append("<%s>" % tag)
+        parts.append(words(rng, 3))
+        for tag in reversed(tags):
+            parts.append("</%s>" % tag)
+        remaining -= chain
+    return parts
+
+
+def gen_attrs(rng, size):
+    parts = []
+    for idx in range(size):
+        parts.append('<div id="n%d" class="%s %s" data-index="%d" data-value="%d" title="%s" role="listitem" '
+                     'aria-label="%s" style="color:red;margin:%dpx;"></div>' %
+                     (idx, rng.choice(WORDS), rng.choice(WORDS), idx, rng.randrange(100000), words(rng, 3),
+                      words(rng, 2), rng.randrange(20)))
+    return parts
+
+
+def gen_text(rng, size):
+    return ["<p>%s</p>" % words(rng, 60) for _ in range(size)]
+
+
+def gen_script(rng, size):
+    parts = []
+    for idx in range(size):
+        if idx % 2:
+            parts.append('<script>\nfunction f%d(a, b) {\n    if (a < b && b > %d) { return "<b>" + a; }\n'
+                         '    return \'</div>\' + b;\n}\n</script>' % (idx, rng.randrange(1000)))
+        else:
+            parts.append("<style>\n.c%d > p { color: #%06x; }\n.c%d a[href^='http'] { margin: %dpx; }\n</style>" %
+                         (idx, rng.randrange(0x1000000), idx, rng.randrange(20)))
+    return parts
+
+
+GENERATORS = {"wide": gen_wide, "deep": gen_deep, "attrs": gen_attrs, "text": gen_text, "script": gen_script}
+
+
+def generate(kind: str, size: int, seed: int = 0) -> str:
+    """
+    Generate a synthetic HTML5 document
+
+    Args:
+        kind: the kind of document, one of KINDS
+        size: the number of repeated units (elements, or script and style elements) in the body
+        seed: seed for the random number generator
+
+    Returns:
+        A string containing the document
+    """
+    rng = random.Random("%s:%d:%d" % (kind, size, seed))
+    parts = ['<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>%s %d</title></head><body>' %
+             (kind, size)]
+    parts.extend(GENERATORS[kind](rng, size))
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def measure(runner, repeats: int, *args):
+    """
+    Time a benchmark, which is run repeatedly and timed by its best run
+
+    Args:
+        runner: the function to run
+        repeats: the number of times to run it
+        args: the arguments to pass to the function
+
+    Returns:
+        A tuple containing the best time in seconds and the result of the last run
+    """
+    best = None
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = runner(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return (best, result)
+
+
+def measure_peak_memory(runner, *args) -> int:
+    """
+    Measure the peak memory allocated by a benchmark, in a separate run so that tracing does not affect its timings
+
+    Args:
+        runner: the function to run
+        args: the arguments to pass to the function
+
+    Returns:
+        The peak memory traced in bytes
+    """
+    tracemalloc.start()
+    runner(*args)
+    (_, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
@@ -1,6 +1,41 @@
 VERSION = "0.0.2"
 
-from .html5_parser import Html5Parser
-from .html5_exporter import Html5Exporter
-from .html5_formatter import Html5Formatter
-from .html5_builder import Html5Builder
+__all__ = ["Html5Parser", "Html5Exporter", "Html5Formatter", "Html5Builder", "Html5Stats", "Html5LimitExceeded",
+           "normalise", "minify", "extract_text"]
+
+# the module defining each public name, which is imported when the name is first used so that importing
+# this package stays fast
+_modules = {
+    "Html5Parser": "html5_parser",
+    "Html5Exporter": "html5_exporter",
+    "Html5Formatter": "html5_formatter",
+    "Html5Builder": "html5_builder",
+    "Html5Stats": "html5_stats",
+    "Html5LimitExceeded": "html5_common",
+    "normalise": "html5_normaliser",
+    "minify": "html5_normaliser",
+    "extract_text": "html5_text",
+}
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from .html5_parser import Html5Parser
+    from .html5_exporter import Html5Exporter
+    from .html5_formatter import Html5Formatter
+    from .html5_builder import Html5Builder
+    from .html5_stats import Html5Stats
+    from .html5_common import Html5LimitExceeded
+    from .html5_normaliser import normalise, minify
+    from .html5_text import extract_text
+
+
+def __getattr__(name):
+    if name not in _modules:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(__import__(_modules[name], globals(), None, [name], 1), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,219 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Parse HTML5 files and write them out again, exported (re-indented), formatted or minified.
+Files are processed in parallel across a pool of processes.
+
+Usage: python -m htmlfive [--mode export|format|minify] [--output-dir DIR] [--jobs N] [--force] PATH [PATH ...]
+
+Each PATH is a file, or a directory which is searched recursively for files matching --pattern.  Files are
+rewritten in place unless --output-dir is given.  Format mode writes HTML which displays the source of each file,
+so it requires --output-dir and will not write over its input files.  Output is written atomically, and files which have not
+changed since they were last processed (according to a cache of their modification times and content hashes)
+are skipped.
+"""
+
+import argparse
+import concurrent.futures
+import fnmatch
+import hashlib
+import json
+import os
+import sys
+import time
+
+from .html5_parser import Html5Parser
+from .html5_formatter import Html5Formatter
+from .html5_normaliser import normalise, minify
+from .html5_common import write_atomic
+
+MODES = ["export", "format", "minify"]
+
+CACHE_FILENAME = ".htmlfive-cache.json"
+
+
+def convert(html: str, mode: str, indent_spaces: int) -> str:
+    """
+    Parse an HTML5 document and write it out again
+
+    Args:
+        html: the document to convert
+        mode: "export" to re-indent the document, "format" to format it for display in another HTML
+              document, or "minify" to write it without indentation or newlines
+        indent_spaces: number of spaces to make up each indent, when exporting or formatting
+
+    Returns:
+        The converted document
+
+    Raises:
+        ValueError: if the document could not be parsed
+    """
+    if mode == "format":
+        doc = Html5Parser().parse(html)
+        converted = Html5Formatter(indent_spaces=indent_spaces).format(doc) if doc is not None else None
+    elif mode == "minify":
+        converted = minify(html)
+    else:
+        converted = normalise(html, indent_spaces)
+    if converted is None:
+        raise ValueError("unable to parse document")
+    return converted
+
+
+def process_file(task):
+    # convert one file, called in a worker process
+    (input_path, output_path, mode, indent_spaces, cached_hash) = task
+    start = time.perf_counter()
+    try:
+        with open(input_path, "rb") as f:
+            content = f.read()
+        content_hash = hashlib.blake2b(content, digest_size=16).hexdigest()
+        if content_hash == cached_hash and os.path.exists(output_path):
+            return (input_path, "skipped", len(content), 0, time.perf_counter() - start, content_hash, None)
+        html = convert(content.decode("utf-8"), mode, indent_spaces)
+        write_atomic(output_path, html)
+        if output_path == input_path:
+            # the file now holds the converted content, which is what will be found next time
+            content_hash = hashlib.blake2b(html.encode("utf-8"), digest_size=16).hexdigest()
+        return (input_path, "converted", len(content), len(html), time.perf_counter() - start, content_hash, None)
+    except Exception as ex:
+        return (input_path, "failed", 0, 0, time.perf_counter() - start, None, str(ex))
+
+
+def find_files(paths, patterns, output_dir):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for (folder, dirnames, filenames) in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if any(fnmatch.fnmatch(filename, pattern) for pattern in patterns):
+                        input_path = os.path.join(folder, filename)
+                        relpath = os.path.relpath(input_path, path)
+                        files.append((input_path, os.path.join(output_dir, relpath) if output_dir else input_path))
+        else:
+            files.append((path, os.path.join(output_dir, os.path.basename(path)) if output_dir else path))
+    return files
+
+
+def load_cache(cache_path):
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def main(argv=None) -> int:
+    """
+    Run the batch converter
+
+    Args:
+        argv: the command line arguments, defaults to sys.argv[1:]
+
+    Returns:
+        0 if all files were converted or skipped, 1 if any failed
+    """
+    parser = argparse.ArgumentParser(prog="htmlfive", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="files or directories to convert")
+    parser.add_argument("--mode", choices=MODES, default="export", help="how to write out each file")
+    parser.add_argument("--output-dir", help="write output files below this directory, rather than in place")
+    parser.add_argument("--pattern", default="*.html,*.htm", help="comma separated file name patterns to search for")
+    parser.add_argument("--indent", type=int, default=4, help="number of spaces to make up each indent")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--cache", help="path of the cache of processed files (default: %s in the output "
+                                        "directory, or the current directory)" % CACHE_FILENAME)
+    parser.add_argument("--force", action="store_true", help="convert all files, even if they have not changed")
+    parser.add_argument("--quiet", action="store_true", help="only report failures")
+    args = parser.parse_args(argv)
+    if args.mode == "format" and not args.output_dir:
+        parser.error("--mode format requires --output-dir, so that the input files are not overwritten")
+
+    start = time.perf_counter()
+    files = find_files(args.paths, args.pattern.split(","), args.output_dir)
+    if args.mode == "format":
+        for (input_path, output_path) in files:
+            if os.path.abspath(input_path) == os.path.abspath(output_path):
+                parser.error("--mode format would overwrite %s, choose another --output-dir" % input_path)
+    cache_path = args.cache or os.path.join(args.output_dir or ".", CACHE_FILENAME)
+    cache = {} if args.force else load_cache(cache_path)
+    settings = "%s:%d" % (args.mode, args.indent)
+
+    tasks = []
+    skipped = 0
+    new_cache = {}
+    for (input_path, output_path) in files:
+        key = os.path.abspath(input_path)
+        entry = cache.get(key)
+        if entry is not None and entry["settings"] != settings:
+            entry = None
+        try:
+            mtime = os.stat(input_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if entry is not None and entry["mtime"] == mtime and os.path.exists(output_path):
+            skipped += 1
+            new_cache[key] = entry
+        else:
+            tasks.append((input_path, output_path, args.mode, args.indent, entry["hash"] if entry else None))
+
+    converted = failed = 0
+    input_bytes = output_bytes = 0
+    if args.jobs > 1 and len(tasks) > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(args.jobs)
+        results = executor.map(process_file, tasks, chunksize=max(1, min(64, len(tasks) // (args.jobs * 4))))
+    else:
+        executor = None
+        results = map(process_file, tasks)
+    try:
+        for (input_path, status, read_count, write_count, elapsed, content_hash, error) in results:
+            if status == "failed":
+                failed += 1
+                print("%s: %s" % (input_path, error), file=sys.stderr)
+                continue
+            if status == "skipped":
+                skipped += 1
+            else:
+                converted += 1
+                input_bytes += read_count
+                output_bytes += write_count
+            new_cache[os.path.abspath(input_path)] = {"settings": settings, "hash": content_hash,
+                                                      "mtime": os.stat(input_path).st_mtime_ns}
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    cache.update(new_cache)
+    write_atomic(cache_path, json.dumps(cache))
+
+    elapsed = time.perf_counter() - start
+    if not args.quiet:
+        print("converted %d, skipped %d, failed %d files in %.2fs" % (converted, skipped, failed, elapsed))
+        print("%.2f MB in, %.2f MB out, %.2f MB/s, %.1f files/s" %
+              (input_bytes / 1e6, output_bytes / 1e6, input_bytes / 1e6 / elapsed, converted / elapsed))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
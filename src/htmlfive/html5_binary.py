@@ -0,0 +1,369 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Save parsed DOM documents in a compact binary form which loads much faster than parsing the HTML again, and
+keep them in an on-disk cache keyed by the hash of the HTML they were parsed from.
+
+The binary form holds a header, a table of the distinct strings in the document (tag names, attribute names
+and values, text and comments) and a flat array of 16 bit words (or 32 bit words for large documents)
+describing the nodes in document order:
+
+    0, tag, attribute count, (name, value) * attribute count: the start of an element
+    1: the end of the most recently started element
+    2, data: a text node
+    3, data: a comment
+
+where tag, name and data are indexes into the string table, and value is one more than an index into the
+string table, or 0 for an attribute without a value.
+"""
+
+from __future__ import annotations
+
+import array
+import hashlib
+import os
+import struct
+import sys
+import typing
+import xml.dom.minidom
+
+from .html5_common import write_atomic
+from .html5_parser import Html5Parser
+
+MAGIC = b"HT5B"
+VERSION = 1
+
+# magic, version, source digest, string count, string table size in bytes, word size in bytes, node array size
+# in words
+_HEADER = struct.Struct("<4sI16sIIII")
+
+_START, _END, _TEXT, _COMMENT = range(4)
+
+
+def get_digest(html: str) -> bytes:
+    """
+    Compute the digest of HTML content, which is stored with its binary form to detect when the content changes
+
+    Args:
+        html: the HTML content
+
+    Returns:
+        A 16 byte digest
+    """
+    return hashlib.blake2b(html.encode("utf-8"), digest_size=16).digest()
+
+
+def _to_little_endian(words):
+    if sys.byteorder == "big":
+        words.byteswap()
+    return words
+
+
+def dumps(doc: xml.dom.minidom.Document, digest: bytes = b"") -> bytes:
+    """
+    Convert a DOM document to its binary form
+
+    Args:
+        doc: the DOM document, for example returned by Html5Parser.parse
+        digest: optional digest of the HTML the document was parsed from, see get_digest
+
+    Returns:
+        The binary form of the document
+    """
+    strings = {}
+    words = array.array("I")
+    append = words.append
+    nodes = [doc.documentElement]
+    while nodes:
+        node = nodes.pop()
+        if node is None:
+            append(_END)
+            continue
+        node_type = node.nodeType
+        if node_type == node.ELEMENT_NODE:
+            attributes = node.attributes.items()
+            append(_START)
+            append(strings.setdefault(node.tagName, len(strings)))
+            append(len(attributes))
+            for (name, value) in attributes:
+                append(strings.setdefault(name, len(strings)))
+                append(0 if value is None else strings.setdefault(value, len(strings)) + 1)
+            nodes.append(None)
+            nodes.extend(reversed(node.childNodes))
+        elif node_type == node.TEXT_NODE:
+            append(_TEXT)
+            append(strings.setdefault(node.data, len(strings)))
+        elif node_type == node.COMMENT_NODE:
+            append(_COMMENT)
+            append(strings.setdefault(node.data, len(strings)))
+    if max(words) <= 0xFFFF:
+        words = array.array("H", words)
+    lengths = array.array("I", map(len, strings))
+    table = "".join(strings).encode("utf-8")
+    header = _HEADER.pack(MAGIC, VERSION, digest.ljust(16, b"\0"), len(strings), len(table), words.itemsize,
+                          len(words))
+    return b"".join([header, _to_little_endian(lengths).tobytes(), table, _to_little_endian(words).tobytes()])
+
+
+def read_digest(data: typing.Union[bytes, memoryview]) -> bytes:
+    """
+    Read the digest stored with the binary form of a document
+
+    Args:
+        data: the binary form, or at least its first 40 bytes
+
+    Returns:
+        The digest passed to dumps (padded with zero bytes to 16 bytes)
+
+    Raises:
+        ValueError: if the data is not the binary form of a document in the current version
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("truncated binary document")
+    (magic, version, digest, _, _, _, _) = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a version %d binary document" % VERSION)
+    return digest
+
+
+def loads(data: typing.Union[bytes, memoryview]) -> xml.dom.minidom.Document:
+    """
+    Load a DOM document from its binary form
+
+    Args:
+        data: the binary form returned by dumps, as bytes or a memoryview (for example of a memory mapped file)
+
+    Returns:
+        The DOM document
+
+    Raises:
+        ValueError: if the data is not a valid binary document
+
+    A way you might use me is:
+
+    >>> from htmlfive import Html5Parser, Html5Exporter
+    >>> from htmlfive.html5_binary import dumps, loads
+    >>> data = dumps(Html5Parser().parse("<!DOCTYPE html><html><body><p class='a'>Hello</p></body></html>"))
+    >>> print(Html5Exporter().export(loads(data)))
+    <!DOCTYPE html>
+    <html>
+        <body>
+            <p class="a">
+                Hello
+            </p>
+        </body>
+    </html>
+    """
+    read_digest(data)
+    (_, _, _, string_count, table_size, word_size, word_count) = _HEADER.unpack_from(data)
+    if word_size not in (2, 4):
+        raise ValueError("invalid binary document")
+    offset = _HEADER.size
+    lengths = array.array("I")
+    words = array.array("H" if word_size == 2 else "I")
+    try:
+        lengths.frombytes(data[offset:offset + 4 * string_count])
+        offset += 4 * string_count
+        table = bytes(data[offset:offset + table_size]).decode("utf-8")
+        offset += table_size
+        words.frombytes(data[offset:offset + word_size * word_count])
+        if len(lengths) != string_count or len(words) != word_count or not words:
+            raise ValueError("truncated binary document")
+        _to_little_endian(lengths)
+        _to_little_endian(words)
+
+        strings = []
+        start = 0
+        for length in lengths:
+            strings.append(table[start:start + length])
+            start += length
+        return _build(strings, words)
+    except (IndexError, UnicodeDecodeError, AttributeError) as ex:
+        raise ValueError("invalid binary document") from ex
+
+
+def _build(strings, words):
+    # build the DOM with the fast paths minidom provides for DOM builders (as used by its expat builder),
+    # which skip the checks made by appendChild and setAttribute that cannot fail here
+    from xml.dom.minidom import getDOMImplementation, Attr, Element, Text, Comment
+    try:
+        from xml.dom.minidom import _append_child, _set_attribute_node
+    except ImportError:
+        # these are private to minidom, so fall back to the public methods if they are not available
+        _append_child = Element.appendChild
+        _set_attribute_node = Element.setAttributeNode
+    dom = getDOMImplementation().createDocument(None, strings[words[1]], None)
+    current_element = dom.documentElement
+    idx = 0
+    word_count = len(words)
+    while idx < word_count:
+        kind = words[idx]
+        idx += 1
+        if kind == _START:
+            if idx > 1:  # the document element was created with the document
+                child = Element(strings[words[idx]])
+                child.ownerDocument = dom
+                _append_child(current_element, child)
+                current_element = child
+            attribute_count = words[idx + 1]
+            idx += 2
+            for _ in range(attribute_count):
+                name = strings[words[idx]]
+                value = words[idx + 1]
+                attr = Attr(name, None, name, None)
+                attr.value = strings[value - 1] if value else None
+                attr.ownerDocument = dom
+                _set_attribute_node(current_element, attr)
+                idx += 2
+        elif kind == _END:
+            current_element = current_element.parentNode
+        else:
+            child = Text() if kind == _TEXT else Comment("")
+            child.data = strings[words[idx]]
+            child.ownerDocument = dom
+            _append_child(current_element, child)
+            idx += 1
+    return dom
+
+
+def dump(doc: xml.dom.minidom.Document, path: str, digest: bytes = b""):
+    """
+    Save the binary form of a DOM document to a file.  The file is replaced atomically, so concurrent readers
+    see either the old or the new content.
+
+    Args:
+        doc: the DOM document
+        path: the path of the file to write
+        digest: optional digest of the HTML the document was parsed from, see get_digest
+    """
+    write_atomic(path, dumps(doc, digest))
+
+
+def load(path: str, digest: bytes = None) -> typing.Optional[xml.dom.minidom.Document]:
+    """
+    Load a DOM document from a file written by dump, reading it through a memory map
+
+    Args:
+        path: the path of the file
+        digest: optional digest of the HTML the document should have been parsed from
+
+    Returns:
+        The DOM document, or None if a digest is given and does not match the digest stored in the file
+
+    Raises:
+        ValueError: if the file does not hold a valid binary document
+    """
+    import mmap
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError("empty binary document")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            view = memoryview(m)
+            try:
+                if digest is not None and read_digest(view) != digest.ljust(16, b"\0"):
+                    return None
+                return loads(view)
+            finally:
+                view.release()
+
+
+class Html5ParseCache:
+    """
+    Parse HTML documents, keeping the parsed documents in binary form in a cache folder so that parsing the same
+    content again loads the document instead.  Each cache entry holds the digest of the HTML it was parsed from,
+    and is replaced when the HTML changes.
+
+    Args:
+        folder: the folder holding the cache entries, which is created if it does not exist
+        parser: optional Html5Parser used to parse documents which are not in the cache
+
+    A way you might use me is:
+
+    >>> from htmlfive.html5_binary import Html5ParseCache
+    >>> cache = Html5ParseCache("/tmp/htmlfive-cache")
+    >>> doc = cache.parse_file("index.html")   # parses index.html and saves the document
+    >>> doc = cache.parse_file("index.html")   # loads the saved document, unless index.html has changed
+    """
+
+    def __init__(self, folder: str, parser: Html5Parser = None):
+        self.folder = folder
+        self.parser = parser
+        self.hits = 0
+        self.misses = 0
+
+    def get_path(self, key: str) -> str:
+        """
+        Get the path of the cache entry for a key
+
+        Args:
+            key: the key
+
+        Returns:
+            The path of the cache entry
+        """
+        name = hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.folder, name + ".h5b")
+
+    def parse(self, html: str, key: str = None) -> typing.Optional[xml.dom.minidom.Document]:
+        """
+        Parse HTML content, or load the document parsed from the same content previously
+
+        Args:
+            html: the HTML content
+            key: optional key of the cache entry, for example the path the content was read from.  Defaults to
+                 the digest of the content, in which case changed content is saved in a new entry.
+
+        Returns:
+            The DOM document, or None if the content ended unexpectedly
+        """
+        digest = get_digest(html)
+        path = self.get_path(key if key is not None else digest.hex())
+        try:
+            doc = load(path, digest)
+        except (OSError, ValueError):
+            doc = None
+        if doc is not None:
+            self.hits += 1
+            return doc
+        self.misses += 1
+        if self.parser is None:
+            self.parser = Html5Parser()
+        doc = self.parser.parse(html)
+        if doc is not None:
+            dump(doc, path, digest)
+        return doc
+
+    def parse_file(self, path: str, encoding: str = "utf-8") -> typing.Optional[xml.dom.minidom.Document]:
+        """
+        Parse an HTML file, or load the document parsed from it previously if the file has not changed
+
+        Args:
+            path: the path of the file
+            encoding: the encoding of the file
+
+        Returns:
+            The DOM document, or None if the content ended unexpectedly
+        """
+        with open(path, encoding=encoding) as f:
+            html = f.read()
+        return self.parse(html, os.path.abspath(path))
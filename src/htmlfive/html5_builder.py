@@ -19,45 +19,268 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-import xml.dom.minidom
-from xml.dom.minidom import getDOMImplementation
-import typing
-from .html5_exporter import Html5Exporter
+from __future__ import annotations
+
+import collections
+import contextlib
+import copy
+import io
+import threading
+from .html5_common import HTML5_DOCTYPE, raw_text_elements, get_serialisation_table
+from .html5_entities import escape, unescape
+from .html5_exporter import Html5Exporter, format_attribute
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import concurrent.futures
+    import typing
+    import xml.dom.minidom
+    from .html5_stats import Html5Stats
+
+# guards the lazy allocation of fragment containers, so that threads adding to the same fragment share one container
+_allocation_lock = threading.Lock()
 
 
 class Fragment:
 
+    __slots__ = ()
+
     def get_node(self, builder:"Html5Builder"):
         pass
 
+    def write(self, builder: "Html5Builder", of: typing.TextIO, indent: int):
+        pass
+
+    def write_cached(self, builder: "Html5Builder", of: typing.TextIO, indent: int):
+        self.write(builder, of, indent)
+
+    def get_key(self) -> typing.Hashable:
+        pass
+
 
 class TextFragment(Fragment):
     """
-    Represent an HTML5 text node.
+    Represent an HTML5 text node.  The text is escaped when it is written, unless raw is true (for the text of
+    elements such as script and style).
     """
 
-    def __init__(self, text):
+    __slots__ = ("text", "raw")
+
+    def __init__(self, text, raw=False):
         self.text = text
+        self.raw = raw
 
     def get_node(self, builder):
         return builder.doc.createTextNode(self.text)
 
+    def write(self, builder, of, indent):
+        txt = self.text.strip(" \n")
+        if txt.replace(" ", "").replace("\t", "").replace("\n", ""):
+            of.write(get_serialisation_table(builder.indent_spaces).get_indent(indent))
+            of.write(txt if self.raw else escape(txt, quote=False))
+            of.write("\n")
+
+    def get_key(self):
+        return ("__raw__", self.text) if self.raw else self.text
+
 
 class ElementFragment(Fragment):
     """
     Represent a generic HTML5 element node.
+
+    The attribute, style and child containers are only allocated when they are first needed, so that
+    documents containing very many fragments stay compact.
+
+    Each fragment tracks whether it (or any fragment below it) has changed since it was last rendered, so that
+    unchanged parts of a document need not be rendered again.  Accessing the attrs, style or child_fragments
+    containers directly is assumed to change the fragment.  A fragment should be added to only one parent.
     """
 
-    def __init__(self, tag: str, attrs: typing.Dict[str, str] = {},
-                 style: typing.Dict[str, str] = {}):
+    __slots__ = ("tag", "__attrs", "__style", "__children", "__parent", "__dirty", "__cache")
+
+    def __init__(self, tag: str, attrs: typing.Dict[str, str] = None,
+                 style: typing.Dict[str, str] = None):
         self.tag = tag
-        self.attrs = attrs
-        self.style = style
-        self.child_fragments = []
+        self.__attrs = dict(attrs) if attrs else None
+        self.__style = dict(style) if style else None
+        self.__children = None
+        self.__parent = None
+        self.__dirty = True
+        self.__cache = None
+
+    def __getstate__(self):
+        # copies of a fragment are detached from its parent and rendered output
+        return (self.tag, self.__attrs, self.__style, self.__children)
+
+    def __setstate__(self, state):
+        (self.tag, self.__attrs, self.__style, self.__children) = state
+        self.__parent = None
+        self.__dirty = True
+        self.__cache = None
+        if self.__children:
+            for fragment in self.__children:
+                if isinstance(fragment, ElementFragment):
+                    fragment.__parent = self
+
+    @property
+    def attrs(self) -> typing.Dict[str, str]:
+        self.invalidate()
+        if self.__attrs is None:
+            self.__attrs = {}
+        return self.__attrs
+
+    @attrs.setter
+    def attrs(self, attrs: typing.Dict[str, str]):
+        self.invalidate()
+        self.__attrs = attrs
+
+    @property
+    def style(self) -> typing.Dict[str, str]:
+        self.invalidate()
+        if self.__style is None:
+            self.__style = {}
+        return self.__style
+
+    @style.setter
+    def style(self, style: typing.Dict[str, str]):
+        self.invalidate()
+        self.__style = style
+
+    @property
+    def child_fragments(self) -> typing.List[Fragment]:
+        self.invalidate()
+        if self.__children is None:
+            with _allocation_lock:
+                if self.__children is None:
+                    self.__children = []
+        return self.__children
 
+    @child_fragments.setter
+    def child_fragments(self, child_fragments: typing.List[Fragment]):
+        self.invalidate()
+        self.__children = child_fragments
 
-    def add_element(self, tag: str, attrs: typing.Dict[str, str] = {},
-                    style: typing.Dict[str, str] = {}) -> "ElementFragment":
+    def get_child_fragments(self) -> typing.Sequence[Fragment]:
+        """
+        Get the child fragments of this fragment, without marking this fragment as changed
+
+        Returns:
+             A sequence of child fragments which should not be modified
+        """
+        return self.__children or ()
+
+    def get_attribute(self, name: str, default: str = None) -> str:
+        """
+        Get the value of an attribute of this fragment, without marking this fragment as changed
+
+        Arguments:
+            name: the attribute name
+            default: the value to return if the attribute is not set
+
+        Returns:
+             The attribute value
+        """
+        return self.__attrs.get(name, default) if self.__attrs else default
+
+    def iter_elements(self) -> typing.Iterator["ElementFragment"]:
+        """
+        Iterate over the element fragments below this fragment, in document order
+
+        Returns:
+             An iterator over element fragments
+        """
+        fragments = list(reversed(self.get_child_fragments()))
+        while fragments:
+            fragment = fragments.pop()
+            if isinstance(fragment, ElementFragment):
+                yield fragment
+                fragments.extend(reversed(fragment.get_child_fragments()))
+            elif isinstance(fragment, AsyncFragment) and fragment.is_resolved():
+                fragments.extend(reversed(fragment.get_fragments()))
+
+    def find_all(self, tag: str) -> typing.List["ElementFragment"]:
+        """
+        Find the element fragments below this fragment with a particular tag
+
+        Arguments:
+            tag: the tag name to find
+
+        Returns:
+             A list of element fragments, in document order
+        """
+        return [fragment for fragment in self.iter_elements() if fragment.tag == tag]
+
+    def find_by_id(self, id: str) -> typing.Optional["ElementFragment"]:
+        """
+        Find the element fragment below this fragment with a particular id attribute
+
+        Arguments:
+            id: the id to find
+
+        Returns:
+             The first element fragment with the id, or None if there is no such fragment
+        """
+        for fragment in self.iter_elements():
+            if fragment.get_attribute("id") == id:
+                return fragment
+        return None
+
+    def copy(self) -> "ElementFragment":
+        """
+        Copy this fragment and the element and text fragments below it.  Other fragments are shared with the copy.
+        The copy retains any cached output of the original (which is only kept for fragments which have not
+        changed since they were last rendered).
+
+        Returns:
+             The copy
+        """
+        fragment = object.__new__(self.__class__)
+        fragment.tag = self.tag
+        fragment.__attrs = dict(self.__attrs) if self.__attrs else None
+        fragment.__style = dict(self.__style) if self.__style else None
+        fragment.__children = None
+        fragment.__parent = None
+        fragment.__dirty = self.__dirty
+        fragment.__cache = self.__cache
+        if self.__children:
+            fragment.__children = []
+            for child_fragment in self.__children:
+                if isinstance(child_fragment, ElementFragment):
+                    child_fragment = child_fragment.copy()
+                    child_fragment.__parent = fragment
+                elif isinstance(child_fragment, TextFragment):
+                    child_fragment = TextFragment(child_fragment.text, child_fragment.raw)
+                fragment.__children.append(child_fragment)
+        return fragment
+
+    def invalidate(self):
+        """
+        Mark this fragment and the fragments above it as changed, so that they will be rendered again
+        """
+        fragments = [self]
+        while fragments:
+            fragment = fragments.pop()
+            if fragment.__dirty:
+                # the fragments above a changed fragment have already been marked as changed
+                continue
+            fragment.__dirty = True
+            parent = fragment.__parent
+            if isinstance(parent, list):
+                fragments.extend(parent)
+            elif parent is not None:
+                fragments.append(parent)
+
+    def is_dirty(self) -> bool:
+        """
+        Check whether this fragment has changed since it was last rendered
+
+        Returns:
+             True if this fragment or any fragment below it has changed
+        """
+        return self.__dirty
+
+    def add_element(self, tag: str, attrs: typing.Dict[str, str] = None,
+                    style: typing.Dict[str, str] = None) -> "ElementFragment":
         """
         Add a child element fragment to this fragment
 
@@ -78,39 +301,762 @@ class ElementFragment(Fragment):
         Add a child text fragment to this fragment
 
         Arguments:
-            text: the text to include
+            text: the text to include, which is escaped when written (except within script and style elements)
         """
-        fragment = TextFragment(text)
+        fragment = TextFragment(text, self.tag in raw_text_elements)
         self.add_fragment(fragment)
         return self
 
     def set_attribute(self,name,value) -> "ElementFragment":
-        self.attrs[name] = value
+        self.invalidate()
+        if self.__attrs is None:
+            with _allocation_lock:
+                if self.__attrs is None:
+                    self.__attrs = {}
+        self.__attrs[name] = value
         return self
 
     def set_style(self, name, value) -> "ElementFragment":
-        self.style[name] = value
+        self.invalidate()
+        if self.__style is None:
+            with _allocation_lock:
+                if self.__style is None:
+                    self.__style = {}
+        self.__style[name] = value
         return self
 
     def add_fragment(self, fragment: Fragment) -> "Html5Builder":
-        self.child_fragments.append(fragment)
+        self.invalidate()
+        if isinstance(fragment, ElementFragment):
+            fragment.__add_parent(self)
+        if self.__children is None:
+            with _allocation_lock:
+                if self.__children is None:
+                    self.__children = []
+        self.__children.append(fragment)
         return self
 
+    def __add_parent(self, parent):
+        # a fragment may be added to several parents (for example in different builders), which must all be
+        # marked as changed when it changes.  Most fragments have one parent, which is held without a list.
+        if self.__parent is None or self.__parent is parent:
+            self.__parent = parent
+        elif isinstance(self.__parent, list):
+            if not any(existing is parent for existing in self.__parent):
+                self.__parent.append(parent)
+        else:
+            self.__parent = [self.__parent, parent]
+
+    def add_section(self, tag: str, attrs: typing.Dict[str, str] = None,
+                    style: typing.Dict[str, str] = None, build_fn: typing.Callable[..., None] = None,
+                    build_args: tuple = ()) -> "SectionFragment":
+        """
+        Add a child section fragment to this fragment.  Sections are independent parts of the document which
+        may be rendered in parallel when the builder is given an executor.
+
+        Arguments:
+            tag: the tag name to add
+            attrs: dictionary containing the names and values of attributes.
+            style: dictionary contiaining the names and values of CSS styles to apply.
+            build_fn: optional function called with the section and build_args to add its content when
+                      it is rendered (in a worker process, when rendered in parallel)
+            build_args: arguments to pass to build_fn
+
+        Returns:
+             The section fragment that was added
+        """
+        fragment = SectionFragment(tag, attrs, style, build_fn, build_args)
+        self.add_fragment(fragment)
+        return fragment
+
+    def add_async(self, awaitable: typing.Awaitable) -> "AsyncFragment":
+        """
+        Add a placeholder fragment to this fragment, whose content is produced by an awaitable (for example a coroutine).
+        Placeholders are resolved concurrently by Html5Builder.get_html_async.
+
+        Arguments:
+            awaitable: an awaitable returning a fragment, a string of text, a list of these or None
+
+        Returns:
+             The placeholder fragment that was added
+        """
+        fragment = AsyncFragment(awaitable, self)
+        self.add_fragment(fragment)
+        return fragment
+
+    def add_table(self, rows: typing.Iterable[typing.Sequence] = None,
+                  columns: typing.Sequence[typing.Iterable] = None,
+                  header: typing.Sequence = None, attrs: typing.Dict[str, str] = None,
+                  style: typing.Dict[str, str] = None) -> "TableFragment":
+        """
+        Add a child table fragment to this fragment, holding rows of values compactly rather than as
+        a fragment per cell.  Values are converted to strings and escaped.
+
+        Arguments:
+            rows: an iterable over rows, each a sequence of cell values
+            columns: alternatively, a sequence of columns, each an iterable (for example a list or array) of cell values
+            header: optional sequence of column headings
+            attrs: dictionary containing the names and values of attributes.
+            style: dictionary contiaining the names and values of CSS styles to apply.
+
+        Returns:
+             The table fragment that was added
+        """
+        fragment = TableFragment(attrs, style, header)
+        if rows is not None:
+            fragment.add_rows(rows)
+        if columns is not None:
+            fragment.add_columns(columns)
+        self.add_fragment(fragment)
+        return fragment
+
+    def freeze(self) -> "FrozenFragment":
+        """
+        Create an immutable copy of this fragment which caches its rendered HTML, for reuse across builds
+
+        Returns:
+             The frozen fragment
+        """
+        return FrozenFragment(self)
+
+    def get_key(self) -> typing.Hashable:
+        return (self.tag,
+                tuple(self.__attrs.items()) if self.__attrs else (),
+                tuple(self.__style.items()) if self.__style else (),
+                tuple(fragment.get_key() for fragment in self.__children) if self.__children else ())
+
+    def get_style_value(self) -> str:
+        style_value = ""
+        if self.__style:
+            for (name, value) in self.__style.items():
+                style_value += name + ":" + str(value) + ";"
+        return style_value
+
     def get_node(self, builder: "Html5Builder") -> xml.dom.minidom.Node:
         node = builder.doc.createElement(self.tag)
-        for (name, value) in self.attrs.items():
-            node.setAttribute(name, value)
-        if self.style:
-            style_value = ""
-            for (name, value) in self.style.items():
-                style_value += name + ":" + str(value) + ";"
-            node.setAttribute("style", style_value)
-        for fragment in self.child_fragments:
-            node.appendChild(fragment.get_node(builder))
+        if self.__attrs or self.__style:
+            for (name, value) in self.get_attributes(builder):
+                node.setAttribute(name, value)
+        if self.__children:
+            for fragment in self.__children:
+                node.appendChild(fragment.get_node(builder))
+        self.__mark_written()
+        return node
+
+    def get_attributes(self, builder: "Html5Builder" = None) -> typing.Iterator[typing.Tuple[str, str]]:
+        # yield attributes in order, including the style attribute or, if the builder is converting styles
+        # to classes, the class attribute
+        style_value = style_class = None
+        if self.__style:
+            if builder is None:
+                style_value = self.get_style_value()
+            elif builder.style_classes:
+                style_class = builder.get_style_class(self.__style)
+            else:
+                style_value = builder.get_style_value(self.__style)
+        if self.__attrs:
+            for (name, value) in self.__attrs.items():
+                if name == "style" and style_value is not None:
+                    value = style_value
+                    style_value = None
+                elif name == "class" and style_class is not None:
+                    value = value + " " + style_class if value else style_class
+                    style_class = None
+                yield (name, value)
+        if style_value is not None:
+            yield ("style", style_value)
+        if style_class is not None:
+            yield ("class", style_class)
+
+    def write(self, builder: "Html5Builder", of: typing.TextIO, indent: int):
+        # follows the same layout rules as Html5Exporter, without creating DOM nodes
+        if self.__children:
+            self.write_start_tag(builder, of, indent)
+            for fragment in self.__children:
+                fragment.write(builder, of, indent + 1)
+            self.write_end_tag(builder, of, indent)
+            return
+
+        self.__mark_written()
+        table = get_serialisation_table(builder.indent_spaces)
+        strings = table.get_tag(self.tag)
+        of.write(table.get_indent(indent))
+        of.write(strings[0])
+        if self.__attrs or self.__style:
+            for (name, value) in self.get_attributes(builder):
+                of.write(format_attribute(name, value))
+        of.write(strings[2])
+
+    def write_cached(self, builder: "Html5Builder", of: typing.TextIO, indent: int):
+        # write this fragment, reusing the output from the last time it was written if it has not changed
+        if self.is_cached(builder, indent):
+            if self.__cache[2]:
+                # the builder must define the classes used in the cached output
+                builder.add_style_rules(self.__cache[2])
+        elif builder.style_classes:
+            with builder.collect_style_rules() as style_rules:
+                html = self.render(builder, indent)
+            self.set_cached(builder, indent, html, style_rules)
+        else:
+            self.set_cached(builder, indent, self.render(builder, indent))
+        of.write(self.__cache[1])
+
+    def render(self, builder: "Html5Builder", indent: int) -> str:
+        # render this fragment to a string
+        with io.StringIO() as of:
+            self.write(builder, of, indent)
+            return of.getvalue()
+
+    def is_cached(self, builder: "Html5Builder", indent: int) -> bool:
+        # check whether the cached output of this fragment can be reused
+        cache = self.__cache
+        return not self.__dirty and cache is not None and cache[0] == (indent, builder.indent_spaces,
+                                                                        builder.style_classes)
+
+    def set_cached(self, builder: "Html5Builder", indent: int, html: str, style_rules: typing.Dict[str, str] = None):
+        # store output rendered from this fragment, which may have been rendered from a copy in another process,
+        # with the style rules defining any classes it uses
+        if self.__dirty:
+            self.mark_clean()
+        self.__cache = ((indent, builder.indent_spaces, builder.style_classes), html, style_rules)
+
+    def mark_clean(self):
+        # mark this fragment and all the changed fragments below it as unchanged, discarding their cached output
+        # which is now out of date
+        self.__mark_written()
+        if self.__children:
+            for fragment in self.__children:
+                if isinstance(fragment, ElementFragment) and fragment.__dirty:
+                    fragment.mark_clean()
+
+    def write_start_tag(self, builder: "Html5Builder", of: typing.TextIO, indent: int):
+        # write the start tag of an element which has children
+        table = get_serialisation_table(builder.indent_spaces)
+        of.write(table.get_indent(indent))
+        of.write(table.get_tag(self.tag)[0])
+        if self.__attrs or self.__style:
+            for (name, value) in self.get_attributes(builder):
+                of.write(format_attribute(name, value))
+        of.write(">\n")
+
+    def write_end_tag(self, builder: "Html5Builder", of: typing.TextIO, indent: int):
+        # write the end tag of an element which has children, which have all now been written
+        table = get_serialisation_table(builder.indent_spaces)
+        of.write(table.get_indent(indent))
+        of.write(table.get_tag(self.tag)[1])
+        self.__mark_written()
+
+    def __mark_written(self):
+        # this fragment has been written, but not through write_cached, so any cached output may be out of date
+        self.__dirty = False
+        self.__cache = None
+
+
+class SectionFragment(ElementFragment):
+    """
+    Represent an independent part of an HTML5 document, which Html5Builder may render in parallel with other sections
+    using its executor.  The output of each section is cached until the section is changed.
+
+    Sending a section to another process costs about as much as rendering it, so the greatest speedup comes from
+    sections whose content is added by a build function, which is then called in the worker process.
+
+    Args:
+        tag: the tag name of the section
+        attrs: dictionary containing the names and values of attributes.
+        style: dictionary contiaining the names and values of CSS styles to apply.
+        build_fn: optional function called with the section and build_args to add its content when it is rendered.
+                  When rendering in other processes the function and its arguments must be picklable.
+        build_args: arguments to pass to build_fn
+    """
+
+    __slots__ = ("__build_fn", "__build_args")
+
+    def __init__(self, tag: str, attrs: typing.Dict[str, str] = None, style: typing.Dict[str, str] = None,
+                 build_fn: typing.Callable[..., None] = None, build_args: tuple = ()):
+        super().__init__(tag, attrs, style)
+        self.__build_fn = build_fn
+        self.__build_args = build_args
+
+    def __getstate__(self):
+        return (super().__getstate__(), self.__build_fn, self.__build_args)
+
+    def __setstate__(self, state):
+        (element_state, self.__build_fn, self.__build_args) = state
+        super().__setstate__(element_state)
+
+    def copy(self) -> "SectionFragment":
+        fragment = super().copy()
+        fragment.__build_fn = self.__build_fn
+        fragment.__build_args = self.__build_args
+        return fragment
+
+    def write(self, builder: "Html5Builder", of: typing.TextIO, indent: int):
+        self.write_cached(builder, of, indent)
+
+    def render(self, builder: "Html5Builder", indent: int) -> str:
+        self.__build()
+        with io.StringIO() as of:
+            ElementFragment.write(self, builder, of, indent)
+            return of.getvalue()
+
+    def get_node(self, builder: "Html5Builder") -> xml.dom.minidom.Node:
+        self.__build()
+        return super().get_node(builder)
+
+    def get_key(self) -> typing.Hashable:
+        self.__build()
+        return super().get_key()
+
+    def add_fragment(self, fragment: Fragment) -> "SectionFragment":
+        # content from the build function comes before any content added afterwards
+        self.__build()
+        return super().add_fragment(fragment)
+
+    def __build(self):
+        if self.__build_fn is not None:
+            build_fn = self.__build_fn
+            self.__build_fn = None
+            build_fn(self, *self.__build_args)
+
+
+def render_section(section: SectionFragment, indent: int, indent_spaces: int,
+                   style_classes: bool = False) -> typing.Tuple[str, typing.Dict[str, str]]:
+    """
+    Render a section to a string.  This is called by the executor of an Html5Builder, possibly in another process.
+
+    Args:
+        section: the section to render
+        indent: the indent level of the section
+        indent_spaces: number of spaces to make up each indent
+        style_classes: whether to convert styles to classes
+
+    Returns:
+        A tuple containing the HTML and a dictionary mapping any generated class names to their styles
+    """
+    builder = Html5Builder(indent_spaces=indent_spaces, style_classes=style_classes)
+    html = section.render(builder, indent)
+    return (html, builder.get_style_rules())
+
+
+class AsyncFragment(Fragment):
+    """
+    Represent a placeholder for content produced by an awaitable.  The content must be resolved (see
+    Html5Builder.get_html_async) before the document is rendered, and should not be changed afterwards.
+    Create using ElementFragment.add_async.
+
+    Args:
+        awaitable: an awaitable returning a fragment, a string of text, a list of these or None
+        parent: the element fragment containing this placeholder
+    """
+
+    __slots__ = ("__awaitable", "__fragments", "__parent")
+
+    def __init__(self, awaitable: typing.Awaitable, parent: ElementFragment = None):
+        self.__awaitable = awaitable
+        self.__fragments = None
+        self.__parent = parent
+
+    def is_resolved(self) -> bool:
+        return self.__fragments is not None
+
+    async def resolve(self):
+        """
+        Await the content of this placeholder
+        """
+        if self.__fragments is None:
+            content = await self.__awaitable
+            self.__awaitable = None
+            if not isinstance(content, (list, tuple)):
+                content = [] if content is None else [content]
+            raw = self.__parent is not None and self.__parent.tag in raw_text_elements
+            self.__fragments = [TextFragment(item, raw) if isinstance(item, str) else item for item in content]
+            if self.__parent is not None:
+                self.__parent.invalidate()
+
+    def get_fragments(self) -> typing.Sequence[Fragment]:
+        if self.__fragments is None:
+            raise ValueError("placeholder content has not been resolved, use Html5Builder.get_html_async")
+        return self.__fragments
+
+    def get_node(self, builder):
+        fragment = builder.doc.createDocumentFragment()
+        for child_fragment in self.get_fragments():
+            fragment.appendChild(child_fragment.get_node(builder))
+        return fragment
+
+    def write(self, builder, of, indent):
+        for fragment in self.get_fragments():
+            fragment.write(builder, of, indent)
+
+    def get_key(self):
+        return ("__async__", tuple(fragment.get_key() for fragment in self.get_fragments()))
+
+
+class TableFragment(ElementFragment):
+    """
+    Represent an HTML5 table element whose rows of cell values are stored as escaped strings
+    and formatted in bulk.  Create using ElementFragment.add_table.
+
+    Args:
+        attrs: dictionary containing the names and values of attributes.
+        style: dictionary contiaining the names and values of CSS styles to apply.
+        header: optional sequence of column headings
+    """
+
+    __slots__ = ("__header", "__rows")
+
+    def __init__(self, attrs: typing.Dict[str, str] = None, style: typing.Dict[str, str] = None,
+                 header: typing.Sequence = None):
+        super().__init__("table", attrs, style)
+        self.__header = TableFragment.__escape_row(header) if header is not None else None
+        self.__rows = []
+
+    def __getstate__(self):
+        return (super().__getstate__(), self.__header, self.__rows)
+
+    def __setstate__(self, state):
+        (element_state, self.__header, self.__rows) = state
+        super().__setstate__(element_state)
+
+    def copy(self) -> "TableFragment":
+        fragment = super().copy()
+        fragment.__header = self.__header
+        fragment.__rows = list(self.__rows)
+        return fragment
+
+    def add_rows(self, rows: typing.Iterable[typing.Sequence]) -> "TableFragment":
+        """
+        Add rows to the table
+
+        Arguments:
+            rows: an iterable over rows, each a sequence of cell values
+        """
+        self.invalidate()
+        escape_row = TableFragment.__escape_row
+        self.__rows.extend(escape_row(row) for row in rows)
+        return self
+
+    def add_columns(self, columns: typing.Sequence[typing.Iterable]) -> "TableFragment":
+        """
+        Add rows to the table from columns of values
+
+        Arguments:
+            columns: a sequence of columns, each an iterable (for example a list or array) of cell values
+        """
+        # array-like columns (for example numpy arrays) convert to lists of python values more quickly in bulk
+        columns = [column.tolist() if hasattr(column, "tolist") else column for column in columns]
+        return self.add_rows(zip(*columns))
+
+    @staticmethod
+    def __escape_row(row):
+        # convert a row of values to a tuple of escaped strings, escaping all the cells in one pass
+        # cells are stripped and empty cells are represented by an empty string, as they are written with no text
+        cells = ["" if value is None else (value if isinstance(value, str) else str(value)).strip(" \n")
+                 for value in row]
+        joined = "\0".join(cells)
+        escaped = escape(joined, quote=False)
+        if escaped is not joined:  # escape returns its argument when there is nothing to escape
+            escaped_cells = escaped.split("\0")
+            if len(escaped_cells) == len(cells):
+                cells = escaped_cells
+            else:
+                cells = [escape(cell, quote=False) for cell in cells]
+        if "\t" in joined:
+            cells = [cell if cell.replace(" ", "").replace("\t", "").replace("\n", "") else "" for cell in cells]
+        return tuple(cells)
+
+    def get_key(self) -> typing.Hashable:
+        return (super().get_key(), self.__header, tuple(self.__rows))
+
+    def get_node(self, builder: "Html5Builder") -> xml.dom.minidom.Node:
+        node = super().get_node(builder)
+        doc = builder.doc
+        for (row, cell_tag) in self.__iter_rows():
+            row_node = doc.createElement("tr")
+            for cell in row:
+                cell_node = doc.createElement(cell_tag)
+                if cell:
+                    cell_node.appendChild(doc.createTextNode(unescape(cell)))
+                row_node.appendChild(cell_node)
+            node.appendChild(row_node)
         return node
 
+    def write(self, builder: "Html5Builder", of: typing.TextIO, indent: int):
+        if not self.__rows and self.__header is None:
+            super().write(builder, of, indent)
+            return
+        self.write_start_tag(builder, of, indent)
+        for fragment in self.get_child_fragments():
+            fragment.write(builder, of, indent + 1)
+        table = get_serialisation_table(builder.indent_spaces)
+        row_pad = table.get_indent(indent + 1)
+        cell_pad = table.get_indent(indent + 2)
+        text_pad = table.get_indent(indent + 3)
+        (start_tag, end_tag, empty_end) = table.get_tag("tr")
+        row_start = row_pad + start_tag + ">\n"
+        row_end = row_pad + end_tag
+        empty_row = row_pad + start_tag + empty_end
+        # format a whole row at a time, from strings prepared once per table
+        templates = {}
+        for cell_tag in ["th", "td"]:
+            (start_tag, end_tag, empty_end) = table.get_tag(cell_tag)
+            templates[cell_tag] = (cell_pad + start_tag + ">\n" + text_pad,
+                                   "\n" + cell_pad + end_tag,
+                                   cell_pad + start_tag + empty_end)
+        for (row, cell_tag) in self.__iter_rows():
+            (cell_start, cell_end, empty_cell) = templates[cell_tag]
+            if row:
+                of.write(row_start
+                         + "".join([cell_start + cell + cell_end if cell else empty_cell for cell in row])
+                         + row_end)
+            else:
+                of.write(empty_row)
+        self.write_end_tag(builder, of, indent)
 
-class RawFragment:
+    def __iter_rows(self):
+        if self.__header is not None:
+            yield (self.__header, "th")
+        for row in self.__rows:
+            yield (row, "td")
+
+
+class FrozenFragment(Fragment):
+    """
+    Represent an immutable copy of a fragment which is rendered at most once per indent level, so that
+    it can be added to many documents cheaply.  Create using ElementFragment.freeze or FrozenFragmentCache.
+
+    Args:
+        fragment: the fragment to copy
+    """
+
+    __slots__ = ("__fragment", "__key", "__rendered")
+
+    def __init__(self, fragment: Fragment):
+        self.__fragment = copy.deepcopy(fragment)
+        self.__key = None
+        self.__rendered = {}
+
+    def get_node(self, builder):
+        return self.__fragment.get_node(builder)
+
+    def write(self, builder, of, indent):
+        cache_key = (indent, builder.indent_spaces, builder.style_classes)
+        rendered = self.__rendered.get(cache_key)
+        if rendered is None:
+            # render using a separate builder, to find the style rules this fragment needs in any builder
+            fragment_builder = Html5Builder(indent_spaces=builder.indent_spaces, style_classes=builder.style_classes)
+            with io.StringIO() as fragment_of:
+                self.__fragment.write(fragment_builder, fragment_of, indent)
+                rendered = self.__rendered[cache_key] = (fragment_of.getvalue(), fragment_builder.get_style_rules())
+        (html, style_rules) = rendered
+        if style_rules:
+            builder.add_style_rules(style_rules)
+        of.write(html)
+
+    def get_key(self):
+        if self.__key is None:
+            self.__key = self.__fragment.get_key()
+        return self.__key
+
+
+class FrozenFragmentCache:
+    """
+    Maintain a cache of frozen fragments, discarding the least recently used fragments when full
+
+    Args:
+        max_size: the maximum number of frozen fragments to hold
+
+    A way you might use me is:
+
+    >>> cache = FrozenFragmentCache(max_size=64)
+    >>> nav = ElementFragment("nav")
+    >>> nav.add_element("a", {"href": "/"}).add_text("Home")
+    >>> builder = Html5Builder()
+    >>> builder.body().add_fragment(cache.freeze(nav))
+    >>> builder.body().add_fragment(cache.get(("footer", "en"), lambda: make_footer("en")))
+    """
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self.__fragments = collections.OrderedDict()
+        self.__lock = threading.Lock()
+
+    def freeze(self, fragment: Fragment) -> FrozenFragment:
+        """
+        Get a frozen copy of a fragment, reusing a cached copy of any fragment with the same structure
+
+        Arguments:
+            fragment: the fragment to freeze
+
+        Returns:
+             The frozen fragment
+        """
+        return self.get(fragment.get_key(), lambda: fragment)
+
+    def get(self, key: typing.Hashable, fn: typing.Callable[[], Fragment]) -> FrozenFragment:
+        """
+        Get a frozen fragment from the cache, creating it when it is not present
+
+        Arguments:
+            key: a key identifying the fragment
+            fn: a function returning the fragment to freeze, called if the key is not present
+
+        Returns:
+             The frozen fragment
+        """
+        with self.__lock:
+            frozen = self.__fragments.get(key)
+            if frozen is not None:
+                self.__fragments.move_to_end(key)
+                return frozen
+        frozen = FrozenFragment(fn())
+        with self.__lock:
+            self.__fragments[key] = frozen
+            while len(self.__fragments) > self.max_size:
+                self.__fragments.popitem(last=False)
+        return frozen
+
+    def clear(self):
+        """
+        Remove all fragments from the cache
+        """
+        with self.__lock:
+            self.__fragments.clear()
+
+    def __len__(self):
+        return len(self.__fragments)
+
+
+class StreamingFragment(ElementFragment):
+    """
+    Represent an HTML5 element node whose content is written out as soon as it is complete,
+    rather than being held in memory until the whole document is rendered.
+
+    Child fragments added with add_element, add_text or add_fragment are held until flush or close is called.
+    Child sections opened with section are written out when they are closed.
+    """
+
+    __slots__ = ("__builder", "__of", "__indent", "__parent", "__end", "__started", "__closed", "__open_section")
+
+    def __init__(self, tag: str, attrs: typing.Dict[str, str], style: typing.Dict[str, str],
+                 builder: "Html5Builder", of: typing.TextIO, indent: int,
+                 parent: typing.Optional["StreamingFragment"] = None, end: str = ""):
+        super().__init__(tag, attrs, style)
+        self.__builder = builder
+        self.__of = of
+        self.__indent = indent
+        self.__parent = parent
+        self.__end = end
+        self.__started = False
+        self.__closed = False
+        self.__open_section = None
+
+    def section(self, tag: str, attrs: typing.Dict[str, str] = None,
+                style: typing.Dict[str, str] = None) -> "StreamingFragment":
+        """
+        Open a child section of this fragment.  Child fragments added before the section are written out first.
+        Use the returned section as a context manager, or call its close method when it is complete.
+
+        Arguments:
+            tag: the tag name of the section
+            attrs: dictionary containing the names and values of attributes.
+            style: dictionary contiaining the names and values of CSS styles to apply.
+
+        Returns:
+             The section that was opened
+        """
+        self.flush()
+        self.__start()
+        self.__open_section = StreamingFragment(tag, attrs, style, self.__builder, self.__of,
+                                                self.__indent + 1, parent=self)
+        return self.__open_section
+
+    def flush(self) -> "StreamingFragment":
+        """
+        Write out the child fragments added to this fragment so far and release them
+        """
+        self.__check_writable()
+        if self.get_child_fragments():
+            self.__start()
+            for fragment in self.get_child_fragments():
+                fragment.write(self.__builder, self.__of, self.__indent + 1)
+            self.child_fragments = None
+        return self
+
+    def close(self):
+        """
+        Write out any remaining content of this fragment and its end tag
+        """
+        if self.__started:
+            self.flush()
+            self.write_end_tag(self.__builder, self.__of, self.__indent)
+        else:
+            self.__check_writable()
+            self.write(self.__builder, self.__of, self.__indent)
+        self.child_fragments = None
+        self.__closed = True
+        if self.__parent is not None:
+            self.__parent.__open_section = None
+        else:
+            self.__of.write(self.__end)
+            if hasattr(self.__of, "flush"):
+                self.__of.flush()
+
+    def add_fragment(self, fragment: Fragment) -> "StreamingFragment":
+        self.__check_writable()
+        return super().add_fragment(fragment)
+
+    def __start(self):
+        # write the start tag, once it is known that this element has children
+        if not self.__started:
+            self.write_start_tag(self.__builder, self.__of, self.__indent)
+            self.__started = True
+
+    def __check_writable(self):
+        if self.__closed:
+            raise ValueError("<%s> section has already been closed" % self.tag)
+        if self.__open_section is not None:
+            raise ValueError("<%s> section has an open child <%s> section" % (self.tag, self.__open_section.tag))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+
+
+class ChunkWriter:
+    """
+    Collect written text into chunks of (at least) a minimum size and pass each chunk to a function
+
+    Args:
+        fn: a function called with each chunk of text
+        chunk_size: the minimum size of each chunk (except the last)
+    """
+
+    def __init__(self, fn: typing.Callable[[str], None], chunk_size: int = 65536):
+        self.fn = fn
+        self.chunk_size = chunk_size
+        self.parts = []
+        self.size = 0
+
+    def write(self, s: str):
+        self.parts.append(s)
+        self.size += len(s)
+        if self.size >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.fn("".join(self.parts))
+            self.parts = []
+            self.size = 0
+
+
+class RawFragment(Fragment):
+
+    __slots__ = ("node",)
 
     def __init__(self, node):
         self.node = node
@@ -118,10 +1064,31 @@ class RawFragment:
     def get_node(self, builder):
         return self.node
 
+    def write(self, builder, of, indent):
+        Html5Exporter(builder.indent_spaces).write_node(of, self.node, indent)
+
+    def get_key(self):
+        return ("__raw__", self.node.toxml())
+
 class Html5Builder:
     """
     Create and populate an html5 document
 
+    Args:
+        language: the language code to set on the html element
+        id_suffix: a suffix appended to each id returned from get_next_id
+        width: if specified, centre the body with this width in pixels
+        indent_spaces: number of spaces to make up each indent
+        executor: if specified, used to render changed section fragments in parallel, for example
+                  a concurrent.futures.ProcessPoolExecutor
+        style_classes: if True, convert each distinct fragment style to a generated class, defined in a
+                       <style> element in the head, rather than writing inline style attributes
+        thread_safe: if True, allow different threads to populate the document concurrently.  Each thread
+                     allocates ids from its own block of id_block_size ids, so ids are unique but are not
+                     allocated in order.
+        id_block_size: the number of ids reserved by a thread at a time, when thread_safe is True
+        stats: optional object to collect statistics about each call to get_html
+
     A way you might use me is:
 
     >>> builder = Html5Builder(language="en")
@@ -147,19 +1114,62 @@ class Html5Builder:
     </html>
     """
 
-    def __init__(self, language: str = "", id_suffix="_bld", width=None):
-        self.doc = getDOMImplementation().createDocument(None, "html", None)
-        self.root = self.doc.documentElement
-        if language:
-            self.root.setAttribute("lang", language)
+    def __init__(self, language: str = "", id_suffix="_bld", width=None, indent_spaces: int = 4,
+                 executor: concurrent.futures.Executor = None, style_classes: bool = False,
+                 thread_safe: bool = False, id_block_size: int = 64, stats: Html5Stats = None):
+        self.language = language
+        self.__doc = None  # created when first needed, as most documents are written without a DOM
         self.__head = ElementFragment("head")
         self.__body = ElementFragment("body")
         self.css = ""
         if width:
             self.css = "body { margin-left:auto; margin-right:auto; position:relative; width:%dpx; }"%(width)
         self.post_build_fns = []
+        self.fragment_hooks = []
         self.id_counters = {}
         self.id_suffix = id_suffix
+        self.indent_spaces = indent_spaces
+        self.executor = executor
+        self.style_classes = style_classes
+        self.thread_safe = thread_safe
+        self.id_block_size = id_block_size
+        self.stats = stats
+        self.__lock = threading.Lock()
+        self.__id_blocks = threading.local()
+        self.__html = None
+        self.__html_key = None
+        self.__style_values = {}
+        self.__style_classes = {}
+        self.__class_styles = {}
+        self.__style_rules = {}
+        self.__style_rule_collectors = []
+
+    @property
+    def doc(self) -> xml.dom.minidom.Document:
+        """
+        The DOM document used to create nodes for post build functions, created when first used
+        """
+        if self.__doc is None:
+            from xml.dom.minidom import getDOMImplementation
+            self.__doc = getDOMImplementation().createDocument(None, "html", None)
+            if self.language:
+                self.__doc.documentElement.setAttribute("lang", self.language)
+        return self.__doc
+
+    @property
+    def root(self) -> xml.dom.minidom.Element:
+        """
+        The html element of the DOM document
+        """
+        return self.doc.documentElement
+
+    def __get_root_attributes(self):
+        # the attributes of the html element, including any set on the DOM's html element if it has been created
+        attributes = [("lang", self.language)] if self.language else []
+        if self.__doc is not None:
+            attributes += [(name, value) for (name, value) in self.__doc.documentElement.attributes.items()
+                           if name != "lang"]
+        return attributes
 
     def head(self) -> ElementFragment:
         """
@@ -183,31 +1193,351 @@ class Html5Builder:
         """
         Get an HTML5 string representation of the document being built
 
+        Fragments are written directly as HTML unless post build functions have been registered, in which
+        case the document is first converted to DOM nodes so that those functions can inspect it.  Fragment
+        hooks (see register_fragment_hook) do not need DOM nodes.
+
+        Getting the HTML does not modify the document.  The HTML is cached and returned again unless
+        the document has changed, and only the changed sections of the head and body are rendered again.
+
+        Returns:
+             Html formatted string
+        """
+        html_key = (tuple(self.__get_root_attributes()), self.css, self.indent_spaces, tuple(self.post_build_fns),
+                    tuple(self.fragment_hooks), self.style_classes)
+        if self.__html is None or html_key != self.__html_key \
+                or self.__head.is_dirty() or self.__body.is_dirty():
+            with self.__timer("builder.get_html"):
+                # collect the style rules used by the document as it is now
+                self.__style_rules = {}
+                with self.__timer("builder.fragment_hooks"):
+                    (head, body) = self.__get_head_and_body()
+                if self.post_build_fns:
+                    with self.__timer("builder.post_build"):
+                        self.__html = self.__get_html_via_dom(head, body)
+                else:
+                    with self.__timer("builder.sections"):
+                        self.__render_sections(head, body)
+                    with self.__timer("builder.write"), io.StringIO() as of:
+                        self.__write(of, head, body)
+                        self.__html = of.getvalue().strip()
+                if self.fragment_hooks:
+                    # the hooks were applied to a copy, which has now been rendered.  The output of the copy
+                    # includes changes made by the hooks, so it is not cached in the original fragments.
+                    self.__head.mark_clean()
+                    self.__body.mark_clean()
+                self.__html_key = html_key
+            if self.stats is not None:
+                self.stats.increment("builder.renders")
+                self.stats.increment("builder.output_chars", len(self.__html))
+        elif self.stats is not None:
+            self.stats.increment("builder.cache_hits")
+        if self.stats is not None:
+            self.stats.report("get_html")
+        return self.__html
+
+    def __timer(self, name):
+        return self.stats.timer(name) if self.stats is not None else contextlib.nullcontext()
+
+    async def get_html_async(self) -> str:
+        """
+        Resolve all placeholder fragments added with ElementFragment.add_async, awaiting them concurrently,
+        then get an HTML5 string representation of the document being built
+
         Returns:
              Html formatted string
         """
-        exporter = Html5Exporter()
-        if self.css:
-            self.__head.add_element("style").add_text(self.css)
-        head_node = self.__head.get_node(self)
-        body_node = self.__body.get_node(self)
+        placeholders = self.__find_placeholders()
+        while placeholders:
+            # resolved content may itself contain placeholders
+            import asyncio
+            await asyncio.gather(*[placeholder.resolve() for placeholder in placeholders])
+            placeholders = self.__find_placeholders()
+        return self.get_html()
+
+    def __find_placeholders(self):
+        placeholders = []
+        fragments = [self.__head, self.__body]
+        while fragments:
+            fragment = fragments.pop()
+            if isinstance(fragment, AsyncFragment):
+                if fragment.is_resolved():
+                    fragments.extend(fragment.get_fragments())
+                else:
+                    placeholders.append(fragment)
+            elif isinstance(fragment, ElementFragment) and fragment.is_dirty():
+                # placeholders are only added (or resolved) within fragments which have changed
+                fragments.extend(fragment.get_child_fragments())
+        return placeholders
+
+    def write(self, of: typing.TextIO):
+        """
+        Write an HTML5 representation of the document being built to a writer, without converting to DOM nodes
+
+        Arguments:
+            of: the writer to receive the HTML
+        """
+        (head, body) = self.__get_head_and_body()
+        self.__style_rules = {}
+        self.__write(of, head, body)
+
+    def __get_head_and_body(self):
+        # get the head and body fragments to render, applying any fragment hooks to copies
+        if not self.fragment_hooks:
+            return (self.__head, self.__body)
+        head = self.__head.copy()
+        body = self.__body.copy()
+        for fn in self.fragment_hooks:
+            fn(head, body)
+        return (head, body)
+
+    def __write(self, of, head, body):
+        if self.style_classes:
+            # write the body first, to find the classes which the <style> element in the head must define
+            with io.StringIO() as body_of:
+                self.__write_section(body_of, body)
+                self.__write_start(of, head)
+                of.write(body_of.getvalue())
+        else:
+            self.__write_start(of, head)
+            self.__write_section(of, body)
+        of.write("</html>\n")
+
+    def stream(self, of: typing.Union[typing.TextIO, typing.Callable[[str], None]],
+               chunk_size: int = 65536) -> StreamingFragment:
+        """
+        Start writing the document being built, writing the head immediately and the body as it is completed.
+        The body fragment is replaced by a StreamingFragment, which should be used as a context manager
+        (or closed) to complete the document.
+
+        Post build functions, fragment hooks and style classes are not supported when streaming.
+
+        A way you might use me is:
+
+        >>> builder = Html5Builder(language="en")
+        >>> builder.head().add_element("title").add_text("Report")
+        >>> with open("report.html", "w") as f, builder.stream(f) as body:
+        ...     with body.section("table") as table:
+        ...         for row in rows:
+        ...             with table.section("tr") as tr:
+        ...                 tr.add_element("td").add_text(row)
+
+        Arguments:
+            of: a writer to receive the HTML, or a function which will be called with chunks of HTML
+            chunk_size: the minimum size of each chunk passed to a function
+
+        Returns:
+             The streaming <body> fragment
+        """
+        if self.post_build_fns or self.fragment_hooks:
+            raise ValueError("post build functions and fragment hooks are not supported when streaming")
+        if self.style_classes:
+            raise ValueError("style classes are not supported when streaming")
+        if not hasattr(of, "write"):
+            of = ChunkWriter(of, chunk_size)
+        body = StreamingFragment(self.__body.tag, self.__body.attrs, self.__body.style, self, of, 1,
+                                 end="</html>")
+        for fragment in self.__body.get_child_fragments():
+            body.add_fragment(fragment)
+        self.__body = body
+        self.__write_start(of, self.__head)
+        return body
+
+    def __write_start(self, of, head):
+        of.write(HTML5_DOCTYPE + "\n")
+        of.write("<html")
+        for (name, value) in self.__get_root_attributes():
+            of.write(format_attribute(name, value))
+        of.write(">\n")
+        self.__write_section(of, head, self.__get_css_fragments)
+
+    def __write_section(self, of, fragment, get_extra_fragments=None):
+        # write the head or body, reusing the output of any of their child fragments which have not changed
+        child_fragments = fragment.get_child_fragments()
+        children_html = None
+        if child_fragments and get_extra_fragments and self.style_classes:
+            # the extra fragments depend on the styles of the child fragments, so write those first
+            with io.StringIO() as children_of:
+                for child_fragment in child_fragments:
+                    child_fragment.write_cached(self, children_of, 2)
+                children_html = children_of.getvalue()
+        extra_fragments = get_extra_fragments() if get_extra_fragments else []
+        if not child_fragments and not extra_fragments:
+            fragment.write(self, of, 1)
+        else:
+            fragment.write_start_tag(self, of, 1)
+            if children_html is not None:
+                of.write(children_html)
+            else:
+                for child_fragment in child_fragments:
+                    child_fragment.write_cached(self, of, 2)
+            for child_fragment in extra_fragments:
+                child_fragment.write(self, of, 2)
+            fragment.write_end_tag(self, of, 1)
+
+    def __render_sections(self, head, body):
+        # render any changed sections using the executor, so that writing the document reuses their output
+        if self.executor is None:
+            return
+        sections = []
+        self.__find_sections(head, 1, sections)
+        self.__find_sections(body, 1, sections)
+        if len(sections) > 1:
+            futures = [(section, indent, self.executor.submit(render_section, section, indent,
+                                                              self.indent_spaces, self.style_classes))
+                       for (section, indent) in sections]
+            for (section, indent, future) in futures:
+                (html, style_rules) = future.result()
+                section.set_cached(self, indent, html, style_rules)
+
+    def __find_sections(self, fragment, indent, sections):
+        for child_fragment in fragment.get_child_fragments():
+            if isinstance(child_fragment, SectionFragment):
+                if not child_fragment.is_cached(self, indent + 1):
+                    sections.append((child_fragment, indent + 1))
+            elif isinstance(child_fragment, ElementFragment) and child_fragment.is_dirty():
+                self.__find_sections(child_fragment, indent + 1, sections)
+
+    def __get_css_fragments(self):
+        css = [self.css] if self.css else []
+        for (class_name, style_value) in self.__style_rules.items():
+            css.append(".%s { %s }" % (class_name, style_value))
+        if css:
+            return [ElementFragment("style").add_text("\n".join(css))]
+        return []
+
+    def get_style_value(self, style: typing.Dict[str, str]) -> str:
+        """
+        Get the CSS declarations for a dictionary of styles, caching the result for styles which are used repeatedly
+
+        Arguments:
+            style: dictionary containing the names and values of CSS styles
+
+        Returns:
+             The CSS declarations
+        """
+        style_key = tuple(style.items())
+        style_value = self.__style_values.get(style_key)
+        if style_value is None:
+            style_value = "".join([name + ":" + str(value) + ";" for (name, value) in style_key])
+            if len(self.__style_values) >= 10000:
+                self.__style_values.clear()
+            self.__style_values[style_key] = style_value
+        return style_value
+
+    def get_style_class(self, style: typing.Dict[str, str]) -> str:
+        """
+        Get the generated class name for a dictionary of styles.  Class names are derived from the styles, so the
+        same styles are given the same class name in every builder.
+
+        Arguments:
+            style: dictionary containing the names and values of CSS styles
+
+        Returns:
+             The class name
+        """
+        style_value = self.get_style_value(style)
+        class_name = self.__style_classes.get(style_value)
+        if class_name is None:
+            with self.__lock:
+                class_name = self.__style_classes.get(style_value)
+                if class_name is None:
+                    import hashlib
+                    class_name = "s" + hashlib.blake2s(style_value.encode("utf-8"), digest_size=4).hexdigest()
+                    while self.__class_styles.get(class_name, style_value) != style_value:
+                        class_name += "x"  # hash collision
+                    self.__style_classes[style_value] = class_name
+                    self.__class_styles[class_name] = style_value
+        self.__use_style_rule(class_name, style_value)
+        return class_name
+
+    def get_style_rules(self) -> typing.Dict[str, str]:
+        """
+        Get the classes generated from styles which are used by the document, as last rendered
+
+        Returns:
+             A dictionary mapping each class name to its CSS declarations
+        """
+        return self.__style_rules
+
+    def add_style_rules(self, style_rules: typing.Dict[str, str]):
+        # add classes generated from styles by another builder, or used by cached output
+        for (class_name, style_value) in style_rules.items():
+            self.__style_classes.setdefault(style_value, class_name)
+            self.__class_styles.setdefault(class_name, style_value)
+            self.__use_style_rule(class_name, style_value)
+
+    @contextlib.contextmanager
+    def collect_style_rules(self):
+        # collect the style rules used by the output written within this context, for example so that they can be
+        # cached with the output
+        style_rules = {}
+        self.__style_rule_collectors.append(style_rules)
+        try:
+            yield style_rules
+        finally:
+            self.__style_rule_collectors.pop()
+
+    def __use_style_rule(self, class_name, style_value):
+        self.__style_rules[class_name] = style_value
+        for style_rules in self.__style_rule_collectors:
+            style_rules[class_name] = style_value
+
+    def __get_html_via_dom(self, head, body):
+        exporter = Html5Exporter(self.indent_spaces)
+        body_node = body.get_node(self)
+        head_node = head.get_node(self)
+        for fragment in self.__get_css_fragments():
+            head_node.appendChild(fragment.get_node(self))
 
         for fn in self.post_build_fns:
             fn(head_node,body_node)
 
-        self.root.appendChild(head_node)
-        self.root.appendChild(body_node)
+        root = self.root
+        if self.language:
+            root.setAttribute("lang", self.language)
+        elif root.hasAttribute("lang"):
+            root.removeAttribute("lang")
+        while root.firstChild is not None:
+            root.removeChild(root.firstChild)
+        root.appendChild(head_node)
+        root.appendChild(body_node)
         return exporter.export(self.doc).strip()
 
     def register_post_build(self,fn):
         self.post_build_fns.append(fn)
 
+    def register_fragment_hook(self, fn: typing.Callable[[ElementFragment, ElementFragment], None]):
+        """
+        Register a function to modify the document each time it is rendered, without converting it to DOM nodes.
+        The function is called with copies of the head and body fragments, so changes it makes
+        (for example, using find_all or find_by_id and then set_attribute or add_element) are not kept.
+
+        Arguments:
+            fn: a function called with the head and body fragments
+        """
+        self.fragment_hooks.append(fn)
+
     def get_next_id(self,prefix):
+        if self.thread_safe:
+            return self.__get_next_block_id(prefix)
         if prefix not in self.id_counters:
             self.id_counters[prefix] = 0
         id = prefix+str(self.id_counters[prefix])+self.id_suffix
         self.id_counters[prefix] =  1 + self.id_counters[prefix]
         return id
 
+    def __get_next_block_id(self, prefix):
+        # allocate an id from this thread's block, only taking the lock to reserve a new block
+        blocks = self.__id_blocks.__dict__.setdefault("blocks", {})
+        (next_counter, end_counter) = blocks.get(prefix, (0, 0))
+        if next_counter == end_counter:
+            with self.__lock:
+                next_counter = self.id_counters.get(prefix, 0)
+                end_counter = next_counter + self.id_block_size
+                self.id_counters[prefix] = end_counter
+        blocks[prefix] = (next_counter + 1, end_counter)
+        return prefix+str(next_counter)+self.id_suffix
+
 
 
@@ -20,7 +20,147 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-void_elements = "area,base,br,col,embed,hr,img,input,link,meta,param,source,track,wbr".split(",")
-require_end_tags = "script,style,form,ins,del,rt,pre,meter,textarea".split(",")
+from __future__ import annotations
+
+import os
+import sys
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import typing
+
+void_elements = frozenset("area,base,br,col,embed,hr,img,input,link,meta,param,source,track,wbr".split(","))
+require_end_tags = frozenset("script,style,form,ins,del,rt,pre,meter,textarea".split(","))
+# elements whose text is written without character references
+raw_text_elements = frozenset("script,style".split(","))
 
 HTML5_DOCTYPE = "<!DOCTYPE html>"
+
+# the umask gives the permissions of new files written by write_atomic.  It can only be read by setting it,
+# so it is read once, here, rather than being changed briefly while other threads may be creating files
+_umask = os.umask(0o022)
+os.umask(_umask)
+
+
+class Html5LimitExceeded(ValueError):
+    """
+    Raised when HTML content exceeds a limit set on Html5Parser
+
+    Args:
+        limit: the name of the limit, for example "max_depth"
+        value: the value of the limit
+    """
+
+    def __init__(self, limit: str, value: int):
+        super().__init__("HTML content exceeds %s (%d)" % (limit, value))
+        self.limit = limit
+        self.value = value
+
+
+class SerialisationTable:
+    """
+    Hold the strings used to write HTML5 with a given indent, computed once and shared by every exporter and
+    builder using that indent.  Get the shared table with get_serialisation_table.
+
+    Args:
+        indent_spaces: number of spaces to make up each indent
+    """
+
+    # the number of indent levels, and the number of tags, whose strings are held
+    MAX_DEPTH = 64
+    MAX_TAGS = 4096
+
+    def __init__(self, indent_spaces: int):
+        self.indent_spaces = indent_spaces
+        self.indents = [" " * depth * indent_spaces for depth in range(SerialisationTable.MAX_DEPTH)]
+        self.tags = {}
+
+    def get_indent(self, depth: int) -> str:
+        """
+        Get the indent for a depth
+
+        Args:
+            depth: the indent level
+
+        Returns:
+            A string of spaces
+        """
+        if depth < SerialisationTable.MAX_DEPTH:
+            return self.indents[depth]
+        return " " * depth * self.indent_spaces
+
+    def get_tag(self, tag: str) -> typing.Tuple[str, str, str]:
+        """
+        Get the strings used to write an element
+
+        Args:
+            tag: the tag name of the element
+
+        Returns:
+            A tuple holding the start of its start tag ("<tag"), its end tag ("</tag>" and a newline) and the text
+            which completes its start tag when it has no children
+        """
+        strings = self.tags.get(tag)
+        if strings is None:
+            if tag in require_end_tags:
+                empty_end = "></" + tag + ">\n"
+            elif tag in void_elements:
+                empty_end = ">\n"
+            else:
+                empty_end = "/>\n"
+            strings = ("<" + tag, "</" + tag + ">\n", empty_end)
+            if len(self.tags) < SerialisationTable.MAX_TAGS:
+                self.tags[sys.intern(tag)] = strings
+        return strings
+
+
+_serialisation_tables = {}
+
+
+def get_serialisation_table(indent_spaces: int) -> SerialisationTable:
+    """
+    Get the serialisation table shared by everything writing HTML5 with an indent
+
+    Args:
+        indent_spaces: number of spaces to make up each indent
+
+    Returns:
+        The shared SerialisationTable
+    """
+    table = _serialisation_tables.get(indent_spaces)
+    if table is None:
+        table = _serialisation_tables.setdefault(indent_spaces, SerialisationTable(indent_spaces))
+    return table
+
+
+def write_atomic(path: str, content: typing.Union[str, bytes]):
+    """
+    Write a file so that readers see either the old or the new content, never partial content.  A file which
+    is replaced keeps its permissions, and a new file is given the usual permissions for the process's umask.
+
+    Args:
+        path: the path of the file to write
+        content: the content to write, as a string (written as UTF-8) or bytes
+    """
+    import tempfile
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~_umask
+    (fd, temp_path) = tempfile.mkstemp(dir=folder, prefix=".htmlfive-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            # mkstemp creates the file readable only by its owner
+            if hasattr(os, "fchmod"):
+                os.fchmod(f.fileno(), mode)
+            else:
+                os.chmod(temp_path, mode)
+            f.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
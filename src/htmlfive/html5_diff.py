@@ -0,0 +1,240 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Compare two DOM documents and produce a patch, a list of operations which transforms the first document into
+the second.  Patches contain only strings, numbers, lists and dictionaries, so they can be serialised as JSON
+and sent to a client, which applies them to its copy of the first document.
+
+Each operation is a list whose first item names the operation and whose second item is the path of the node
+to change, a list of child indexes starting from the document element:
+
+    ["attrs", path, {name: value, ...}, [removed_name, ...]]: set and remove attributes of an element
+    ["text", path, data]: change the data of a text or comment node
+    ["replace", path, node]: replace a node
+    ["children", path, [child, ...]]: rearrange the children of an element, where each child is the index of an
+                                      existing child, a list [start, stop] of the indexes from start up to stop
+                                      of a run of existing children, or a new node
+
+New nodes are written as a string for a text node, ["#comment", data] for a comment and [tag, attrs, children]
+for an element.  Operations are applied in order, and paths refer to the document as changed by the operations
+before them.
+"""
+
+from __future__ import annotations
+
+import collections
+import typing
+import xml.dom.minidom
+
+from .html5_fingerprint import get_subtree_hashes
+
+
+def to_spec(node: xml.dom.minidom.Node):
+    """
+    Convert a DOM node to the form used for new nodes in a patch
+
+    Args:
+        node: the DOM element, text or comment node
+
+    Returns:
+        The node as a string, or a list
+    """
+    if node.nodeType == node.TEXT_NODE:
+        return node.data
+    if node.nodeType == node.COMMENT_NODE:
+        return ["#comment", node.data]
+    return [node.tagName, dict(node.attributes.items()), [to_spec(child) for child in node.childNodes]]
+
+
+def from_spec(doc: xml.dom.minidom.Document, spec) -> xml.dom.minidom.Node:
+    """
+    Create a DOM node from the form used for new nodes in a patch
+
+    Args:
+        doc: the DOM document which will contain the node
+        spec: the node as a string or a list
+
+    Returns:
+        The DOM node
+    """
+    if isinstance(spec, str):
+        return doc.createTextNode(spec)
+    if spec[0] == "#comment":
+        return doc.createComment(spec[1])
+    (tag, attrs, children) = spec
+    element = doc.createElement(tag)
+    for (name, value) in attrs.items():
+        element.setAttribute(name, value)
+    for child in children:
+        element.appendChild(from_spec(doc, child))
+    return element
+
+
+def diff(old: xml.dom.minidom.Document, new: xml.dom.minidom.Document) -> typing.List[list]:
+    """
+    Compare two DOM documents, for example returned by Html5Parser.parse (to compare documents built with
+    Html5Builder, parse the output of get_html).  Identical subtrees are found by
+    comparing hashes and skipped, and elements with an id attribute are matched by id wherever they have moved
+    among their siblings, so the time taken is proportional to the size of the documents.
+
+    Args:
+        old: the document to compare from
+        new: the document to compare to
+
+    Returns:
+        A patch which transforms old into new (empty if the documents are the same), see apply_patch
+
+    A way you might use me is:
+
+    >>> from htmlfive import Html5Parser
+    >>> from htmlfive.html5_diff import diff
+    >>> old = Html5Parser().parse("<html><body><p id='a'>Hello</p></body></html>")
+    >>> new = Html5Parser().parse("<html><body><p id='a' class='x'>Hello</p></body></html>")
+    >>> diff(old, new)
+    [['attrs', [0, 0], {'class': 'x'}, []]]
+    """
+    old_root = old.documentElement
+    new_root = new.documentElement
+    old_hashes = get_subtree_hashes(old_root)
+    new_hashes = get_subtree_hashes(new_root)
+    patch = []
+    _diff_node(old_root, new_root, [], old_hashes, new_hashes, patch)
+    return patch
+
+
+def _diff_node(old, new, path, old_hashes, new_hashes, patch):
+    if old_hashes[old] == new_hashes[new]:
+        return
+    if old.nodeType != new.nodeType or (old.nodeType == old.ELEMENT_NODE and old.tagName != new.tagName):
+        patch.append(["replace", path, to_spec(new)])
+        return
+    if old.nodeType != old.ELEMENT_NODE:
+        patch.append(["text", path, new.data])
+        return
+
+    old_attrs = dict(old.attributes.items())
+    new_attrs = dict(new.attributes.items())
+    if old_attrs != new_attrs:
+        changed = {name: value for (name, value) in new_attrs.items()
+                   if name not in old_attrs or old_attrs[name] != value}
+        removed = [name for name in old_attrs if name not in new_attrs]
+        patch.append(["attrs", path, changed, removed])
+
+    # match each new child with an old child, by id, then by hash, then by position
+    old_children = old.childNodes
+    new_children = new.childNodes
+    matches = [None] * len(new_children)
+    used = [False] * len(old_children)
+    old_ids = {}
+    old_by_hash = {}
+    for (idx, child) in enumerate(old_children):
+        key = _get_id(child)
+        if key is not None:
+            old_ids[key] = idx
+        old_by_hash.setdefault(old_hashes[child], collections.deque()).append(idx)
+    for (idx, child) in enumerate(new_children):
+        key = _get_id(child)
+        if key is not None and key in old_ids:
+            old_idx = old_ids[key]
+            if not used[old_idx] and old_children[old_idx].tagName == child.tagName:
+                matches[idx] = old_idx
+                used[old_idx] = True
+    for (idx, child) in enumerate(new_children):
+        if matches[idx] is None:
+            candidates = old_by_hash.get(new_hashes[child])
+            while candidates and used[candidates[0]]:
+                candidates.popleft()
+            if candidates:
+                matches[idx] = candidates.popleft()
+                used[matches[idx]] = True
+    for (idx, child) in enumerate(new_children):
+        if matches[idx] is None and idx < len(old_children) and not used[idx] \
+                and _get_id(old_children[idx]) is None and _get_id(child) is None:
+            matches[idx] = idx
+            used[idx] = True
+
+    if matches != list(range(len(old_children))):
+        patch.append(["children", path, _get_children(matches, new_children)])
+    for (idx, old_idx) in enumerate(matches):
+        if old_idx is not None:
+            _diff_node(old_children[old_idx], new_children[idx], path + [idx], old_hashes, new_hashes, patch)
+
+
+def _get_children(matches, new_children):
+    # describe the new children, with runs of existing children in order as [start, stop]
+    children = []
+    for (idx, old_idx) in enumerate(matches):
+        if old_idx is None:
+            children.append(to_spec(new_children[idx]))
+        elif children and isinstance(children[-1], int) and children[-1] == old_idx - 1:
+            children[-1] = [children[-1], old_idx + 1]
+        elif children and isinstance(children[-1], list) and len(children[-1]) == 2 \
+                and children[-1][1] == old_idx and isinstance(children[-1][0], int):
+            children[-1][1] = old_idx + 1
+        else:
+            children.append(old_idx)
+    return children
+
+
+def _get_id(node):
+    if node.nodeType == node.ELEMENT_NODE:
+        return node.getAttribute("id") or None
+    return None
+
+
+def apply_patch(doc: xml.dom.minidom.Document, patch: typing.List[list]):
+    """
+    Apply a patch returned by diff to a DOM document, changing the document
+
+    Args:
+        doc: the document to change, which should be the same as the old document passed to diff
+        patch: the patch to apply
+    """
+    for operation in patch:
+        (name, path) = operation[0:2]
+        node = doc.documentElement
+        for idx in path:
+            node = node.childNodes[idx]
+        if name == "attrs":
+            for (attr_name, value) in operation[2].items():
+                node.setAttribute(attr_name, value)
+            for attr_name in operation[3]:
+                node.removeAttribute(attr_name)
+        elif name == "text":
+            node.data = operation[2]
+        elif name == "replace":
+            node.parentNode.replaceChild(from_spec(doc, operation[2]), node)
+        elif name == "children":
+            old_children = list(node.childNodes)
+            for child in old_children:
+                node.removeChild(child)
+            for child in operation[2]:
+                if isinstance(child, int):
+                    node.appendChild(old_children[child])
+                elif isinstance(child, list) and isinstance(child[0], int):
+                    for old_child in old_children[child[0]:child[1]]:
+                        node.appendChild(old_child)
+                else:
+                    node.appendChild(from_spec(doc, child))
+        else:
+            raise ValueError("unknown patch operation %s" % name)
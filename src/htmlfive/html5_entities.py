@@ -0,0 +1,115 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Encode and decode the character references (entities) in HTML5 text and attribute values.  These functions
+give the same results as html.escape and html.unescape from the standard library, but return quickly when there
+is nothing to encode or decode, which is the usual case, and look up each character reference in a table
+built once, rather than decoding it every time it appears.
+"""
+
+import re
+import html as htmlutils
+from html.entities import html5 as _named_references
+
+# the same pattern as html.unescape uses to find character references
+_REFERENCE = re.compile(r"&(#[0-9]+;?|#[xX][0-9a-fA-F]+;?|[^\t\n\f <&#;]{1,32};?)")
+
+# the text replacing each reference, starting with the named references which end with a semicolon, and
+# adding other references as they are decoded, up to _MAX_DECODED of them
+_decoded = {"&" + name: value for (name, value) in _named_references.items() if name.endswith(";")}
+_MAX_DECODED = len(_decoded) + 10000
+
+
+def escape(s: str, quote: bool = True) -> str:
+    """
+    Replace the characters &, < and > (and " and ' if quote is true) with character references
+
+    Args:
+        s: the string to escape
+        quote: whether to also escape quotes, as needed in attribute values
+
+    Returns:
+        The escaped string
+
+    A way you might use me is:
+
+    >>> from htmlfive.html5_entities import escape
+    >>> escape('Fish & "Chips"')
+    'Fish &amp; &quot;Chips&quot;'
+    """
+    if "&" in s:
+        s = s.replace("&", "&amp;")
+    if "<" in s:
+        s = s.replace("<", "&lt;")
+    if ">" in s:
+        s = s.replace(">", "&gt;")
+    if quote:
+        if '"' in s:
+            s = s.replace('"', "&quot;")
+        if "'" in s:
+            s = s.replace("'", "&#x27;")
+    return s
+
+
+def _replace_reference(match):
+    reference = match.group()
+    value = _decoded.get(reference)
+    if value is None:
+        # numeric references, and named references without a semicolon, follow the standard library's rules
+        value = htmlutils.unescape(reference)
+        if len(_decoded) < _MAX_DECODED:
+            _decoded[reference] = value
+    return value
+
+
+def unescape(s: str) -> str:
+    """
+    Replace the character references in a string with the characters they refer to
+
+    Args:
+        s: the string to unescape
+
+    Returns:
+        The unescaped string
+
+    A way you might use me is:
+
+    >>> from htmlfive.html5_entities import unescape
+    >>> unescape("Fish &amp; Chips &eacute; &#169;")
+    'Fish & Chips é ©'
+    """
+    if "&" not in s:
+        return s
+    # replace the references written by escape directly, leaving &amp; until last so that (for example)
+    # &amp;lt; becomes &lt;.  The characters these are replaced with cannot form part of another reference.
+    if "&lt;" in s:
+        s = s.replace("&lt;", "<")
+    if "&gt;" in s:
+        s = s.replace("&gt;", ">")
+    if "&quot;" in s:
+        s = s.replace("&quot;", '"')
+    if "&#" in s:
+        s = s.replace("&#x27;", "'").replace("&#39;", "'")
+    if s.count("&") == s.count("&amp;"):
+        return s.replace("&amp;", "&")
+    return _REFERENCE.sub(_replace_reference, s)
@@ -20,10 +20,41 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+from __future__ import annotations
+
 import io
-import html as htmlutils
-import xml.dom.minidom
-from .html5_common import HTML5_DOCTYPE, require_end_tags, void_elements
+import time
+from .html5_common import HTML5_DOCTYPE, raw_text_elements, get_serialisation_table
+from .html5_entities import escape, unescape
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import typing
+    import xml.dom.minidom
+    from .html5_stats import Html5Stats
+
+
+def format_attribute(name: str, value) -> str:
+    """
+    Format an attribute as it should appear within an HTML5 start tag, including the leading space
+
+    Args:
+        name: the attribute name
+        value: the attribute value, or None for an attribute without a value
+
+    Returns:
+        A string containing the formatted attribute
+    """
+    if value is None:
+        return " %s" % name
+    if not isinstance(value, str):
+        value = str(value)
+    if '"' in value:
+        if "'" in value:
+            return ' %s="%s"' % (name, escape(value))
+        # single quote values containing double quote
+        return " %s='%s'" % (name, escape(value, quote=False))
+    return ' %s="%s"' % (name, escape(value, quote=False))
 
 
 class Html5Exporter:
@@ -32,6 +63,7 @@ class Html5Exporter:
 
     Args
         indent_spaces: number of spaces to make up each indent
+        stats: optional object to collect statistics about each export
 
     A way you might use me is:
 
@@ -53,72 +85,99 @@ class Html5Exporter:
     </html>
     """
 
-    def __init__(self, indent_spaces: int = 4):
+    def __init__(self, indent_spaces: int = 4, stats: Html5Stats = None):
         self.indent_spaces = indent_spaces
+        self.stats = stats
 
     def __is_ws(self, txt):
         txt = txt.replace(" ", "").replace("\t", "").replace("\n", "")
         return txt == ""
 
-    def __exportElement(self, ele, indent):
-        self.of.write(indent * " " * self.indent_spaces)
-        self.of.write("<" + ele.tagName)
-        attr_count = 0
-        for (k, v) in ele.attributes.items():
+    def __write_start_tag(self, tag, attrs, indent):
+        # write the start tag, without the closing >
+        self.of.write(self.__table.get_indent(indent))
+        self.of.write(self.__table.get_tag(tag)[0])
+        for (k, v) in attrs:
+            self.of.write(format_attribute(k, v))
 
-            if v is None:
-                self.of.write(" %s" % k)
-            else:
-                if not isinstance(v, str):
-                    v = str(v)
-                if '"' in v:
-                    if "'" in v:
-                        self.of.write(' %s="%s"' % (k, htmlutils.escape(v)))
-                    else:
-                        self.of.write(" %s='%s'" % (
-                            k, htmlutils.escape(v, quote=False)))  # single quote values containing double quote
-                else:
-                    self.of.write(' %s="%s"' % (k, htmlutils.escape(v, quote=False)))
-            attr_count += 1
-        child_count = len(ele.childNodes)
-
-        if ele.tagName in require_end_tags or child_count > 0:
-            self.of.write(">")
-            if child_count:
-                self.of.write("\n")
-                for childNode in ele.childNodes:
-                    if childNode.nodeType == childNode.ELEMENT_NODE:
-                        self.__exportElement(childNode, indent + 1)
-                    elif childNode.nodeType == childNode.TEXT_NODE:
-                        self.__exportText(childNode, indent + 1)
-                    elif childNode.nodeType == childNode.COMMENT_NODE:
-                        self.__exportComment(childNode, indent + 1)
-                self.of.write(" " * indent * self.indent_spaces + "</%s>" % ele.tagName)
-            else:
-                self.of.write("</%s>" % ele.tagName)
+    def __write_empty_end(self, tag):
+        # close the start tag of an element without children
+        self.of.write(self.__table.get_tag(tag)[2])
+
+    def __write_end_tag(self, tag, indent):
+        self.of.write(self.__table.get_indent(indent))
+        self.of.write(self.__table.get_tag(tag)[1])
+
+    def __exportElement(self, ele, indent):
+        # the strings from the table are written separately rather than concatenated, so that no new strings
+        # are created for them
+        table = self.__table
+        write = self.of.write
+        tag = ele.tagName
+        (start_tag, end_tag, empty_end) = table.get_tag(tag)
+        pad = table.get_indent(indent)
+        write(pad)
+        write(start_tag)
+        if ele.hasAttributes():
+            for (k, v) in ele.attributes.items():
+                write(format_attribute(k, v))
+        if ele.childNodes:
+            write(">\n")
+            raw = tag in raw_text_elements
+            for childNode in ele.childNodes:
+                if childNode.nodeType == childNode.ELEMENT_NODE:
+                    self.__exportElement(childNode, indent + 1)
+                elif childNode.nodeType == childNode.TEXT_NODE:
+                    self.__write_text(childNode.data, indent + 1, raw)
+                elif childNode.nodeType == childNode.COMMENT_NODE:
+                    self.__exportComment(childNode, indent + 1)
+            write(pad)
+            write(end_tag)
         else:
-            if ele.tagName not in void_elements:
-                self.of.write("/>")
-            else:
-                self.of.write(">")
-        self.of.write("\n")
+            write(empty_end)
 
     def __exportText(self, tn, indent):
-        txt = tn.data.rstrip(" \n").lstrip(" \n")
+        parent = tn.parentNode
+        raw = parent is not None and parent.nodeType == parent.ELEMENT_NODE and parent.tagName in raw_text_elements
+        self.__write_text(tn.data, indent, raw)
+
+    def __write_text(self, data, indent, raw):
+        # text is escaped, except within elements such as script whose text is written as it is
+        txt = data.rstrip(" \n").lstrip(" \n")
         if not self.__is_ws(txt):
-            self.of.write(" " * indent * self.indent_spaces)
-            # self.of.write(htmlutils.escape(txt))
-            self.of.write(txt)
+            self.of.write(self.__table.get_indent(indent))
+            self.of.write(txt if raw else escape(txt, quote=False))
             self.of.write("\n")
 
     def __exportComment(self, cn, indent):
-        txt = cn.data.rstrip(" \n").lstrip(" \n")
-        self.of.write(" " * indent * self.indent_spaces)
+        self.__write_comment(cn.data, indent)
+
+    def __write_comment(self, data, indent):
+        txt = data.rstrip(" \n").lstrip(" \n")
+        self.of.write(self.__table.get_indent(indent))
         self.of.write("<!--")
         self.of.write(txt)
         self.of.write("-->")
         self.of.write("\n")
 
+    def write_node(self, of: typing.TextIO, node: xml.dom.minidom.Node, indent: int = 0):
+        """
+        Write a DOM element, text or comment node as HTML to a writer.
+
+        Args:
+            of: the writer to receive the HTML
+            node: the DOM node to write
+            indent: the indent level at which to write the node
+        """
+        self.of = of
+        self.__table = get_serialisation_table(self.indent_spaces)
+        if node.nodeType == node.ELEMENT_NODE:
+            self.__exportElement(node, indent)
+        elif node.nodeType == node.TEXT_NODE:
+            self.__exportText(node, indent)
+        elif node.nodeType == node.COMMENT_NODE:
+            self.__exportComment(node, indent)
+
     def export(self, doc: xml.dom.minidom.Document) -> str:
         """
         Export a DOM to an HTML string.
@@ -129,6 +188,82 @@ class Html5Exporter:
         Returns:
             A string containing the HTML
         """
+        if self.stats is not None:
+            start = time.perf_counter()
+            html = self.__export(doc)
+            self.stats.add_timing("exporter.export", time.perf_counter() - start)
+            self.stats.increment("exporter.documents")
+            self.stats.increment("exporter.output_chars", len(html))
+            self.stats.count_nodes("exporter", doc.documentElement)
+            self.stats.report("export")
+            return html
+        return self.__export(doc)
+
+    def export_tokens(self, tokens: typing.Iterable[typing.Tuple[typing.Optional[str], typing.Any]]) -> str:
+        """
+        Export a stream of tokens from Html5Parser.tokenize to an HTML string, without building a DOM.
+        The result is the same as exporting the DOM that Html5Parser.parse would build from the tokens.
+
+        Args:
+            tokens: the tokens to export
+
+        Returns:
+            A string containing the HTML, or None if the tokens ended unexpectedly
+        """
+        self.__table = get_serialisation_table(self.indent_spaces)
+        with io.StringIO() as self.of:
+            self.of.write(HTML5_DOCTYPE + "\n")
+            if not self.__export_tokens(tokens):
+                return None
+            return self.of.getvalue()
+
+    def __export_tokens(self, tokens):
+        of = self.of
+        stack = []  # elements whose start tags have been written
+        pending = None  # an element whose start tag is not yet closed, because it may have no children
+        started = False
+        for (tag, content) in tokens:
+            if tag is not None and content is None:
+                if pending is not None:
+                    self.__write_empty_end(pending)
+                    pending = None
+                elif stack:
+                    tag = stack.pop()
+                    self.__write_end_tag(tag, len(stack))
+                continue
+            if tag is None:
+                if content is None:
+                    return False
+                if not content.replace(" ", "").replace("\n", "").replace("\t", ""):
+                    continue  # the parser does not keep whitespace text
+            if pending is not None:
+                of.write(">\n")
+                stack.append(pending)
+                pending = None
+            if tag is None:
+                if stack and stack[-1] in raw_text_elements:
+                    self.__write_text(content, len(stack), True)
+                else:
+                    self.__write_text(unescape(content), len(stack), False)
+            elif not started:
+                # the parser does not keep the attributes of the document element
+                self.__write_start_tag(tag, (), len(stack))
+                pending = tag
+                started = True
+            elif tag == "__comment__":
+                self.__write_comment(content, len(stack))
+            else:
+                self.__write_start_tag(tag, content.items(), len(stack))
+                pending = tag
+        if pending is not None:
+            self.__write_empty_end(pending)
+        while stack:
+            tag = stack.pop()
+            self.__write_end_tag(tag, len(stack))
+        return True
+
+    def __export(self, doc):
+        self.__table = get_serialisation_table(self.indent_spaces)
         with io.StringIO() as self.of:
             self.of.write(HTML5_DOCTYPE + "\n")
             ele = doc.documentElement
@@ -0,0 +1,175 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Compute content hashes of DOM documents, for example to find duplicate pages or to key caches, without
+exporting them to HTML.  The hash is computed over a canonical form of the document, so documents which differ
+only in the order of attributes, in runs of whitespace in text, or (by default) in comments have the same hash.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import typing
+import xml.dom.minidom
+
+from .html5_common import raw_text_elements
+
+# runs of HTML whitespace (which unlike str.split does not include non-breaking spaces) other than a single
+# space, which are all that need replacing
+_WHITESPACE = re.compile("[ \t\n\r\f]{2,}|[\t\n\r\f]")
+
+# number of canonical strings collected before they are passed to the hash
+_BATCH_SIZE = 1024
+
+
+def fingerprint(node: xml.dom.minidom.Node, subtree_hashes: typing.Dict[xml.dom.minidom.Node, bytes] = None,
+                include_comments: bool = False, digest_size: int = 16) -> bytes:
+    """
+    Compute a hash of a DOM document or element, for example returned by Html5Parser.parse (to hash documents
+    built with Html5Builder, parse the output of get_html).  The canonical form of the tree is passed to the hash
+    in batches during a single traversal, so its memory use does not grow with the size of the document.
+
+    In the canonical form, attributes are sorted by name, leading and trailing whitespace is removed from text and
+    runs of whitespace within it are replaced with a single space (except in script and style elements), and text
+    which is then empty is ignored.
+
+    Args:
+        node: the DOM document or element
+        subtree_hashes: optional dictionary, which is updated in the same traversal with the hashes returned by
+                        get_subtree_hashes(node, normalise=True, include_comments=include_comments), so that
+                        identical elements can be found in one or more documents.  These are computed from the
+                        hashes of child nodes, so they can be compared with each other but not with the hash
+                        returned.
+        include_comments: whether comments are included in the hashes
+        digest_size: the size of the hashes in bytes, between 1 and 64
+
+    Returns:
+        The hash of the document or element
+
+    A way you might use me is:
+
+    >>> from htmlfive import Html5Parser
+    >>> from htmlfive.html5_fingerprint import fingerprint
+    >>> doc1 = Html5Parser().parse("<html><body><p class='a' id='b'>Hello   World</p></body></html>")
+    >>> doc2 = Html5Parser().parse('<html><body>\\n  <p id="b" class="a">Hello World</p>\\n</body></html>')
+    >>> fingerprint(doc1) == fingerprint(doc2)
+    True
+    """
+    if node.nodeType == node.DOCUMENT_NODE:
+        node = node.documentElement
+    h = hashlib.blake2b(digest_size=digest_size)
+    _hash_tree(node, True, include_comments, digest_size, h, subtree_hashes)
+    return h.digest()
+
+
+def get_subtree_hashes(node: xml.dom.minidom.Node, normalise: bool = False, include_comments: bool = True,
+                       digest_size: int = 16) -> typing.Dict[xml.dom.minidom.Node, bytes]:
+    """
+    Compute a hash of each node below and including a DOM node, from its tag, attributes and content.  These
+    hashes are used by htmlfive.html5_diff.diff to find identical subtrees, and by fingerprint.  Hashes computed
+    with different options cannot be compared.
+
+    Args:
+        node: the DOM document or node
+        normalise: if True, normalise whitespace in text and ignore text which is only whitespace, as fingerprint
+                   does, otherwise hash text exactly
+        include_comments: whether comments are included in the hashes
+        digest_size: the size of the hashes in bytes, between 1 and 64
+
+    Returns:
+        A dictionary mapping each node to its hash
+    """
+    hashes = {}
+    _hash_tree(node, normalise, include_comments, digest_size, None, hashes)
+    return hashes
+
+
+def _hash_tree(node, normalise, include_comments, digest_size, stream, subtree_hashes):
+    # in a single traversal, pass the canonical form of the tree to the stream hash (if any) and add the hash of
+    # each node, computed from its own canonical form and the hashes of its children, to subtree_hashes (if any)
+    batch = []
+    # for each open element, the element and a list of its canonical start tag and the hashes of its children
+    open_parts = []
+    # visit each node, then None after the children of each element, without recursion
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node is None:
+            # the end of an element
+            if stream is not None:
+                batch.append("/")
+            if subtree_hashes is not None:
+                (element, parts) = open_parts.pop()
+                parts.append(b"/")
+                digest = hashlib.blake2b(b"".join(parts), digest_size=digest_size).digest()
+                subtree_hashes[element] = digest
+                if open_parts:
+                    open_parts[-1][1].append(digest)
+            continue
+        node_type = node.nodeType
+        if node_type == node.TEXT_NODE:
+            text = node.data
+            if normalise:
+                if node.parentNode is not None and node.parentNode.tagName in raw_text_elements:
+                    text = text.strip(" \t\n\r\f")
+                else:
+                    # searching for each kind of whitespace is much faster than running the regular expression
+                    if "  " in text or "\n" in text or "\t" in text or "\r" in text or "\f" in text:
+                        text = _WHITESPACE.sub(" ", text)
+                    text = text.strip(" ")
+                if not text:
+                    continue
+            canonical = "T%d:%s" % (len(text), text)
+        elif node_type == node.COMMENT_NODE:
+            if not include_comments:
+                continue
+            canonical = "C%d:%s" % (len(node.data), node.data)
+        elif node_type == node.ELEMENT_NODE or node_type == node.DOCUMENT_NODE:
+            if node_type == node.DOCUMENT_NODE:
+                canonical = "<#document>"
+            elif node.hasAttributes():
+                attrs = []
+                for (name, value) in sorted(node.attributes.items()):
+                    attrs.append(" " + name if value is None else " %s=%d:%s" % (name, len(value), value))
+                canonical = "<%s%s>" % (node.tagName, "".join(attrs))
+            else:
+                canonical = "<%s>" % node.tagName
+            if subtree_hashes is not None:
+                open_parts.append((node, [canonical.encode("utf-8")]))
+            stack.append(None)
+            stack.extend(reversed(node.childNodes))
+        else:
+            continue
+        if subtree_hashes is not None and node_type != node.ELEMENT_NODE and node_type != node.DOCUMENT_NODE:
+            digest = hashlib.blake2b(canonical.encode("utf-8"), digest_size=digest_size).digest()
+            subtree_hashes[node] = digest
+            if open_parts:
+                open_parts[-1][1].append(digest)
+        if stream is not None:
+            batch.append(canonical)
+            if len(batch) >= _BATCH_SIZE:
+                stream.update("".join(batch).encode("utf-8"))
+                batch.clear()
+    if stream is not None:
+        stream.update("".join(batch).encode("utf-8"))
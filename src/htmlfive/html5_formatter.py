@@ -20,10 +20,17 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import xml.dom.minidom
-from typing import Union
+from __future__ import annotations
+
+import time
 from .html5_common import void_elements, require_end_tags
 
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import xml.dom.minidom
+    from typing import Union
+    from .html5_stats import Html5Stats
+
 
 class Html5Formatter:
     """
@@ -36,6 +43,7 @@ class Html5Formatter:
         attribute_name_style: CSS to apply to attribute names
         attribute_value_style: CSS to apply to attribute values
         comment_style: CSS to apply to comments
+        stats: optional object to collect statistics about each format
     Returns:
         A string containing the formatted HTML
 
@@ -63,13 +71,14 @@ class Html5Formatter:
 
     def __init__(self, indent_spaces: int = 4, line_limit: int = 40, tag_style: str = "color:red;",
                  attribute_name_style: str = "color:blue;", attribute_value_style: str = "color:purple;",
-                 comment_style: str = "color:gray;"):
+                 comment_style: str = "color:gray;", stats: Html5Stats = None):
         self.indent_spaces = indent_spaces
         self.line_limit = line_limit
         self.tag_style = tag_style
         self.attribute_name_style = attribute_name_style
         self.attribute_value_style = attribute_value_style
         self.comment_style = comment_style
+        self.stats = stats
 
     def format(self, doc_or_element: Union[xml.dom.minidom.Element, xml.dom.minidom.Document]) -> str:
         """
@@ -81,7 +90,19 @@ class Html5Formatter:
         Returns:
             A string containing the formatted HTML
         """
-        if isinstance(doc_or_element, xml.dom.minidom.Document):
+        if self.stats is not None:
+            start = time.perf_counter()
+            html = self.__format(doc_or_element)
+            self.stats.add_timing("formatter.format", time.perf_counter() - start)
+            self.stats.increment("formatter.documents")
+            self.stats.increment("formatter.output_chars", len(html))
+            self.stats.count_nodes("formatter", doc_or_element)
+            self.stats.report("format")
+            return html
+        return self.__format(doc_or_element)
+
+    def __format(self, doc_or_element):
+        if doc_or_element.nodeType == doc_or_element.DOCUMENT_NODE:
             element = doc_or_element.documentElement
             header = "&lt;!DOCTYPE html&gt;\n"
         else:
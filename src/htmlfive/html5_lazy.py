@@ -0,0 +1,139 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Support for Html5Parser's lazy parse mode, which skips over the content of elements at a chosen depth with a
+fast scan of the HTML source, and parses their content the first time it is accessed.
+"""
+
+from __future__ import annotations
+
+import re
+import typing
+from xml.dom.minidom import Element
+
+from .html5_common import require_end_tags
+
+# the slot of minidom's Element which holds its children, used by LazyElement's childNodes property
+_child_nodes_slot = Element.childNodes
+
+_patterns = {}
+
+
+def _get_pattern(tag):
+    # match comments, start and end tags for tag, and start tags of elements such as script and pre whose
+    # content Html5Parser reads as text up to their end tag
+    pattern = _patterns.get(tag)
+    if pattern is None:
+        others = "|".join(re.escape(other) for other in sorted(require_end_tags) if other != tag)
+        pattern = re.compile(r"<!--|<(/?)%s(?=[\s/>])|<(%s)(?=[\s/>])" % (re.escape(tag), others))
+        if len(_patterns) < 1024:
+            _patterns[tag] = pattern
+    return pattern
+
+
+def find_element_end(content: str, tag: str, pos: int) -> typing.Optional[typing.Tuple[int, int]]:
+    """
+    Find the end of an element in HTML source, without tokenizing its content
+
+    Args:
+        content: the HTML source
+        tag: the tag name of the element
+        pos: the position in content just after the element's start tag
+
+    Returns:
+        A tuple holding the position of the element's end tag and the position just after it, or None if the
+        content ends before the element does
+    """
+    if tag in require_end_tags:
+        # elements which end at the first end tag, as in Html5Parser
+        end = content.find("</" + tag, pos)
+        close = content.find(">", end) if end != -1 else -1
+        return None if close == -1 else (end, close + 1)
+    pattern = _get_pattern(tag)
+    depth = 1
+    while True:
+        match = pattern.search(content, pos)
+        if match is None:
+            return None
+        if match.group() == "<!--":
+            end = content.find("-->", match.end())
+            if end == -1:
+                return None
+            pos = end + 3
+            continue
+        close = content.find(">", match.end())
+        if close == -1:
+            return None
+        pos = close + 1
+        other = match.group(2)
+        if other is not None:
+            # skip over the text content of the other element
+            if content[close - 1] != "/":
+                pos = content.find("</" + other, pos)
+                if pos == -1:
+                    return None
+        elif match.group(1):
+            depth -= 1
+            if depth == 0:
+                return (match.start(), pos)
+        elif content[close - 1] != "/":
+            depth += 1
+
+
+class LazyElement(Element):
+    """
+    A DOM element returned by Html5Parser in lazy parse mode, whose children are parsed from the HTML source the
+    first time they are accessed (through childNodes, or anything which uses it, such as firstChild or
+    getElementsByTagName)
+
+    Args:
+        tag_name: the tag name of the element
+        loader: a function which is passed this element and appends its children
+    """
+
+    __slots__ = ("_loader",)
+
+    def __init__(self, tag_name: str, loader: typing.Callable[["LazyElement"], None]):
+        self._loader = None
+        super().__init__(tag_name)
+        self._loader = loader
+
+    @property
+    def childNodes(self):
+        if self._loader is not None:
+            (loader, self._loader) = (self._loader, None)
+            loader(self)
+        return _child_nodes_slot.__get__(self, LazyElement)
+
+    @childNodes.setter
+    def childNodes(self, value):
+        _child_nodes_slot.__set__(self, value)
+
+    def is_loaded(self) -> bool:
+        """
+        Check whether the children of this element have been parsed
+
+        Returns:
+            True if the children have been parsed
+        """
+        return self._loader is None
@@ -0,0 +1,130 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import re
+
+from .html5_parser import Html5Parser
+from .html5_exporter import Html5Exporter, format_attribute
+from .html5_common import HTML5_DOCTYPE, raw_text_elements, void_elements, get_serialisation_table
+from .html5_entities import escape, unescape
+
+_whitespace = re.compile("[ \t\n\r\f]+")
+
+
+def normalise(html: str, indent_spaces: int = 4) -> str:
+    """
+    Normalise HTML5 content, by parsing and exporting it.  The parser's tokens are exported directly, without
+    building a DOM, so this is faster and uses less memory than exporting the document returned by parsing.
+
+    Args:
+        html: A string containing the HTML to normalise
+        indent_spaces: number of spaces to make up each indent
+
+    Returns:
+        A string containing the normalised HTML, or None if the HTML could not be parsed
+
+    A way you might use me is:
+
+    >>> from htmlfive import normalise
+    >>> print(normalise("<!DOCTYPE html><html><body>Hello World</body></html>"))
+    <!DOCTYPE html>
+    <html>
+        <body>
+            Hello World
+        </body>
+    </html>
+    """
+    return Html5Exporter(indent_spaces).export_tokens(Html5Parser().tokenize(html))
+
+
+def minify(html: str) -> str:
+    """
+    Minify HTML5 content, by parsing it and writing it out again without indentation or newlines between tags.
+    Whitespace within and around text is collapsed to a single space, so that words are not run together, except
+    within pre and textarea elements.  Elements without children are closed with an end tag rather than "/>",
+    which the parser would not read back as the same element.
+
+    Args:
+        html: A string containing the HTML to minify
+
+    Returns:
+        A string containing the minified HTML, or None if the HTML could not be parsed
+
+    A way you might use me is:
+
+    >>> from htmlfive import minify
+    >>> print(minify("<!DOCTYPE html><html><body>\\n  <p>Hello <b>World</b></p>\\n</body></html>"))
+    <!DOCTYPE html><html><body><p>Hello <b>World</b></p></body></html>
+    """
+    table = get_serialisation_table(0)
+    parts = [HTML5_DOCTYPE]
+    write = parts.append
+    stack = []  # elements whose start tags have been written
+    pending = None  # an element whose start tag is not yet closed, because it may have no children
+    started = False
+    for (tag, content) in Html5Parser().tokenize(html):
+        if tag is not None and content is None:
+            if pending is not None:
+                write(">" if pending in void_elements else "></%s>" % pending)
+                pending = None
+            elif stack:
+                write(table.get_tag(stack.pop())[1][:-1])
+            continue
+        if tag is None:
+            if content is None:
+                return None
+            txt = content.strip(" \n\t")
+            if not txt:
+                continue  # the parser does not keep whitespace text
+        if pending is not None:
+            write(">")
+            stack.append(pending)
+            pending = None
+        if tag is None:
+            if stack and stack[-1] in raw_text_elements:
+                write(txt)
+            elif "pre" in stack or "textarea" in stack:
+                write(escape(unescape(content), quote=False))
+            else:
+                if content[0] in " \n\t":
+                    write(" ")
+                write(escape(unescape(_whitespace.sub(" ", txt)), quote=False))
+                if content[-1] in " \n\t":
+                    write(" ")
+        elif tag == "__comment__":
+            write("<!--")
+            write(content.strip(" \n"))
+            write("-->")
+        else:
+            write(table.get_tag(tag)[0])
+            if started:
+                for (k, v) in content.items():
+                    write(format_attribute(k, v))
+            else:
+                # the parser does not keep the attributes of the document element
+                started = True
+            pending = tag
+    if pending is not None:
+        write(">" if pending in void_elements else "></%s>" % pending)
+    while stack:
+        write(table.get_tag(stack.pop())[1][:-1])
+    return "".join(parts)
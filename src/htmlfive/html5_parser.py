@@ -19,16 +19,33 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-import xml.dom.minidom
-from xml.dom.minidom import getDOMImplementation
-from .html5_common import HTML5_DOCTYPE, require_end_tags, void_elements
-import html as htmlutils
+from __future__ import annotations
+
+import time
+from .html5_common import HTML5_DOCTYPE, Html5LimitExceeded, raw_text_elements, require_end_tags, void_elements
+from .html5_entities import unescape
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import typing
+    import xml.dom.minidom
+    from .html5_stats import Html5Stats
 
 
 class Html5Parser:
     """
     Initialise an HTML parser
 
+    Args:
+        stats: optional object to collect statistics about each parse
+        max_bytes: optional limit on the length of the HTML content
+        max_depth: optional limit on the nesting depth of elements
+        max_nodes: optional limit on the number of elements, text and comments
+        max_attributes: optional limit on the number of attributes of each element
+        max_text_size: optional limit on the length of each text or comment
+
+    Parsing or tokenizing raises Html5LimitExceeded as soon as a limit is exceeded.
+
     A way you might use me is:
 
     >>> from htmlfive import Html5Parser
@@ -43,19 +60,23 @@ class Html5Parser:
     </html>
     """
 
-    def __init__(self):
+    def __init__(self, stats: Html5Stats = None, max_bytes: int = None, max_depth: int = None,
+                 max_nodes: int = None, max_attributes: int = None, max_text_size: int = None):
         self.pos = 0
         self.current_tag = None
         self.tag_stack = []
+        self.stats = stats
+        self.max_bytes = max_bytes
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.max_attributes = max_attributes
+        self.max_text_size = max_text_size
+        self.__unescape = unescape
 
     def __skip_doctype(self):
         if self.content[0:10] == "<!DOCTYPE ":
-            self.pos = 10
-            while self.content[self.pos] == " ":
-                self.pos += 1
-            while self.content[self.pos] != ">":
-                self.pos += 1
-            self.pos += 1
+            end = self.content.find(">", 10)
+            self.pos = len(self.content) if end == -1 else end + 1
 
     def __parse_attrs(self, s):
         attrs = {}
@@ -76,7 +97,7 @@ class Html5Parser:
                         attr_value += c
                     else:
                         break
-                attrs[attr_name] = htmlutils.unescape(attr_value)
+                attrs[attr_name] = self.__unescape(attr_value)
                 attr_name = ""
             else:
                 if attr_name:
@@ -95,42 +116,72 @@ class Html5Parser:
         return attrs
 
     def __pop_tag_stack(self):
-        self.tag_stack = self.tag_stack[:-1]
+        if self.tag_stack:
+            self.tag_stack.pop()
         self.current_tag = self.tag_stack[-1] if self.tag_stack else None
 
     def __push_tag_stack(self, tag):
+        if self.max_depth is not None and len(self.tag_stack) >= self.max_depth:
+            raise Html5LimitExceeded("max_depth", self.max_depth)
         self.tag_stack.append(tag)
         self.current_tag = tag
 
     def __get_tokens(self):
-        while self.pos < len(self.content):
-            token = ''
+        content = self.content
+        content_length = len(content)
+        max_nodes = self.max_nodes
+        max_attributes = self.max_attributes
+        max_text_size = self.max_text_size
+        node_count = 0
+        while self.pos < content_length:
             # rather crudely intercept XML comments and yield contents with tag=__comment__
-            if self.content[self.pos:self.pos+4] == "<!--":
-                self.pos += 4
-                comment_start = self.pos
-                while self.content[self.pos:self.pos+3] != "-->":
-                    self.pos += 1
-                comment_end = self.pos
-                self.pos += 3
-                yield ("__comment__", self.content[comment_start:comment_end])
-            if self.content[self.pos] == "<":
-                quoted = False
-                while self.content[self.pos] != ">" or quoted:
-                    c = self.content[self.pos]
-                    if c == '"':
-                        quoted = not quoted
-                    token += c
-                    self.pos += 1
-                    if self.pos >= len(self.content):
+            if content.startswith("<!--", self.pos):
+                comment_start = self.pos + 4
+                comment_end = content.find("-->", comment_start)
+                if comment_end == -1:
+                    yield (None, None)
+                    return
+                if max_text_size is not None and comment_end - comment_start > max_text_size:
+                    raise Html5LimitExceeded("max_text_size", max_text_size)
+                self.pos = comment_end + 3
+                node_count += 1
+                if max_nodes is not None and node_count > max_nodes:
+                    raise Html5LimitExceeded("max_nodes", max_nodes)
+                yield ("__comment__", content[comment_start:comment_end])
+            elif content[self.pos] == "<":
+                # find the closing >, skipping over any > within double quotes.  Each search starts where the
+                # last one ended, so that the time taken grows linearly with the length of the tag.
+                end = self.pos
+                close = content.find(">", end)
+                quoted_values = 0
+                while True:
+                    if close == -1:
                         yield (None, None)
-                token += ">"
-                self.pos += 1
+                        return
+                    quote = content.find('"', end, close)
+                    if quote == -1:
+                        break
+                    end = content.find('"', quote + 1)
+                    if end == -1:
+                        yield (None, None)
+                        return
+                    end += 1
+                    quoted_values += 1
+                    if max_attributes is not None and quoted_values > max_attributes:
+                        # each quoted value belongs to an attribute, so stop before scanning the rest of the tag
+                        raise Html5LimitExceeded("max_attributes", max_attributes)
+                    if end > close:
+                        close = content.find(">", end)
+                token = content[self.pos:close + 1]
+                self.pos = close + 1
                 if token.startswith("</"):
                     info = (self.current_tag, None)
                     self.__pop_tag_stack()
                     yield info
                 else:
+                    node_count += 1
+                    if max_nodes is not None and node_count > max_nodes:
+                        raise Html5LimitExceeded("max_nodes", max_nodes)
                     attrs = {}
                     if " " in token:
                         attrs_str = token[token.find(" "):]
@@ -139,6 +190,8 @@ class Html5Parser:
                         elif attrs_str.endswith(">"):
                             attrs_str = attrs_str[:-1]
                         attrs = self.__parse_attrs(attrs_str)
+                        if max_attributes is not None and len(attrs) > max_attributes:
+                            raise Html5LimitExceeded("max_attributes", max_attributes)
                         tag = token[1:token.find(" ")]
                     else:
                         tag = token[1:]
@@ -151,25 +204,44 @@ class Html5Parser:
                     if token.endswith("/>") or tag in void_elements:
                         yield (tag, None)
             else:
-                while self.content[self.pos] != "<" or \
-                        (self.current_tag and self.current_tag in require_end_tags \
-                         and not self.content[self.pos:].startswith("</" + self.current_tag)):
-                    token += self.content[self.pos]
-                    self.pos += 1
-                    if self.pos >= len(self.content):
-                        yield (None, None)
+                if self.current_tag and self.current_tag in require_end_tags:
+                    end = content.find("</" + self.current_tag, self.pos)
+                else:
+                    end = content.find("<", self.pos)
+                if end == -1:
+                    yield (None, None)
+                    return
+                if max_text_size is not None and end - self.pos > max_text_size:
+                    raise Html5LimitExceeded("max_text_size", max_text_size)
+                token = content[self.pos:end]
+                self.pos = end
+                node_count += 1
+                if max_nodes is not None and node_count > max_nodes:
+                    raise Html5LimitExceeded("max_nodes", max_nodes)
                 yield (None, token)
 
-    def parse(self, html: str) -> xml.dom.minidom.Document:
+    def tokenize(self, html: str) -> typing.Iterator[typing.Tuple[typing.Optional[str], typing.Any]]:
         """
-        Parse the HTML content.  The HTML must be valid otherwise the behaviour is undefined.
+        Split HTML content into tokens, without building a DOM.  The HTML must be valid otherwise the
+        behaviour is undefined.
 
         Args:
-            html: A string containing the HTML to parse
+            html: A string containing the HTML to tokenize
+
+        Raises:
+            Html5LimitExceeded: if the content exceeds a limit passed to the constructor
 
         Returns:
-            Document object representing the HTML document
+            An iterator over tokens, which are tuples of the form:
+
+            (tag, attrs): the start of an element, with a dictionary mapping attribute names to unescaped values
+            (tag, None): the end of the most recently started element
+            (None, text): text, which has not been unescaped
+            ("__comment__", text): a comment
+            (None, None): the content ended unexpectedly
         """
+        if self.max_bytes is not None and len(html) > self.max_bytes:
+            raise Html5LimitExceeded("max_bytes", self.max_bytes)
         self.content = html.strip(" \t\n")
 
         self.pos = 0
@@ -177,11 +249,84 @@ class Html5Parser:
         self.tag_stack = []
 
         self.__skip_doctype()
+        return self.__get_tokens()
+
+    def parse(self, html: str, lazy_depth: int = None) -> xml.dom.minidom.Document:
+        """
+        Parse the HTML content.  The HTML must be valid otherwise the behaviour is undefined.
 
+        Args:
+            html: A string containing the HTML to parse
+            lazy_depth: optional depth (1 or more) at which to parse lazily.  Elements at this depth (head and
+                        body are at depth 1, and the sections of the body at depth 2) are returned as
+                        htmlfive.html5_lazy.LazyElement, whose content is skipped over by a fast scan and parsed
+                        the first time its children are accessed, raising ValueError if the content is not valid.
+                        Limits apply separately to each part parsed.
+
+        Raises:
+            Html5LimitExceeded: if the content exceeds a limit passed to the constructor
+
+        Returns:
+            Document object representing the HTML document, or None if the content ended unexpectedly
+
+        A way you might use me is:
+
+        >>> from htmlfive import Html5Parser
+        >>> doc = Html5Parser().parse(html, lazy_depth=2)  # parses only the head, body and their children
+        >>> body = doc.documentElement.lastChild
+        >>> section = [child for child in body.childNodes if child.getAttribute("id") == "results"][0]
+        >>> rows = section.getElementsByTagName("tr")  # parses the content of this section only
+        """
+        if self.stats is not None:
+            return self.__parse_with_stats(html, lazy_depth)
+        return self.__parse(self.tokenize(html), lazy_depth)
+
+    def __parse_with_stats(self, html, lazy_depth):
+        # parse, timing the tokenizer and unescaping separately from building the DOM
+        stats = self.stats
+        self.__tokenize_time = self.__unescape_time = 0
+        self.__token_count = 0
+        start = time.perf_counter()
+        self.__unescape = self.__timed_unescape
+        try:
+            dom = self.__parse(self.__timed_tokens(self.tokenize(html)), lazy_depth)
+        finally:
+            self.__unescape = unescape
+        elapsed = time.perf_counter() - start
+        stats.add_timing("parser.parse", elapsed)
+        stats.add_timing("parser.tokenize", self.__tokenize_time)
+        stats.add_timing("parser.unescape", self.__unescape_time)
+        stats.add_timing("parser.dom", elapsed - self.__tokenize_time - self.__unescape_time)
+        stats.increment("parser.documents")
+        stats.increment("parser.input_chars", len(html))
+        stats.increment("parser.tokens", self.__token_count)
+        if dom is not None and lazy_depth is None:
+            stats.count_nodes("parser", dom.documentElement)
+        stats.report("parse")
+        return dom
+
+    def __timed_unescape(self, s):
+        start = time.perf_counter()
+        s = unescape(s)
+        self.__unescape_time += time.perf_counter() - start
+        return s
+
+    def __timed_tokens(self, tokens):
+        while True:
+            start = time.perf_counter()
+            unescape_time = self.__unescape_time
+            token = next(tokens, None)
+            self.__tokenize_time += time.perf_counter() - start - (self.__unescape_time - unescape_time)
+            if token is None:
+                return
+            self.__token_count += 1
+            yield token
+
+    def __parse(self, tokens, lazy_depth=None, dom=None, current_element=None):
+        # build a DOM from tokens, or if dom is given, add the tokens to current_element
+        from xml.dom.minidom import getDOMImplementation
         impl = getDOMImplementation()
-        dom = None
-        current_element = None
-        for (tag, content) in self.__get_tokens():
+        for (tag, content) in tokens:
             if tag is not None and content is not None:
                 if dom is None:
                     dom = impl.createDocument(None, tag, None)
@@ -190,6 +335,15 @@ class Html5Parser:
                     if tag == "__comment__":
                         comment = dom.createComment(content)
                         current_element.appendChild(comment)
+                    elif lazy_depth is not None and len(self.tag_stack) == lazy_depth + 1 \
+                            and self.tag_stack[-1] == tag:
+                        # the tokenizer has just pushed this element's start tag
+                        child = self.__create_lazy_element(dom, tag)
+                        if child is None:
+                            return None
+                        current_element.appendChild(child)
+                        for (name, value) in content.items():
+                            child.setAttribute(name, value)
                     else:
                         child = dom.createElement(tag)
                         current_element.appendChild(child)
@@ -200,7 +354,39 @@ class Html5Parser:
                 current_element = current_element.parentNode
             elif content is not None:
                 if content.replace(" ", "").replace("\n", "").replace("\t", ""):
-                    current_element.appendChild(dom.createTextNode(htmlutils.unescape(content)))
+                    if current_element.tagName not in raw_text_elements:
+                        content = self.__unescape(content)
+                    current_element.appendChild(dom.createTextNode(content))
             else:
                 return None
         return dom
+
+    def __create_lazy_element(self, dom, tag):
+        # create an element whose content is parsed when it is first accessed, and skip the tokenizer past it
+        from .html5_lazy import LazyElement, find_element_end
+        span = find_element_end(self.content, tag, self.pos)
+        if span is None:
+            return None
+        (start, end) = (self.pos, span[1])
+        content = self.content
+        loader_parser = Html5Parser(max_depth=self.max_depth, max_nodes=self.max_nodes,
+                                    max_attributes=self.max_attributes, max_text_size=self.max_text_size)
+        element = LazyElement(tag, lambda element: loader_parser.__load(element, content, start, end))
+        element.ownerDocument = dom
+        self.pos = span[1]
+        self.__pop_tag_stack()
+        return element
+
+    def __load(self, element, content, start, end):
+        # parse the content and end tag of a LazyElement, in the context of its ancestors
+        tags = []
+        node = element
+        while node is not None and node.nodeType == node.ELEMENT_NODE:
+            tags.append(node.tagName)
+            node = node.parentNode
+        self.content = content[start:end]
+        self.pos = 0
+        self.tag_stack = tags[::-1]
+        self.current_tag = element.tagName
+        if self.__parse(self.__get_tokens(), None, element.ownerDocument, element) is None:
+            raise ValueError("unable to parse the content of element %s" % element.tagName)
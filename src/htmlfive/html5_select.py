@@ -0,0 +1,372 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Find the elements of a DOM document which match a CSS selector.
+
+Supported selectors are: type (div), universal (*), id (#main), class (.results), attribute ([data-id],
+[type=text], [class~=a], [href^=http], [href$=.pdf], [title*=word], [lang|=en]), the pseudo-classes
+:first-child, :last-child and :nth-child(an+b, odd or even), the combinators descendant (space), child (>),
+adjacent sibling (+) and general sibling (~), and groups of selectors separated by commas.
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+import typing
+import xml.dom.minidom
+
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<combinator>[>+~,])
+  | (?P<tag>\*|[A-Za-z][\w-]*)
+  | \#(?P<id>[\w-]+)
+  | \.(?P<cls>[\w-]+)
+  | (?P<attribute>\[\s*(?P<attr>[\w:-]+)\s*
+        (?:(?P<op>[~^$*|]?=)\s*(?:"(?P<dq>[^"]*)"|'(?P<sq>[^']*)'|(?P<uq>[^\]\s]+))\s*)?\])
+  | (?P<pseudoclass>:(?P<pseudo>first-child|last-child|nth-child\(\s*(?P<nth>[^)]*?)\s*\)))
+""", re.VERBOSE)
+
+_NTH_PATTERN = re.compile(r"^(?:(?P<a>[+-]?\d*)n\s*(?:(?P<sign>[+-])\s*(?P<b>\d+))?|(?P<n>[+-]?\d+))$")
+
+
+class Compound:
+    """
+    Represent a compound selector, the simple selectors which must all match one element
+    """
+
+    __slots__ = ("tag", "id", "classes", "attrs", "positions")
+
+    def __init__(self):
+        self.tag = None
+        self.id = None
+        self.classes = ()
+        self.attrs = ()
+        self.positions = ()
+
+    def matches(self, element: xml.dom.minidom.Element) -> bool:
+        if self.tag is not None and element.tagName != self.tag:
+            return False
+        if self.id is not None and element.getAttribute("id") != self.id:
+            return False
+        if self.classes:
+            classes = (element.getAttribute("class") or "").split()
+            for cls in self.classes:
+                if cls not in classes:
+                    return False
+        for (name, op, value) in self.attrs:
+            if not element.hasAttribute(name):
+                return False
+            if op is not None and not _match_attribute(element.getAttribute(name) or "", op, value):
+                return False
+        for (a, b) in self.positions:
+            if not _match_position(element, a, b):
+                return False
+        return True
+
+
+def _match_attribute(actual, op, value):
+    if op == "=":
+        return actual == value
+    if op == "~=":
+        return value in actual.split()
+    if op == "^=":
+        return bool(value) and actual.startswith(value)
+    if op == "$=":
+        return bool(value) and actual.endswith(value)
+    if op == "*=":
+        return bool(value) and value in actual
+    return actual == value or actual.startswith(value + "-")  # |=
+
+
+def _match_position(element, a, b):
+    # a = None means :last-child, otherwise match :nth-child(an+b)
+    if a is None:
+        sibling = element.nextSibling
+        while sibling is not None and sibling.nodeType != sibling.ELEMENT_NODE:
+            sibling = sibling.nextSibling
+        return sibling is None
+    position = 1
+    sibling = element.previousSibling
+    while sibling is not None:
+        if sibling.nodeType == sibling.ELEMENT_NODE:
+            position += 1
+        sibling = sibling.previousSibling
+    if a == 0:
+        return position == b
+    return (position - b) % a == 0 and (position - b) // a >= 0
+
+
+def _parse_nth(expression):
+    expression = expression.replace(" ", "").lower()
+    if expression == "odd":
+        return (2, 1)
+    if expression == "even":
+        return (2, 0)
+    match = _NTH_PATTERN.match(expression)
+    if match is None:
+        raise ValueError("invalid :nth-child expression %s" % expression)
+    if match.group("n") is not None:
+        return (0, int(match.group("n")))
+    a = match.group("a")
+    a = 1 if a in ("", "+") else -1 if a == "-" else int(a)
+    b = int(match.group("b") or 0) * (-1 if match.group("sign") == "-" else 1)
+    return (a, b)
+
+
+class Selector:
+    """
+    Represent a compiled CSS selector.  Create using compile_selector.
+
+    Args:
+        alternatives: a list of complex selectors, each a list of (combinator, Compound) pairs, where the
+                      combinator of the first pair is None
+    """
+
+    def __init__(self, alternatives: typing.List[typing.List[typing.Tuple[str, Compound]]]):
+        self.alternatives = alternatives
+
+    def matches(self, element: xml.dom.minidom.Element) -> bool:
+        """
+        Check whether an element matches this selector
+
+        Args:
+            element: the DOM element
+
+        Returns:
+            True if the element matches
+        """
+        for complex_selector in self.alternatives:
+            if _match_complex(element, complex_selector, len(complex_selector) - 1):
+                return True
+        return False
+
+
+def _match_complex(element, complex_selector, idx):
+    # match the compound at idx against element, and the compounds before it against its ancestors and siblings
+    (combinator, compound) = complex_selector[idx]
+    if not compound.matches(element):
+        return False
+    if idx == 0:
+        return True
+    if combinator == " ":
+        ancestor = element.parentNode
+        while ancestor is not None and ancestor.nodeType == ancestor.ELEMENT_NODE:
+            if _match_complex(ancestor, complex_selector, idx - 1):
+                return True
+            ancestor = ancestor.parentNode
+        return False
+    if combinator == ">":
+        parent = element.parentNode
+        return parent is not None and parent.nodeType == parent.ELEMENT_NODE \
+            and _match_complex(parent, complex_selector, idx - 1)
+    sibling = element.previousSibling
+    while sibling is not None:
+        if sibling.nodeType == sibling.ELEMENT_NODE:
+            if _match_complex(sibling, complex_selector, idx - 1):
+                return True
+            if combinator == "+":
+                return False
+        sibling = sibling.previousSibling
+    return False
+
+
+@functools.lru_cache(maxsize=256)
+def compile_selector(selector: str) -> Selector:
+    """
+    Compile a CSS selector.  Compiled selectors are cached, so compiling the same selector again is fast.
+
+    Args:
+        selector: the CSS selector
+
+    Returns:
+        The compiled selector
+
+    Raises:
+        ValueError: if the selector is not valid or not supported
+    """
+    alternatives = []
+    complex_selector = []
+    compound = None
+    combinator = None
+    pos = 0
+    selector = selector.strip()
+    while pos < len(selector):
+        match = _TOKEN_PATTERN.match(selector, pos)
+        if match is None:
+            raise ValueError("invalid selector %s at position %d" % (selector, pos))
+        pos = match.end()
+        kind = match.lastgroup
+        if kind in ("space", "combinator"):
+            token = match.group().strip() or " "
+            if compound is not None:
+                complex_selector.append((combinator, compound))
+                compound = None
+                combinator = token
+            elif token != " ":
+                if combinator not in (None, " ") or not complex_selector:
+                    raise ValueError("invalid selector %s at position %d" % (selector, match.start()))
+                combinator = token
+            if combinator == ",":
+                alternatives.append(complex_selector)
+                complex_selector = []
+                combinator = None
+            continue
+        if compound is None:
+            compound = Compound()
+        elif kind == "tag":
+            raise ValueError("invalid selector %s at position %d" % (selector, match.start()))
+        if kind == "tag":
+            compound.tag = None if match.group("tag") == "*" else match.group("tag")
+        elif kind == "id":
+            compound.id = match.group("id")
+        elif kind == "cls":
+            compound.classes += (match.group("cls"),)
+        elif kind == "attribute":
+            value = match.group("dq")
+            if value is None:
+                value = match.group("sq") if match.group("sq") is not None else match.group("uq")
+            compound.attrs += ((match.group("attr"), match.group("op"), value),)
+        else:
+            pseudo = match.group("pseudo")
+            if pseudo == "first-child":
+                compound.positions += ((0, 1),)
+            elif pseudo == "last-child":
+                compound.positions += ((None, None),)
+            else:
+                compound.positions += (_parse_nth(match.group("nth")),)
+    if compound is None:
+        raise ValueError("invalid selector %s" % selector)
+    complex_selector.append((combinator, compound))
+    alternatives.append(complex_selector)
+    return Selector(alternatives)
+
+
+def _iter_elements(node):
+    # iterate over the elements below node, in document order
+    nodes = list(reversed(node.childNodes))
+    while nodes:
+        node = nodes.pop()
+        if node.nodeType == node.ELEMENT_NODE:
+            yield node
+            nodes.extend(reversed(node.childNodes))
+
+
+def select(node: typing.Union[xml.dom.minidom.Document, xml.dom.minidom.Element],
+           selector: str) -> typing.List[xml.dom.minidom.Element]:
+    """
+    Find the elements below a DOM document or element which match a CSS selector, in a single pass over the
+    elements.  To run many queries against a document which is not changing, use a SelectorIndex.
+
+    Args:
+        node: the DOM document or element to search below
+        selector: the CSS selector
+
+    Returns:
+        A list of the matching elements, in document order
+
+    A way you might use me is:
+
+    >>> from htmlfive import Html5Parser
+    >>> from htmlfive.html5_select import select
+    >>> doc = Html5Parser().parse("<html><body><div class='results'><table><tr data-id='1'></tr></table></div>"
+    ...                           "</body></html>")
+    >>> [tr.getAttribute("data-id") for tr in select(doc, "div.results > table tr[data-id]")]
+    ['1']
+    """
+    compiled = compile_selector(selector)
+    return [element for element in _iter_elements(node) if compiled.matches(element)]
+
+
+def select_one(node: typing.Union[xml.dom.minidom.Document, xml.dom.minidom.Element],
+               selector: str) -> typing.Optional[xml.dom.minidom.Element]:
+    """
+    Find the first element below a DOM document or element which matches a CSS selector
+
+    Args:
+        node: the DOM document or element to search below
+        selector: the CSS selector
+
+    Returns:
+        The first matching element in document order, or None if no element matches
+    """
+    compiled = compile_selector(selector)
+    for element in _iter_elements(node):
+        if compiled.matches(element):
+            return element
+    return None
+
+
+class SelectorIndex:
+    """
+    Index the elements of a DOM document by id, class and tag, to answer CSS selector queries by checking only
+    the elements which could match.  The index is not updated when the document changes.
+
+    Args:
+        doc: the DOM document or element to index
+    """
+
+    def __init__(self, doc: typing.Union[xml.dom.minidom.Document, xml.dom.minidom.Element]):
+        self.elements = []
+        self.positions = {}
+        self.ids = {}
+        self.classes = {}
+        self.tags = {}
+        for element in _iter_elements(doc):
+            self.positions[id(element)] = len(self.elements)
+            self.elements.append(element)
+            self.tags.setdefault(element.tagName, []).append(element)
+            element_id = element.getAttribute("id")
+            if element_id:
+                self.ids.setdefault(element_id, []).append(element)
+            for cls in (element.getAttribute("class") or "").split():
+                self.classes.setdefault(cls, []).append(element)
+
+    def __get_candidates(self, compound):
+        if compound.id is not None:
+            return self.ids.get(compound.id, [])
+        if compound.classes:
+            return min((self.classes.get(cls, []) for cls in compound.classes), key=len)
+        if compound.tag is not None:
+            return self.tags.get(compound.tag, [])
+        return self.elements
+
+    def select(self, selector: str) -> typing.List[xml.dom.minidom.Element]:
+        """
+        Find the indexed elements which match a CSS selector
+
+        Args:
+            selector: the CSS selector
+
+        Returns:
+            A list of the matching elements, in document order
+        """
+        compiled = compile_selector(selector)
+        found = {}
+        for complex_selector in compiled.alternatives:
+            for element in self.__get_candidates(complex_selector[-1][1]):
+                if id(element) not in found and _match_complex(element, complex_selector, len(complex_selector) - 1):
+                    found[id(element)] = element
+        if len(compiled.alternatives) == 1:
+            return list(found.values())
+        return sorted(found.values(), key=lambda element: self.positions[id(element)])
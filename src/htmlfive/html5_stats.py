@@ -0,0 +1,145 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+import collections
+import contextlib
+import time
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import typing
+    import xml.dom.minidom
+
+
+class Html5Stats:
+    """
+    Collect counters and timings from Html5Parser, Html5Exporter, Html5Formatter and Html5Builder.  Pass the same
+    object to several of them to collect their statistics together.  Counter and timing names are prefixed with
+    the name of the component, for example "parser.elements" or "exporter.export".  Components which are not given
+    a stats object do not collect statistics.
+
+    Args:
+        callback: optional function called with the name of the operation (for example "parse") and this object,
+                  each time an operation completes, for example to forward the statistics to a metrics system
+
+    A way you might use me is:
+
+    >>> from htmlfive import Html5Parser, Html5Stats
+    >>> stats = Html5Stats()
+    >>> doc = Html5Parser(stats=stats).parse("<!DOCTYPE html><html><body><p>Hello World</p></body></html>")
+    >>> stats.counters["parser.elements"]
+    3
+    """
+
+    def __init__(self, callback: typing.Callable[[str, "Html5Stats"], None] = None):
+        self.callback = callback
+        self.counters = collections.defaultdict(int)
+        self.timings = collections.defaultdict(float)
+
+    def increment(self, name: str, amount: int = 1):
+        """
+        Increase a counter
+
+        Args:
+            name: the name of the counter
+            amount: the amount to add
+        """
+        self.counters[name] += amount
+
+    def add_timing(self, name: str, seconds: float):
+        """
+        Add to the time spent in a phase
+
+        Args:
+            name: the name of the phase
+            seconds: the time to add, in seconds
+        """
+        self.timings[name] += seconds
+
+    @contextlib.contextmanager
+    def timer(self, name: str):
+        """
+        Time a block of code and add the elapsed time to a phase
+
+        Args:
+            name: the name of the phase
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - start
+
+    def report(self, operation: str):
+        """
+        Call the callback (if any) to report that an operation has completed
+
+        Args:
+            operation: the name of the operation
+        """
+        if self.callback is not None:
+            self.callback(operation, self)
+
+    def reset(self):
+        """
+        Reset all counters and timings to zero
+        """
+        self.counters.clear()
+        self.timings.clear()
+
+    def as_dict(self) -> typing.Dict[str, typing.Dict[str, float]]:
+        """
+        Get the counters and timings
+
+        Returns:
+            A dictionary with "counters" and "timings" entries, each mapping names to values
+        """
+        return {"counters": dict(self.counters), "timings": dict(self.timings)}
+
+    def count_nodes(self, prefix: str, node: xml.dom.minidom.Node):
+        """
+        Count the elements, attributes, text and comments in a DOM
+
+        Args:
+            prefix: the component name, prefixed to the names of the counters
+            node: the DOM document or node to count
+        """
+        elements = attributes = text_nodes = text_chars = comments = 0
+        nodes = [node]
+        while nodes:
+            node = nodes.pop()
+            if node.nodeType == node.ELEMENT_NODE:
+                elements += 1
+                attributes += len(node.attributes)
+            elif node.nodeType == node.TEXT_NODE:
+                text_nodes += 1
+                text_chars += len(node.data)
+            elif node.nodeType == node.COMMENT_NODE:
+                comments += 1
+            nodes.extend(node.childNodes)
+        self.counters[prefix + ".elements"] += elements
+        self.counters[prefix + ".attributes"] += attributes
+        self.counters[prefix + ".text_nodes"] += text_nodes
+        self.counters[prefix + ".text_chars"] += text_chars
+        self.counters[prefix + ".comments"] += comments
@@ -0,0 +1,86 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+import re
+from .html5_entities import unescape
+from .html5_parser import Html5Parser
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import typing
+
+# HTML whitespace, which unlike str.split does not include non-breaking spaces
+_WHITESPACE = re.compile("[ \t\n\r\f]+")
+
+
+def extract_text(html: str, skip_tags: typing.Iterable[str] = ("script", "style"),
+                 parser: Html5Parser = None) -> typing.Iterator[typing.Tuple[typing.Tuple[str, ...], str]]:
+    """
+    Extract the visible text from HTML content, for example for search indexing.  The parser's tokens are read
+    directly, without building a DOM, so the memory used does not grow with the size of the document.
+    Comments, and the content of script and style elements, are skipped.  Runs of whitespace in each text
+    chunk are replaced with a single space, and leading and trailing whitespace is removed.
+
+    Args:
+        html: A string containing the HTML
+        skip_tags: the names of elements whose content is skipped
+        parser: optional Html5Parser used to tokenize the HTML, for example to apply limits
+
+    Returns:
+        An iterator over (path, text) tuples, where path is a tuple of the names of the elements enclosing
+        the text, starting with the document element
+
+    A way you might use me is:
+
+    >>> from htmlfive import extract_text
+    >>> for (path, text) in extract_text("<html><body><p>Hello <b>World</b></p><script>x=1</script></body></html>"):
+    ...     print("/".join(path), text)
+    html/body/p Hello
+    html/body/p/b World
+    """
+    if parser is None:
+        parser = Html5Parser()
+    skip_tags = frozenset(skip_tags)
+    paths = [()]
+    skip_depth = 0
+    for (tag, content) in parser.tokenize(html):
+        if tag is None:
+            if content is None:
+                return
+            if skip_depth:
+                continue
+            text = _WHITESPACE.sub(" ", content).strip(" ")
+            if text:
+                yield (paths[-1], unescape(text))
+        elif tag == "__comment__":
+            continue
+        elif content is not None:
+            paths.append(paths[-1] + (tag,))
+            if tag in skip_tags or skip_depth:
+                skip_depth += 1
+        else:
+            if len(paths) > 1:
+                paths.pop()
+            if skip_depth:
+                skip_depth -= 1
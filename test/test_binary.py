@@ -0,0 +1,114 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from htmlfive import Html5Parser, Html5Exporter
+from htmlfive.html5_binary import dumps, loads, dump, load, get_digest, Html5ParseCache
+
+html = """<!DOCTYPE html><html><head><title>Café &amp; bar</title></head><body>
+<h1 class="title" data-x="1">Heading</h1><!-- a comment -->
+<input type="checkbox" checked><p>First <em>para</em> ☃</p><script>if (a < b) {}</script>
+</body></html>"""
+
+
+class BasicTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        doc = Html5Parser().parse(html)
+        data = dumps(doc)
+        loaded = loads(data)
+        self.assertEqual(Html5Exporter().export(loaded), Html5Exporter().export(doc))
+        self.assertIsNone(loaded.getElementsByTagName("input")[0].getAttribute("checked"))
+        self.assertEqual(loaded.getElementsByTagName("h1")[0].getAttribute("data-x"), "1")
+        self.assertEqual(loaded.getElementsByTagName("h1")[0].parentNode.tagName, "body")
+        self.assertEqual(loads(memoryview(data)).toxml(), loaded.toxml())
+        # repeated strings are stored once
+        repeated = "<html><body>" + "<p class='a'>text</p>" * 100 + "</body></html>"
+        self.assertLess(len(dumps(Html5Parser().parse(repeated))), len(repeated))
+
+    def test_without_minidom_helpers(self):
+        # loading should not depend on helpers which are private to minidom
+        real_import = __import__
+
+        def import_without_helpers(name, globals=None, locals=None, fromlist=(), level=0):
+            if fromlist and "_append_child" in fromlist:
+                raise ImportError("cannot import name '_append_child'")
+            return real_import(name, globals, locals, fromlist, level)
+
+        doc = Html5Parser().parse(html)
+        data = dumps(doc)
+        with unittest.mock.patch("builtins.__import__", import_without_helpers):
+            loaded = loads(data)
+        self.assertEqual(Html5Exporter().export(loaded), Html5Exporter().export(doc))
+
+    def test_example(self):
+        data = dumps(Html5Parser().parse("<!DOCTYPE html><html><body><p class='a'>Hello</p></body></html>"))
+        self.assertEqual(Html5Exporter().export(loads(data)),
+                         '<!DOCTYPE html>\n<html>\n    <body>\n        <p class="a">\n            Hello\n'
+                         '        </p>\n    </body>\n</html>\n')
+
+    def test_invalid(self):
+        data = dumps(Html5Parser().parse(html))
+        for invalid in [b"", b"not a binary document at all, but long enough", data[:60], data[:-4]]:
+            with self.assertRaises(ValueError):
+                loads(invalid)
+
+    def test_file(self):
+        doc = Html5Parser().parse(html)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "doc.h5b")
+            dump(doc, path, get_digest(html))
+            umask = os.umask(0o022)
+            os.umask(umask)
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o666 & ~umask)
+            self.assertEqual(Html5Exporter().export(load(path)), Html5Exporter().export(doc))
+            self.assertIsNotNone(load(path, get_digest(html)))
+            self.assertIsNone(load(path, get_digest(html + " ")))
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as folder:
+            cache = Html5ParseCache(os.path.join(folder, "cache"))
+            path = os.path.join(folder, "page.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+            expected = Html5Exporter().export(Html5Parser().parse(html))
+            for _ in range(2):
+                self.assertEqual(Html5Exporter().export(cache.parse_file(path)), expected)
+            self.assertEqual((cache.misses, cache.hits), (1, 1))
+            # the entry is replaced when the file changes
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html.replace("First", "Second"))
+            self.assertIn("Second", Html5Exporter().export(cache.parse_file(path)))
+            self.assertEqual((cache.misses, cache.hits), (2, 1))
+            self.assertEqual(len(os.listdir(cache.folder)), 1)
+            # content is cached by its digest
+            cache.parse(html)
+            cache.parse(html)
+            self.assertEqual((cache.misses, cache.hits), (3, 2))
+            self.assertIsNone(cache.parse("<html><body><p>unclosed"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,8 +20,11 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import asyncio
 import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from htmlfive import Html5Builder
+from htmlfive.html5_builder import ElementFragment, FrozenFragmentCache, RawFragment
 
 expected = """<!DOCTYPE html>
 <html>
@@ -41,6 +44,11 @@ expected = """<!DOCTYPE html>
     </body>
 </html>"""
 
+def build_section(section, idx):
+    section.add_element("p").add_text("Section %d" % idx)
+    section.add_table([(idx, "a")])
+
+
 class BasicTest(unittest.TestCase):
 
     def test_simple(self):
@@ -52,6 +60,354 @@ class BasicTest(unittest.TestCase):
         builder.body().add_element("div").add_text("Lorem Ipsum")
         self.assertEqual(builder.get_html(),expected)
 
+    def test_shared_fragment(self):
+        # a fragment added to several builders should be rendered again by each of them when it changes
+        shared = ElementFragment("div")
+        shared.add_text("first")
+        builders = [Html5Builder(), Html5Builder()]
+        for builder in builders:
+            builder.body().add_fragment(shared)
+            self.assertIn("first", builder.get_html())
+        shared.add_text("second")
+        for builder in builders:
+            self.assertIn("second", builder.get_html())
+
+    def test_raw_fragment(self):
+        # a fragment holding a DOM node should be written within the head or body
+        from xml.dom.minidom import parseString
+        node = parseString("<p class='raw'>Raw</p>").documentElement
+        builder = Html5Builder()
+        builder.body().add_fragment(RawFragment(node))
+        html = builder.get_html()
+        self.assertIn('<p class="raw">', html)
+        self.assertIn("Raw", html)
+
+    def test_direct_matches_dom(self):
+        # the direct rendering path should produce the same HTML as the DOM/exporter path
+        def populate(builder):
+            builder.head().add_element("script", {"src": "app.js"})
+            div = builder.body().add_element("div", {"class": "a", "style": "x"}, {"color": "red"})
+            div.add_element("img", {"src": "x.png", "alt": 'say "hi"'})
+            div.add_element("span", {"title": "<&>", "hidden": None})
+            div.add_text("  ")
+            div.add_element("p").add_text("Lorem\tIpsum")
+            div.add_element("p").add_text("a < b & c")
+            div.add_element("script").add_text("if (a < b && c) {}")
+            div.add_table([("x & y", "<z>")])
+            div.set_attribute("data-n", 3)
+            builder.body().add_element("textarea")
+
+        direct = Html5Builder(language="en", width=500)
+        populate(direct)
+        via_dom = Html5Builder(language="en", width=500)
+        populate(via_dom)
+        via_dom.register_post_build(lambda head, body: None)
+        self.assertEqual(direct.get_html(), via_dom.get_html())
+        # text is escaped, except within script elements
+        self.assertIn("a &lt; b &amp; c", direct.get_html())
+        self.assertIn("if (a < b && c) {}", direct.get_html())
+        self.assertIn("x &amp; y", direct.get_html())
+
+    def test_stream(self):
+        # streaming a document should produce the same HTML as building it in memory
+        def populate_head(builder):
+            builder.head().add_element("title").add_text("Report")
+            builder.body().add_element("h1").add_text("Rows")
+
+        expected_builder = Html5Builder(language="en", width=500)
+        populate_head(expected_builder)
+        table = expected_builder.body().add_element("table")
+        for idx in range(3):
+            table.add_element("tr").add_element("td").add_text(str(idx))
+        expected_builder.body().add_element("div")
+
+        chunks = []
+        builder = Html5Builder(language="en", width=500)
+        populate_head(builder)
+        with builder.stream(chunks.append, chunk_size=10) as body:
+            with body.section("table") as table:
+                for idx in range(3):
+                    with table.section("tr") as tr:
+                        tr.add_element("td").add_text(str(idx))
+                    self.assertEqual(table.child_fragments, [])
+            body.section("div").close()
+        self.assertTrue(len(chunks) > 1)
+        self.assertEqual("".join(chunks), expected_builder.get_html())
+        self.assertRaises(ValueError, lambda: table.add_element("tr"))
+
+    def test_frozen(self):
+        # frozen fragments should render as the original fragment, at any indent level
+        def make_nav():
+            nav = ElementFragment("nav", {"class": "top"})
+            nav.add_element("a", {"href": "/"}).add_text("Home")
+            return nav
+
+        expected = Html5Builder()
+        expected.body().add_fragment(make_nav())
+        expected.body().add_element("div").add_fragment(make_nav())
+
+        nav = make_nav()
+        frozen = nav.freeze()
+        nav.set_attribute("class", "changed")
+        builder = Html5Builder()
+        builder.body().add_fragment(frozen)
+        builder.body().add_element("div").add_fragment(frozen)
+        self.assertEqual(builder.get_html(), expected.get_html())
+
+    def test_frozen_cache(self):
+        cache = FrozenFragmentCache(max_size=2)
+        frozen = cache.freeze(ElementFragment("footer"))
+        self.assertIs(cache.freeze(ElementFragment("footer")), frozen)
+        cache.get("header", lambda: ElementFragment("header"))
+        cache.freeze(ElementFragment("footer"))
+        cache.get("nav", lambda: ElementFragment("nav"))
+        self.assertEqual(len(cache), 2)
+        # the header fragment was least recently used, so should have been evicted
+        self.assertIs(cache.freeze(ElementFragment("footer")), frozen)
+        created = []
+        cache.get("header", lambda: created.append(1) or ElementFragment("header"))
+        self.assertEqual(created, [1])
+
+    def test_no_shared_defaults(self):
+        # setting attributes or styles on one fragment should not affect others created without them
+        first = ElementFragment("div")
+        second = ElementFragment("div")
+        first.set_attribute("id", "first").set_style("color", "red")
+        self.assertEqual(second.attrs, {})
+        self.assertEqual(second.style, {})
+        attrs = {"class": "a"}
+        third = ElementFragment("div", attrs)
+        third.set_attribute("id", "third")
+        self.assertEqual(attrs, {"class": "a"})
+        self.assertFalse(hasattr(third, "__dict__"))
+
+    def test_get_html_repeated(self):
+        # getting the HTML should not modify the document, and changes made afterwards should be included
+        for via_dom in [False, True]:
+            builder = Html5Builder(width=500)
+            if via_dom:
+                builder.register_post_build(lambda head, body: None)
+            table = builder.body().add_element("table")
+            cell = table.add_element("tr").add_element("td")
+            cell.add_text("1")
+            builder.body().add_element("div").add_text("Lorem Ipsum")
+            html = builder.get_html()
+            self.assertEqual(html.count("<style>"), 1)
+            self.assertEqual(builder.get_html(), html)
+            cell.set_attribute("class", "changed")
+            self.assertEqual(builder.get_html(), html.replace("<td>", '<td class="changed">'))
+            table.add_element("tr")
+            self.assertIn("<tr/>", builder.get_html())
+            self.assertFalse(builder.body().is_dirty())
+
+    def test_post_build_cache(self):
+        # rendering via the DOM should not leave out of date output cached for the direct route
+        builder = Html5Builder()
+        div = builder.body().add_element("div")
+        div.add_text("first")
+        builder.get_html()
+        post_build = lambda head, body: None
+        builder.register_post_build(post_build)
+        div.add_text("second")
+        self.assertIn("second", builder.get_html())
+        builder.post_build_fns.remove(post_build)
+        html = builder.get_html()
+        self.assertIn("first", html)
+        self.assertIn("second", html)
+
+    def test_table(self):
+        # a bulk table should render in the same way as a table built from a fragment per cell
+        header = ["name", "value"]
+        rows = [("a", 1), ("b & c", None), (" d ", 2.5)]
+        expected = Html5Builder()
+        table = expected.body().add_element("table", {"class": "t"})
+        for (row, cell_tag) in [(header, "th")] + [(row, "td") for row in rows]:
+            tr = table.add_element("tr")
+            for value in row:
+                cell = tr.add_element(cell_tag)
+                if value is not None:
+                    cell.add_text(str(value).strip())
+
+        builder = Html5Builder()
+        builder.body().add_table(rows, header=header, attrs={"class": "t"})
+        self.assertEqual(builder.get_html(), expected.get_html())
+
+        builder = Html5Builder()
+        builder.body().add_table(columns=[["a", "b & c", " d "], [1, None, 2.5]], header=header, attrs={"class": "t"})
+        self.assertEqual(builder.get_html(), expected.get_html())
+
+    def test_sections(self):
+        # sections rendered in parallel should produce the same HTML as a serial build
+        def populate(builder):
+            builder.body().add_element("h1").add_text("Sections")
+            div = builder.body().add_element("div")
+            sections = []
+            for idx in range(4):
+                if idx % 2:
+                    section = div.add_section("section", {"id": "s%d" % idx})
+                    build_section(section, idx)
+                else:
+                    section = div.add_section("section", {"id": "s%d" % idx}, build_fn=build_section, build_args=(idx,))
+                sections.append(section)
+            return sections
+
+        expected = Html5Builder()
+        expected_sections = populate(expected)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            builder = Html5Builder(executor=executor)
+            sections = populate(builder)
+            self.assertEqual(builder.get_html(), expected.get_html())
+            for section_list in [sections, expected_sections]:
+                section_list[1].add_element("p").add_text("Changed 1")
+                section_list[2].add_element("p").add_text("Changed 2")
+            self.assertEqual(builder.get_html(), expected.get_html())
+            self.assertIn("Changed 2", builder.get_html())
+
+    def test_async(self):
+        # placeholders should be resolved concurrently and rendered in place
+        async def produce(ready, wait_for, content):
+            ready.set()
+            await asyncio.wait_for(wait_for.wait(), 5)
+            return content
+
+        async def build():
+            (first_ready, second_ready) = (asyncio.Event(), asyncio.Event())
+            builder = Html5Builder()
+            builder.body().add_element("h1").add_text("Heading")
+            nested = ElementFragment("div")
+            nested.add_async(produce(asyncio.Event(), first_ready, "Nested"))
+            # each coroutine waits for the other to start, so they must be awaited concurrently
+            builder.body().add_async(produce(first_ready, second_ready, [nested, "Text"]))
+            builder.body().add_element("p").add_async(produce(second_ready, first_ready, None))
+            self.assertRaises(ValueError, builder.get_html)
+            return await builder.get_html_async()
+
+        expected = Html5Builder()
+        expected.body().add_element("h1").add_text("Heading")
+        expected.body().add_element("div").add_text("Nested")
+        expected.body().add_text("Text")
+        expected.body().add_element("p").add_text("")
+        self.assertEqual(asyncio.run(build()), expected.get_html())
+
+    def test_style_classes(self):
+        # identical styles should be converted to a single generated class, defined in the head
+        def populate(builder):
+            builder.head().add_element("title").add_text("Styles")
+            for idx in range(3):
+                builder.body().add_element("p", {"class": "para"}, {"color": "red"}).add_text(str(idx))
+            builder.body().add_element("div", style={"color": "blue", "margin": 0})
+            builder.body().add_fragment(ElementFragment("span", style={"color": "green"}).freeze())
+
+        builder = Html5Builder(style_classes=True, width=500)
+        populate(builder)
+        html = builder.get_html()
+        self.assertNotIn("style=", html)
+        red = builder.get_style_class({"color": "red"})
+        self.assertEqual(html.count('<p class="para %s">' % red), 3)
+        self.assertIn(".%s { color:red; }" % red, html)
+        self.assertIn(".%s { color:blue;margin:0; }" % builder.get_style_class({"color": "blue", "margin": 0}), html)
+        self.assertIn(".%s { color:green; }" % builder.get_style_class({"color": "green"}), html)
+        self.assertLess(html.index("</style>"), html.index("<body>"))
+
+        # changing style_classes should render the cached fragments again
+        toggled = Html5Builder(width=500)
+        populate(toggled)
+        self.assertIn('style="color:red;"', toggled.get_html())
+        toggled.style_classes = True
+        self.assertEqual(toggled.get_html(), html)
+
+        via_dom = Html5Builder(style_classes=True, width=500)
+        populate(via_dom)
+        via_dom.register_post_build(lambda head, body: None)
+        self.assertEqual(via_dom.get_html(), html)
+
+    def test_style_rules(self):
+        # cached output brings its style rules to another builder, and rules no longer used are dropped
+        shared = ElementFragment("p", style={"color": "red"})
+        first = Html5Builder(style_classes=True)
+        first.body().add_fragment(shared)
+        first.get_html()
+        red = first.get_style_class({"color": "red"})
+        second = Html5Builder(style_classes=True)
+        second.body().add_fragment(shared)
+        self.assertIn(".%s { color:red; }" % red, second.get_html())
+
+        shared.set_style("color", "blue")
+        html = first.get_html()
+        self.assertIn(".%s { color:blue; }" % first.get_style_class({"color": "blue"}), html)
+        self.assertNotIn(red, html)
+
+    def test_fragment_hooks(self):
+        # hooks modify a copy of the document at render time, leaving the built fragments unchanged
+        def hook(head, body):
+            head.add_element("script", {"src": "app.js"})
+            body.find_by_id("heading").set_attribute("class", "hooked")
+            for p in body.find_all("p"):
+                p.add_text("checked")
+
+        builder = Html5Builder()
+        builder.head().add_element("title").add_text("Hooks")
+        builder.body().add_element("h1", {"id": "heading"}).add_text("Heading")
+        section = builder.body().add_element("div")
+        section.add_element("p").add_text("one")
+        section.add_element("p").add_text("two")
+        builder.register_fragment_hook(hook)
+
+        html = builder.get_html()
+        self.assertEqual(html.count('<script src="app.js"></script>'), 1)
+        self.assertIn('<h1 id="heading" class="hooked">', html)
+        self.assertEqual(html.count("checked"), 2)
+        self.assertIsNone(builder.body().find_by_id("heading").get_attribute("class"))
+        self.assertEqual(builder.get_html(), html)
+
+        section.add_element("p").add_text("three")
+        html = builder.get_html()
+        self.assertEqual(html.count('<script src="app.js"></script>'), 1)
+        self.assertEqual(html.count("checked"), 3)
+
+        # changes made after a hook is registered should not be lost when the document is rendered again
+        builder = Html5Builder()
+        div = builder.body().add_element("div")
+        div.add_text("first")
+        builder.get_html()
+        builder.register_fragment_hook(lambda head, body: None)
+        div.add_text("second")
+        self.assertIn("second", builder.get_html())
+        builder.body().add_element("p")
+        html = builder.get_html()
+        self.assertIn("first", html)
+        self.assertIn("second", html)
+        self.assertIn("<p/>", html)
+
+        via_dom = Html5Builder()
+        via_dom.head().add_element("title").add_text("Hooks")
+        via_dom.body().add_element("h1", {"id": "heading"}).add_text("Heading")
+        via_dom.body().add_element("div")
+        via_dom.register_fragment_hook(hook)
+        via_dom.register_post_build(lambda head, body: None)
+        self.assertIn('class="hooked"', via_dom.get_html())
+
+    def test_thread_safe(self):
+        # threads populating one document concurrently get unique ids and lose no fragments
+        builder = Html5Builder(thread_safe=True, id_block_size=8)
+        shared = builder.body().add_element("ul")
+
+        def populate(section_idx):
+            section = builder.body().add_element("div")
+            for idx in range(500):
+                section.add_element("span", {"id": builder.get_next_id("s")})
+                shared.add_element("li", {"id": builder.get_next_id("li")}).add_text("%d-%d" % (section_idx, idx))
+
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(populate, range(8)))
+
+        ids = [fragment.get_attribute("id") for fragment in builder.body().iter_elements()
+               if fragment.get_attribute("id")]
+        self.assertEqual(len(ids), 8000)
+        self.assertEqual(len(set(ids)), 8000)
+        self.assertEqual(len(shared.get_child_fragments()), 4000)
+        self.assertEqual(builder.get_html().count("<li "), 4000)
+
 if __name__ == '__main__':
     unittest.main()
 
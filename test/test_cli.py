@@ -0,0 +1,118 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from htmlfive.__main__ import main, convert
+
+html = "<!DOCTYPE html><html><body><p class=\"a\">Hello</p></body></html>"
+
+
+class BasicTest(unittest.TestCase):
+
+    def write_files(self, folder, count):
+        for idx in range(count):
+            subfolder = os.path.join(folder, "sub%d" % (idx % 2))
+            os.makedirs(subfolder, exist_ok=True)
+            with open(os.path.join(subfolder, "page%d.html" % idx), "w") as f:
+                f.write(html)
+        with open(os.path.join(folder, "notes.txt"), "w") as f:
+            f.write("not html")
+
+    def run_main(self, args):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            status = main(args)
+        return (status, out.getvalue())
+
+    def test_output_dir(self):
+        with tempfile.TemporaryDirectory() as folder:
+            source = os.path.join(folder, "in")
+            target = os.path.join(folder, "out")
+            self.write_files(source, 6)
+            (status, out) = self.run_main([source, "--output-dir", target, "--jobs", "2"])
+            self.assertEqual(status, 0)
+            self.assertIn("converted 6, skipped 0, failed 0", out)
+            with open(os.path.join(target, "sub1", "page3.html")) as f:
+                self.assertEqual(f.read(), convert(html, "export", 4))
+            umask = os.umask(0o022)
+            os.umask(umask)
+            self.assertEqual(os.stat(os.path.join(target, "sub1", "page3.html")).st_mode & 0o777, 0o666 & ~umask)
+            self.assertFalse(os.path.exists(os.path.join(target, "notes.txt")))
+
+            (status, out) = self.run_main([source, "--output-dir", target, "--jobs", "1"])
+            self.assertIn("converted 0, skipped 6", out)
+
+            # a touched but unchanged file is skipped by its content hash, a changed file is converted
+            os.utime(os.path.join(source, "sub0", "page0.html"), ns=(0, 0))
+            with open(os.path.join(source, "sub1", "page1.html"), "w") as f:
+                f.write(html.replace("Hello", "Changed"))
+            (status, out) = self.run_main([source, "--output-dir", target, "--jobs", "1"])
+            self.assertIn("converted 1, skipped 5", out)
+
+            # changing the mode converts every file again
+            (status, out) = self.run_main([source, "--output-dir", target, "--jobs", "1", "--mode", "minify"])
+            self.assertIn("converted 6, skipped 0", out)
+            with open(os.path.join(target, "sub0", "page0.html")) as f:
+                self.assertNotIn("    ", f.read())
+
+    def test_in_place(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "page.html")
+            with open(path, "w") as f:
+                f.write(html)
+            os.chmod(path, 0o640)
+            cache = os.path.join(folder, "cache.json")
+            (status, out) = self.run_main([path, "--cache", cache, "--jobs", "1"])
+            self.assertIn("converted 1, skipped 0", out)
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o640)
+            (status, out) = self.run_main([path, "--cache", cache, "--jobs", "1"])
+            self.assertIn("converted 0, skipped 1", out)
+            self.assertEqual([name for name in os.listdir(folder) if name.endswith(".tmp")], [])
+
+    def test_format(self):
+        # formatting needs an output directory, so that the input files are not overwritten
+        with tempfile.TemporaryDirectory() as folder:
+            self.write_files(folder, 2)
+            for args in [[folder], [folder, "--output-dir", folder]]:
+                with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+                    self.run_main(args + ["--mode", "format", "--jobs", "1"])
+            with open(os.path.join(folder, "sub0", "page0.html")) as f:
+                self.assertEqual(f.read(), html)
+
+            target = os.path.join(folder, "out")
+            (status, out) = self.run_main([folder, "--output-dir", target, "--mode", "format", "--jobs", "1"])
+            self.assertIn("converted 2, skipped 0", out)
+            with open(os.path.join(target, "sub0", "page0.html")) as f:
+                self.assertEqual(f.read(), convert(html, "format", 4))
+
+    def test_failure(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "broken.html")
+            with open(path, "w") as f:
+                f.write("<html><body><p")
+            with contextlib.redirect_stderr(io.StringIO()) as err:
+                (status, out) = self.run_main([path, "--cache", os.path.join(folder, "cache.json"), "--jobs", "1"])
+            self.assertEqual(status, 1)
+            self.assertIn("broken.html", err.getvalue())
@@ -0,0 +1,70 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import json
+import unittest
+
+from htmlfive import Html5Parser, Html5Exporter
+from htmlfive.html5_diff import diff, apply_patch
+
+old_html = """<!DOCTYPE html><html><head><title>Page</title></head><body>
+<h1 class="title">Heading</h1>
+<ul><li id="a">A</li><li id="b">B</li><li id="c">C</li></ul>
+<p>First <em>para</em></p><!--note--><div><span>unchanged</span></div>
+</body></html>"""
+
+
+class BasicTest(unittest.TestCase):
+
+    def check(self, old_html, new_html):
+        # the patch transforms old into new, and survives a JSON round trip
+        old = Html5Parser().parse(old_html)
+        new = Html5Parser().parse(new_html)
+        patch = json.loads(json.dumps(diff(old, new)))
+        apply_patch(old, patch)
+        self.assertEqual(Html5Exporter().export(old), Html5Exporter().export(new))
+        return patch
+
+    def test_identical(self):
+        self.assertEqual(self.check(old_html, old_html), [])
+
+    def test_changes(self):
+        patch = self.check(old_html, old_html.replace('class="title"', 'class="main" lang="en"'))
+        self.assertEqual(patch, [["attrs", [1, 0], {"class": "main", "lang": "en"}, []]])
+        patch = self.check(old_html, old_html.replace("First", "Second"))
+        self.assertEqual(patch, [["text", [1, 2, 0], "Second "]])
+        self.check(old_html, old_html.replace("<!--note-->", "<!--changed note-->"))
+        self.check(old_html, old_html.replace("<em>para</em>", "<strong>para</strong>"))
+        self.check(old_html, old_html.replace("<h1", "<h2").replace("</h1>", "</h2>"))
+        self.check(old_html, old_html.replace("<html>", "<main>").replace("</html>", "</main>"))
+
+    def test_children(self):
+        # keyed children are matched by id when they move, and only new content is sent
+        moved = old_html.replace('<li id="a">A</li><li id="b">B</li><li id="c">C</li>',
+                                 '<li id="c">C</li><li id="d">D</li><li id="a">A!</li>')
+        patch = self.check(old_html, moved)
+        self.assertEqual(patch[0], ["children", [1, 1], [2, ["li", {"id": "d"}, ["D"]], 0]])
+        self.assertEqual(patch[1], ["text", [1, 1, 2, 0], "A!"])
+        patch = self.check(old_html, old_html.replace("<ul>", "<ul><li>new</li>"))
+        self.assertEqual(patch, [["children", [1, 1], [["li", {}, ["new"]], [0, 3]]]])
+        self.check(old_html, old_html.replace("<ul>", "<div>x</div><ul>"))
+        self.check(old_html, old_html.replace("<div><span>unchanged</span></div>", ""))
+        self.check("<html><body><p>1</p><p>2</p></body></html>", "<html><body><p>2</p><p>1</p><p>3</p></body></html>")
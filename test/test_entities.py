@@ -0,0 +1,48 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import html
+import unittest
+
+from htmlfive.html5_entities import escape, unescape
+
+
+class BasicTest(unittest.TestCase):
+
+    def test_escape(self):
+        for s in ["", "plain text", "a < b & c > d", "say \"hi\" it's", "&amp;"]:
+            self.assertEqual(escape(s), html.escape(s))
+            self.assertEqual(escape(s, quote=False), html.escape(s, quote=False))
+        s = "nothing to escape"
+        self.assertIs(escape(s), s)
+
+    def test_unescape(self):
+        # the same results as the standard library, including numeric references and named references
+        # without a semicolon
+        for s in ["", "plain text", "&lt;p&gt; &amp;amp; &quot;x&quot; &#39;y&#x27;", "&eacute;&Eacute;&nbsp;",
+                  "&#169; &#xa9; &#0; &#128; &#x110000;", "&amplt; &notit; &noti &lt &", "&unknown; &#; &#x;"]:
+            self.assertEqual(unescape(s), html.unescape(s))
+        s = "nothing to unescape"
+        self.assertIs(unescape(s), s)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -23,6 +23,7 @@
 import unittest
 
 from htmlfive import Html5Exporter
+from htmlfive.html5_common import SerialisationTable, get_serialisation_table
 from xml.dom.minidom import getDOMImplementation
 
 
@@ -50,6 +51,25 @@ class BasicTest(unittest.TestCase):
         html = exporter.export(doc)
         self.assertEqual(html.strip(),BasicTest.simple_expected.strip())
 
+    def test_serialisation_table(self):
+        table = get_serialisation_table(2)
+        self.assertIs(get_serialisation_table(2), table)
+        self.assertEqual(table.get_tag("p"), ("<p", "</p>\n", "/>\n"))
+        self.assertEqual(table.get_tag("br"), ("<br", "</br>\n", ">\n"))
+        self.assertEqual(table.get_tag("script"), ("<script", "</script>\n", "></script>\n"))
+        self.assertEqual(table.get_indent(3), "      ")
+        self.assertEqual(table.get_indent(SerialisationTable.MAX_DEPTH + 1), "  " * (SerialisationTable.MAX_DEPTH + 1))
+
+        # elements nested more deeply than the table holds indents for
+        doc = getDOMImplementation().createDocument(None, "html", None)
+        element = doc.documentElement
+        depth = SerialisationTable.MAX_DEPTH + 2
+        for _ in range(depth):
+            element = element.appendChild(doc.createElement("div"))
+        lines = Html5Exporter(indent_spaces=2).export(doc).split("\n")
+        self.assertEqual(lines[depth + 1], "  " * depth + "<div/>")
+        self.assertEqual(lines[depth + 2], "  " * (depth - 1) + "</div>")
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
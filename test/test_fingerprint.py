@@ -0,0 +1,88 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import unittest
+
+from htmlfive import Html5Parser, Html5Exporter
+from htmlfive.html5_fingerprint import fingerprint, get_subtree_hashes
+
+html = """<!DOCTYPE html><html><head><title>Fish &amp; Chips</title><script>var s = "a  b";</script></head>
+<body><div class="menu" id="fish"><p>Cod   and
+    chips</p><!-- today --></div><div id="fish" class="menu"><p>Cod and chips</p></div></body></html>"""
+
+
+def parse(html):
+    return Html5Parser().parse(html)
+
+
+class BasicTest(unittest.TestCase):
+
+    def test_canonical(self):
+        doc = parse(html)
+        digest = fingerprint(doc)
+        self.assertEqual(len(digest), 16)
+        self.assertEqual(fingerprint(doc.documentElement), digest)
+        self.assertEqual(fingerprint(parse(Html5Exporter(indent_spaces=8).export(doc))), digest)
+        self.assertEqual(fingerprint(parse(html.replace("<!-- today -->", ""))), digest)
+        self.assertNotEqual(fingerprint(doc, include_comments=True), digest)
+        self.assertNotEqual(fingerprint(parse(html.replace("Cod   and", "Haddock and"))), digest)
+        self.assertNotEqual(fingerprint(parse(html.replace("a  b", "a b"))), digest)
+        self.assertNotEqual(fingerprint(parse(html.replace('class="menu" ', ""))), digest)
+        self.assertEqual(len(fingerprint(doc, digest_size=32)), 32)
+
+    def test_unambiguous(self):
+        self.assertNotEqual(fingerprint(parse("<html><body><p>a</p><p>b</p></body></html>")),
+                            fingerprint(parse("<html><body><p>a<p>b</p></p></body></html>")))
+        self.assertNotEqual(fingerprint(parse('<html><body><p a="x" b="y"></p></body></html>')),
+                            fingerprint(parse('<html><body><p a="x b=1:y"></p></body></html>')))
+
+    def test_subtree_hashes(self):
+        doc = parse(html)
+        hashes = {}
+        self.assertEqual(fingerprint(doc, subtree_hashes=hashes), fingerprint(doc))
+        self.assertEqual(hashes, get_subtree_hashes(doc.documentElement, normalise=True, include_comments=False))
+        for element in doc.getElementsByTagName("*"):
+            self.assertIn(element, hashes)
+        (first, second) = doc.getElementsByTagName("div")
+        self.assertEqual(hashes[first], hashes[second])
+        other = {}
+        fingerprint(parse(html.replace("<title>Fish", "<title>Cod")), subtree_hashes=other)
+        self.assertIn(hashes[first], other.values())
+        self.assertNotEqual(hashes[first], hashes[first.firstChild])
+
+    def test_exact_hashes(self):
+        # without normalisation, as used by html5_diff, text and comments are hashed exactly
+        doc = parse(html)
+        exact = get_subtree_hashes(doc)
+        self.assertIn(doc, exact)
+        (first, second) = doc.getElementsByTagName("div")
+        self.assertNotEqual(exact[first], exact[second])
+        comment = first.lastChild
+        self.assertIn(comment, exact)
+        self.assertNotIn(comment, get_subtree_hashes(doc, include_comments=False))
+
+    def test_lazy(self):
+        self.assertEqual(fingerprint(Html5Parser().parse(html, lazy_depth=2)), fingerprint(parse(html)))
+
+
+if __name__ == '__main__':
+    unittest.main()
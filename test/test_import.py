@@ -0,0 +1,77 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import subprocess
+import sys
+import unittest
+
+import htmlfive
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(htmlfive.__file__)))
+
+# modules which are slow to import and which should only be imported when needed
+HEAVY_MODULES = ["asyncio", "concurrent.futures", "typing", "xml.dom.minidom", "hashlib"]
+
+
+def get_imports(code):
+    # run code in a new interpreter with -X importtime, returning the cumulative import time in microseconds
+    # of each module imported
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    result = subprocess.run([sys.executable, "-S", "-X", "importtime", "-c", code], env=env,
+                            capture_output=True, text=True, check=True)
+    imports = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:"):
+            (_, cumulative, name) = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit():
+                imports[name.strip()] = int(cumulative)
+    return imports
+
+
+class BasicTest(unittest.TestCase):
+
+    def test_import_package(self):
+        imports = get_imports("import htmlfive")
+        self.assertIn("htmlfive", imports)
+        for module in HEAVY_MODULES + ["htmlfive.html5_parser", "htmlfive.html5_builder"]:
+            self.assertNotIn(module, imports)
+
+    def test_import_component(self):
+        imports = get_imports("from htmlfive import Html5Parser, Html5Builder")
+        self.assertIn("htmlfive.html5_parser", imports)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, imports)
+
+    def test_build_without_dom(self):
+        # a document without post build functions is written without creating a DOM
+        imports = get_imports("from htmlfive import Html5Builder\n"
+                              "builder = Html5Builder(language='en')\n"
+                              "builder.body().add_element('p').add_text('Hello')\n"
+                              "assert '<html lang=\"en\">' in builder.get_html()")
+        self.assertNotIn("xml.dom.minidom", imports)
+
+    def test_lazy_names(self):
+        for name in htmlfive.__all__:
+            self.assertIn(name, dir(htmlfive))
+            self.assertIsNotNone(getattr(htmlfive, name))
+        with self.assertRaises(AttributeError):
+            htmlfive.Html5Missing
@@ -0,0 +1,96 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import unittest
+
+from htmlfive import Html5Parser, Html5Exporter, Html5LimitExceeded
+from htmlfive.html5_lazy import LazyElement, find_element_end
+
+html = """<!DOCTYPE html><html lang="en"><head><title>Fish &amp; Chips</title><script>var s = "<div>";</script></head>
+<body><div id="menu" class="x"><div><p>Cod &lt; Haddock</p></div><!-- <div> --><br><img src="fish.png"/></div>
+<section><style>div { color: red }</style><div>Peas</div></section><textarea></textarea></body></html>"""
+
+
+class BasicTest(unittest.TestCase):
+
+    def test_same_as_eager(self):
+        expected = Html5Exporter().export(Html5Parser().parse(html))
+        for lazy_depth in range(1, 5):
+            doc = Html5Parser().parse(html, lazy_depth=lazy_depth)
+            self.assertEqual(Html5Exporter().export(doc), expected)
+
+    def test_text_elements(self):
+        # the content of elements such as pre is read as text, so tags within it are not counted
+        html = "<html><body><div><pre>a <div> b</pre></div><p>x</p></body></html>"
+        expected = Html5Exporter().export(Html5Parser().parse(html))
+        doc = Html5Parser().parse(html, lazy_depth=2)
+        self.assertIsNotNone(doc)
+        self.assertEqual(Html5Exporter().export(doc), expected)
+
+    def test_example(self):
+        html = "<html><body><div id='intro'>Hi</div><table id='results'><tr><td>1</td></tr></table></body></html>"
+        doc = Html5Parser().parse(html, lazy_depth=2)
+        body = doc.documentElement.lastChild
+        section = [child for child in body.childNodes if child.getAttribute("id") == "results"][0]
+        self.assertFalse(body.firstChild.is_loaded())
+        self.assertEqual(len(section.getElementsByTagName("tr")), 1)
+        self.assertFalse(body.firstChild.is_loaded())
+
+    def test_loaded_on_access(self):
+        doc = Html5Parser().parse(html, lazy_depth=2)
+        body = doc.documentElement.childNodes[1]
+        self.assertNotIsInstance(body, LazyElement)
+        sections = body.childNodes
+        self.assertEqual([section.tagName for section in sections], ["div", "section", "textarea"])
+        menu = sections[0]
+        self.assertIsInstance(menu, LazyElement)
+        self.assertEqual(menu.getAttribute("id"), "menu")
+        self.assertFalse(menu.is_loaded())
+        self.assertFalse(sections[1].is_loaded())
+        self.assertEqual(menu.getElementsByTagName("p")[0].firstChild.data, "Cod < Haddock")
+        self.assertTrue(menu.is_loaded())
+        self.assertFalse(sections[1].is_loaded())
+        self.assertIs(menu.firstChild.parentNode, menu)
+        self.assertIs(menu.firstChild.ownerDocument, doc)
+
+    def test_find_element_end(self):
+        content = '<div><div/><!-- </div> --><script>"</div>"</script><div>x</div></div><p>'
+        self.assertEqual(find_element_end(content, "div", 5), (63, 69))
+        self.assertEqual(find_element_end("<div>x</div><p>", "div", 5), (6, 12))
+        self.assertEqual(find_element_end("<script>a</b></script>", "script", 8), (13, 22))
+        self.assertIsNone(find_element_end("<div><div></div>", "div", 5))
+
+    def test_malformed(self):
+        self.assertIsNone(Html5Parser().parse("<html><body><div><p>unclosed</p>", lazy_depth=2))
+        self.assertIsNone(Html5Parser().parse("<html><body><div><!-- unclosed</div></body></html>", lazy_depth=2))
+        doc = Html5Parser().parse('<html><body><p title="unclosed>text</p></body></html>', lazy_depth=1)
+        with self.assertRaises(ValueError):
+            doc.documentElement.firstChild.childNodes
+
+    def test_limits(self):
+        doc = Html5Parser(max_nodes=3).parse("<html><body><div><p>a</p><p>b</p></div></body></html>", lazy_depth=2)
+        with self.assertRaises(Html5LimitExceeded):
+            doc.getElementsByTagName("p")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -23,6 +23,7 @@
 import unittest
 from htmlfive.html5_parser import Html5Parser
 from htmlfive.html5_exporter import Html5Exporter
+from htmlfive.html5_normaliser import normalise, minify
 
 simple_test_html=\
 """<!DOCTYPE html>
@@ -60,5 +61,43 @@ class BasicTest(unittest.TestCase):
         expected = simple_test_html
         self.assertEqual(exporter.export(dom).strip(), expected.strip())
 
+    def test_normalise(self):
+        # normalising from tokens gives the same result as parsing then exporting
+        for html in [simple_test_html,
+                     "<html lang='en'><body><!-- note --><p>a &amp; b <em>c</em>  </p><div>  </div>"
+                     "<script>if (a < b) {}</script><textarea></textarea><img src=x></body></html>",
+                     "<html><body><div><p>unclosed</p>"]:
+            for indent_spaces in [0, 2]:
+                expected = Html5Exporter(indent_spaces).export(Html5Parser().parse(html))
+                self.assertEqual(normalise(html, indent_spaces), expected)
+        self.assertIsNone(normalise("<html><body><p"))
+
+    def test_minify(self):
+        # minifying writes no newlines or indentation, keeping the content of the document apart from whitespace
+        for html in [simple_test_html,
+                     "<html lang='en'><body><!-- note --><p>a &amp; b <em>c</em>  </p><div>  </div>"
+                     "<script>if (a < b) {}</script><textarea></textarea><img src=x></body></html>"]:
+            minified = minify(html)
+            self.assertNotIn("\n", minified)
+            self.assertLessEqual(len(minified), len(html))
+            self.assertEqual(normalise(minified).split(), normalise(html).split())
+        self.assertEqual(minify("<html><body>\n  <p>Hello <b>World</b>, again</p>\n</body></html>"),
+                         "<!DOCTYPE html><html><body><p>Hello <b>World</b>, again</p></body></html>")
+        self.assertIsNone(minify("<html><body><p"))
+
+    def test_escaping(self):
+        # text is unescaped when parsed and escaped again when exported, except within script and style
+        html = ("<html><body><p>a &lt; b &amp;&amp; c &gt; d &eacute;</p><script>if (a < b && c) {}</script>"
+                "<style>p > a { content: '&amp;' }</style></body></html>")
+        dom = Html5Parser().parse(html)
+        self.assertEqual(dom.getElementsByTagName("p")[0].firstChild.data, "a < b && c > d \xe9")
+        self.assertEqual(dom.getElementsByTagName("style")[0].firstChild.data, "p > a { content: '&amp;' }")
+        exported = Html5Exporter().export(dom)
+        self.assertIn("a &lt; b &amp;&amp; c &gt; d \xe9", exported)
+        self.assertIn("if (a < b && c) {}", exported)
+        self.assertIn("p > a { content: '&amp;' }", exported)
+        self.assertEqual(normalise(html), exported)
+        self.assertEqual(Html5Exporter().export(Html5Parser().parse(exported)), exported)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
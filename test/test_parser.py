@@ -20,7 +20,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from htmlfive import Html5Parser
+from htmlfive import Html5Parser, Html5LimitExceeded
 
 import unittest
 
@@ -44,3 +44,30 @@ class BasicTest(unittest.TestCase):
         self.assertEqual(len(doc.documentElement.childNodes), 1)
         self.assertEqual(doc.documentElement.childNodes[0].attributes.items(),[("class", "<&>")])
         self.assertEqual(doc.documentElement.childNodes[0].childNodes[0].data, "<Hello World>")
+
+    def test_malformed(self):
+        # unterminated markup ends parsing rather than looping or failing
+        parser = Html5Parser()
+        for html in ["<html><body><!-- unterminated", "<html><body><p class=\"x>", "<html><body", "<!DOCTYPE html",
+                     "<html><body>text"]:
+            self.assertIsNone(parser.parse(html), html)
+        doc = parser.parse("<html><body><!--comment--></body></html>")
+        self.assertEqual(doc.documentElement.childNodes[0].childNodes[0].data, "comment")
+
+    def test_limits(self):
+        html = "<!DOCTYPE html><html><body><div a='1' b='2'><p>Hello</p><!--12345678--></div></body></html>"
+        self.assertIsNotNone(Html5Parser(max_bytes=len(html), max_depth=4, max_nodes=6, max_attributes=2,
+                                         max_text_size=8).parse(html))
+        for (limit, value) in [("max_bytes", len(html) - 1), ("max_depth", 3), ("max_nodes", 5),
+                               ("max_attributes", 1), ("max_text_size", 7)]:
+            with self.assertRaises(Html5LimitExceeded) as cm:
+                Html5Parser(**{limit: value}).parse(html)
+            self.assertEqual(cm.exception.limit, limit)
+
+    def test_long_tag(self):
+        # a tag with many quoted values should be scanned in linear time, and stop early at max_attributes
+        html = "<html><body><p " + 'a=">" ' * 100000 + 'b="x">text</p></body></html>'
+        doc = Html5Parser().parse(html)
+        self.assertEqual(doc.getElementsByTagName("p")[0].getAttribute("b"), "x")
+        with self.assertRaises(Html5LimitExceeded):
+            Html5Parser(max_attributes=10).parse(html)
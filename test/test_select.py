@@ -0,0 +1,90 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+
+from htmlfive import Html5Parser
+from htmlfive.html5_select import select, select_one, compile_selector, SelectorIndex
+
+html = """<!DOCTYPE html><html><head><title>Results</title></head><body>
+<div class="results main" id="results"><table>
+<tr data-id="1"><td>one</td><td lang="en-GB">two</td></tr>
+<tr><td>three</td></tr>
+<tr data-id="3"><td><a href="https://example.com/a.pdf">link</a></td></tr>
+</table></div>
+<div><table><tr data-id="9"><td>nine</td></tr></table></div>
+<h1>Heading</h1><p>First</p><span>Note</span><p>Second</p>
+</body></html>"""
+
+
+class BasicTest(unittest.TestCase):
+
+    def setUp(self):
+        self.doc = Html5Parser().parse(html)
+        self.index = SelectorIndex(self.doc)
+
+    def check(self, selector):
+        # the single pass and the index find the same elements, in document order
+        found = select(self.doc, selector)
+        self.assertEqual(self.index.select(selector), found)
+        return found
+
+    def text(self, selector):
+        return [element.firstChild.data if element.firstChild.nodeType == element.TEXT_NODE else element.tagName
+                for element in self.check(selector)]
+
+    def test_select(self):
+        self.assertEqual([tr.getAttribute("data-id") for tr in self.check("div.results > table tr[data-id]")],
+                         ["1", "3"])
+        self.assertEqual(len(self.check("tr[data-id]")), 3)
+        self.assertEqual(len(self.check("div > tr")), 0)
+        self.assertEqual(self.text("#results td"), ["one", "two", "three", "td"])
+        self.assertEqual(self.text(".main td:first-child"), ["one", "three", "td"])
+        self.assertEqual(self.text("td:last-child"), ["two", "three", "td", "nine"])
+        self.assertEqual(self.text("tr:nth-child(2) td"), ["three"])
+        self.assertEqual(self.text("h1 + p"), ["First"])
+        self.assertEqual(self.text("h1 ~ p"), ["First", "Second"])
+        self.assertEqual(self.text("p + span, h1"), ["Heading", "Note"])
+        self.assertEqual(self.text("body > *"), ["div", "div", "Heading", "First", "Note", "Second"])
+
+    def test_attributes(self):
+        self.assertEqual(self.text("[lang|=en]"), ["two"])
+        self.assertEqual(self.text("[lang=en]"), [])
+        self.assertEqual(self.text("a[href^='https:']"), ["link"])
+        self.assertEqual(self.text('a[href$=".pdf"]'), ["link"])
+        self.assertEqual(self.text("a[href*=example]"), ["link"])
+        self.assertEqual(self.text("[class~=main] tr[data-id=\"3\"] a"), ["link"])
+
+    def test_scope(self):
+        div = select_one(self.doc, "div")
+        self.assertEqual(len(select(div, "tr")), 3)
+        self.assertEqual(len(select(div, "div")), 0)
+        self.assertIsNone(select_one(self.doc, "table > p"))
+
+    def test_compile(self):
+        self.assertIs(compile_selector("div.results > tr"), compile_selector("div.results > tr"))
+        for selector in ["", "> p", "p >", "p,,a", "p[", "p!", "p:nth-child(x)", "p:hover"]:
+            with self.assertRaises(ValueError):
+                compile_selector(selector)
+
+
+if __name__ == '__main__':
+    unittest.main()
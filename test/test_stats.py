@@ -0,0 +1,70 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from htmlfive import Html5Parser, Html5Exporter, Html5Formatter, Html5Builder, Html5Stats
+
+import unittest
+
+html = "<!DOCTYPE html><html><body class=\"a&amp;b\"><!--comment--><p id=\"x\">Hello &lt;World&gt;</p><br></body></html>"
+
+
+class BasicTest(unittest.TestCase):
+
+    def test_pipeline(self):
+        reports = []
+        stats = Html5Stats(callback=lambda operation, stats: reports.append(operation))
+        doc = Html5Parser(stats=stats).parse(html)
+        exported = Html5Exporter(stats=stats).export(doc)
+        Html5Formatter(stats=stats).format(doc)
+        self.assertEqual(reports, ["parse", "export", "format"])
+
+        counters = stats.counters
+        self.assertEqual(counters["parser.input_chars"], len(html))
+        self.assertEqual(counters["parser.elements"], 4)
+        self.assertEqual(counters["parser.attributes"], 2)
+        self.assertEqual(counters["parser.comments"], 1)
+        self.assertEqual(counters["parser.text_chars"], len("Hello <World>"))
+        self.assertGreater(counters["parser.tokens"], 8)
+        self.assertEqual(counters["exporter.output_chars"], len(exported))
+        self.assertEqual(counters["formatter.elements"], 4)
+        for phase in ["parser.parse", "parser.tokenize", "parser.unescape", "parser.dom",
+                      "exporter.export", "formatter.format"]:
+            self.assertGreaterEqual(stats.timings[phase], 0, phase)
+        self.assertGreaterEqual(stats.timings["parser.parse"], stats.timings["parser.tokenize"])
+
+        stats.reset()
+        self.assertEqual(stats.as_dict(), {"counters": {}, "timings": {}})
+
+    def test_builder(self):
+        stats = Html5Stats()
+        builder = Html5Builder(stats=stats)
+        builder.body().add_element("p").add_text("Hello")
+        html = builder.get_html()
+        builder.get_html()
+        self.assertEqual(stats.counters["builder.renders"], 1)
+        self.assertEqual(stats.counters["builder.cache_hits"], 1)
+        self.assertEqual(stats.counters["builder.output_chars"], len(html))
+        self.assertIn("builder.write", stats.timings)
+
+    def test_disabled(self):
+        # without a stats object the output is unchanged
+        stats = Html5Stats()
+        self.assertEqual(Html5Parser().parse(html).toxml(), Html5Parser(stats=stats).parse(html).toxml())
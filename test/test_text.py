@@ -0,0 +1,60 @@
+# MIT License
+#
+# Copyright (c) 2023 Niall McCarroll
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+
+from htmlfive import Html5Parser, Html5LimitExceeded, extract_text
+
+html = """<!DOCTYPE html><html><head><title>Fish &amp; Chips</title><style>p { color: red }</style></head>
+<body>
+<h1>  Menu
+    today </h1><!-- not visible -->
+<p>Cod&nbsp;and <em>chips</em>, <br>peas</p>
+<script>var s = "<p>not text</p>";</script>
+</body></html>"""
+
+
+class BasicTest(unittest.TestCase):
+
+    def test_extract_text(self):
+        self.assertEqual(list(extract_text(html)), [
+            (("html", "head", "title"), "Fish & Chips"),
+            (("html", "body", "h1"), "Menu today"),
+            (("html", "body", "p"), "Cod\xa0and"),
+            (("html", "body", "p", "em"), "chips"),
+            (("html", "body", "p"), ","),
+            (("html", "body", "p"), "peas"),
+        ])
+
+    def test_skip_tags(self):
+        texts = [text for (_, text) in extract_text(html, skip_tags=("script", "style", "head", "em"))]
+        self.assertEqual(texts, ["Menu today", "Cod\xa0and", ",", "peas"])
+        texts = [text for (_, text) in extract_text(html, skip_tags=())]
+        self.assertIn('var s = "<p>not text</p>";', texts)
+
+    def test_malformed(self):
+        self.assertEqual(list(extract_text("<html><body><p>unclosed")), [])
+        with self.assertRaises(Html5LimitExceeded):
+            list(extract_text(html, parser=Html5Parser(max_depth=2)))
+
+
+if __name__ == '__main__':
+    unittest.main()